@@ -3,7 +3,9 @@
 # Predefined ATS-friendly resume layout for Stage 3
 # ==========================================================
 
-import os
+import io, os
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
@@ -18,25 +20,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 SECTION_ORDER = ["CONTACT", "SUMMARY", "SKILLS", "PROJECTS", "EXPERIENCE", "EDUCATION"]
 
 
-def build_cv_from_data(candidate_data: dict, sections: dict, output_pdf_path: str):
-    """
-    Builds a one-page, ATS-friendly resume PDF using a fixed layout.
-    candidate_data: dict containing name, email, phone, location, etc.
-    sections: dict of resume sections generated by LLaMA.
-    output_pdf_path: final PDF path to save.
-    """
-
-    os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
-
-    # --- Initialize PDF Document ---
-    doc = SimpleDocTemplate(
-        output_pdf_path,
-        pagesize=A4,
-        topMargin=0.6 * inch, bottomMargin=0.6 * inch,
-        leftMargin=0.8 * inch, rightMargin=0.8 * inch
-    )
-
-    # --- Define Styles ---
+@lru_cache(maxsize=1)
+def _get_styles():
+    """Build the paragraph styles once; they are read-only during layout."""
     styles = getSampleStyleSheet()
     header_style = ParagraphStyle(
         "Header", parent=styles["Heading1"],
@@ -52,6 +38,33 @@ def build_cv_from_data(candidate_data: dict, sections: dict, output_pdf_path: st
         "BodyText", parent=styles["Normal"],
         fontSize=11, leading=15, spaceAfter=4
     )
+    return header_style, section_title, body_style
+
+
+def build_cv_from_data(candidate_data: dict, sections: dict, output_pdf_path, invariant: bool = False):
+    """
+    Builds a one-page, ATS-friendly resume PDF using a fixed layout.
+    candidate_data: dict containing name, email, phone, location, etc.
+    sections: dict of resume sections generated by LLaMA.
+    output_pdf_path: final PDF path to save, or a writable binary file object (e.g. BytesIO).
+    invariant: omit timestamps and random IDs so identical inputs give identical bytes.
+    """
+
+    to_path = isinstance(output_pdf_path, (str, os.PathLike))
+    if to_path:
+        os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
+
+    # --- Initialize PDF Document ---
+    doc = SimpleDocTemplate(
+        output_pdf_path,
+        invariant=invariant,
+        pagesize=A4,
+        topMargin=0.6 * inch, bottomMargin=0.6 * inch,
+        leftMargin=0.8 * inch, rightMargin=0.8 * inch
+    )
+
+    # --- Styles (built once per process) ---
+    header_style, section_title, body_style = _get_styles()
 
     story = []
 
@@ -117,5 +130,39 @@ def build_cv_from_data(candidate_data: dict, sections: dict, output_pdf_path: st
     # 📦 BUILD PDF
     # ----------------------------------------------------------
     doc.build(story)
-    print(f"✅ PDF created successfully at: {output_pdf_path}")
+    if to_path:
+        print(f"✅ PDF created successfully at: {output_pdf_path}")
     return output_pdf_path
+
+
+def render_cv_bytes(candidate_data: dict, sections: dict) -> bytes:
+    """Render the resume PDF fully in memory and return its bytes (no disk I/O, byte-for-byte reproducible)."""
+    buffer = io.BytesIO()
+    build_cv_from_data(candidate_data, sections, buffer, invariant=True)
+    return buffer.getvalue()
+
+
+def _render_item(item):
+    candidate_data, sections, output_pdf_path = item
+    if output_pdf_path:
+        return build_cv_from_data(candidate_data, sections, output_pdf_path)
+    return render_cv_bytes(candidate_data, sections)
+
+
+def build_cv_batch(items, output_pdf_paths=None, workers=None, chunksize: int = 8):
+    """
+    Render many resumes in parallel across a process pool.
+
+    items: list of (candidate_data, sections) pairs.
+    output_pdf_paths: optional list of paths; when omitted, PDF bytes are returned instead.
+    workers: worker processes (default: CPU count); 1 renders in-process.
+    Returns a list of paths or bytes, in input order.
+    """
+    paths = output_pdf_paths or [None] * len(items)
+    jobs = [(candidate_data, sections, path) for (candidate_data, sections), path in zip(items, paths)]
+
+    if workers == 1:
+        return [_render_item(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_item, jobs, chunksize=chunksize))
@@ -0,0 +1,291 @@
+# ==========================================================
+# 🗄️ artifact_store.py
+# Per-request output folders backed by content-addressed files,
+# written in batches by a background thread
+# ==========================================================
+
+import os, re, json, time, queue, shutil, atexit, hashlib, threading
+from Codebase import config, utils, telemetry
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+
+class ArtifactStore:
+    """
+    Stage outputs keyed by request and content hash.
+
+    Layout under root:
+      objects/<ab>/<sha256><ext>     one file per distinct content
+      requests/<request_id>/<name>   hard links to objects (copies where links are unsupported)
+
+    put_json / put_bytes hash the content and return the final path at once; the
+    write is queued. A background thread writes queued items in batches, fsyncs
+    them per the fsync policy, and periodically removes request folders past
+    retention together with objects no request links to any more. Call flush()
+    before handing a path to something that reads it immediately; it reports
+    paths whose write failed.
+    """
+
+    def __init__(self, root: str, fsync: str = config.ARTIFACT_FSYNC,
+                 batch_size: int = config.ARTIFACT_WRITE_BATCH, interval: float = config.ARTIFACT_WRITE_INTERVAL,
+                 retention_hours: float = config.ARTIFACT_RETENTION_HOURS,
+                 max_requests: int = config.ARTIFACT_MAX_REQUESTS,
+                 cleanup_interval: float = config.ARTIFACT_CLEANUP_INTERVAL):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; choose one of {', '.join(FSYNC_POLICIES)}")
+        self.root = root
+        self.fsync = fsync
+        # "always" makes every write durable before the next one starts
+        self.batch_size = 1 if fsync == "always" else max(1, batch_size)
+        self.interval = 0.0 if fsync == "always" else interval
+        self.retention_hours = retention_hours
+        self.max_requests = max_requests
+        self.cleanup_interval = cleanup_interval
+        self.objects_dir = os.path.join(root, "objects")
+        self.requests_dir = os.path.join(root, "requests")
+        self.stats = {"writes": 0, "deduplicated": 0, "bytes_written": 0, "batches": 0, "errors": 0}
+
+        self._queue = queue.Queue()
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._completed = 0
+        self._failed = set()  # paths whose latest write failed
+        self._thread = None
+        self._next_cleanup = 0.0
+
+    # ----------------------------------------------------------
+    # 📥 Public API (request threads)
+    # ----------------------------------------------------------
+    def put_json(self, name: str, data, request_id: str = None) -> str:
+        """Queue data as pretty JSON under the request's folder; returns the final path."""
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        return self.put_bytes(name, payload, request_id)
+
+    def put_bytes(self, name: str, data: bytes, request_id: str = None) -> str:
+        """Queue raw bytes (e.g. a rendered PDF) under the request's folder; returns the final path."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.request_dir(request_id), os.path.basename(name))
+        with self._cond:
+            self._submitted += 1
+            self._start_writer()
+        self._queue.put((digest, os.path.splitext(name)[1], data, path))
+        return path
+
+    def request_dir(self, request_id: str = None) -> str:
+        """Folder for request_id (default: the current trace ID, else one per process)."""
+        request_id = request_id or default_request_id()
+        return os.path.join(self.requests_dir, re.sub(r"[^\w.-]", "_", str(request_id)))
+
+    def flush(self, timeout: float = None, paths=None) -> bool:
+        """
+        Block until everything queued so far has been written. False if timeout
+        expired first or a write failed: of the given paths, or of any queued path.
+        """
+        with self._cond:
+            target = self._submitted
+            if not self._cond.wait_for(lambda: self._completed >= target, timeout):
+                return False
+            return not (self._failed if paths is None else self._failed.intersection(paths))
+
+    # ----------------------------------------------------------
+    # ✍️ Background writer
+    # ----------------------------------------------------------
+    def _start_writer(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            paths = {path for *_, path in batch}
+            try:
+                self._write_batch(batch)
+                failed = False
+            except OSError as e:
+                failed = True
+                self.stats["errors"] += 1
+                telemetry.inc("artifact_write_errors_total")
+                utils.log_status(f"⚠️ Artifact write failed: {e}")
+            with self._cond:
+                if failed:
+                    self._failed |= paths
+                else:
+                    self._failed -= paths
+                self._completed += len(batch)
+                self._cond.notify_all()
+
+            if time.monotonic() >= self._next_cleanup:
+                self._next_cleanup = time.monotonic() + self.cleanup_interval
+                try:
+                    self.cleanup()
+                except OSError as e:
+                    utils.log_status(f"⚠️ Artifact cleanup failed: {e}")
+
+    def _object_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + ext)
+
+    def _write_batch(self, batch):
+        """
+        Group commit: write new objects to temp files, fsync them (per policy),
+        rename into place, link request paths, then fsync each touched folder once.
+        """
+        new_objects, touched_dirs = {}, set()
+        for digest, ext, data, _ in batch:
+            obj = self._object_path(digest, ext)
+            if obj in new_objects or os.path.exists(obj):
+                self.stats["deduplicated"] += 1
+                telemetry.inc("artifact_writes_total", result="deduplicated")
+                continue
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            tmp = f"{obj}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+                if self.fsync != "never":
+                    f.flush()
+                    os.fsync(f.fileno())
+            new_objects[obj] = tmp
+            self.stats["writes"] += 1
+            self.stats["bytes_written"] += len(data)
+            telemetry.inc("artifact_writes_total", result="written")
+
+        for obj, tmp in new_objects.items():
+            os.replace(tmp, obj)
+            touched_dirs.add(os.path.dirname(obj))
+        # A path written several times in one batch only needs its last version
+        latest = {path: self._object_path(digest, ext) for digest, ext, _, path in batch}
+        for path, obj in latest.items():
+            self._link(obj, path)
+            touched_dirs.add(os.path.dirname(path))
+
+        if self.fsync != "never":
+            for folder in touched_dirs:
+                _fsync_dir(folder)
+        self.stats["batches"] += 1
+
+    @staticmethod
+    def _link(obj: str, path: str):
+        """Atomically point path at obj: a hard link, or a copy where links are unsupported."""
+        if os.path.exists(path) and os.path.samefile(obj, path):
+            return  # already linked (renaming a link onto its own inode would be a no-op)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.link(obj, tmp)
+        except OSError:
+            shutil.copyfile(obj, tmp)
+        os.replace(tmp, path)
+
+    # ----------------------------------------------------------
+    # 🧹 Retention
+    # ----------------------------------------------------------
+    def cleanup(self) -> dict:
+        """
+        Remove request folders older than retention_hours or beyond the newest
+        max_requests, then objects that no request folder links to.
+        """
+        removed = {"requests": 0, "objects": 0}
+        cutoff = time.time() - self.retention_hours * 3600
+        if os.path.isdir(self.requests_dir):
+            folders = sorted(
+                ((entry.stat().st_mtime, entry.path) for entry in os.scandir(self.requests_dir) if entry.is_dir()),
+                reverse=True,
+            )
+            for rank, (mtime, folder) in enumerate(folders):
+                if rank >= self.max_requests or mtime < cutoff:
+                    shutil.rmtree(folder, ignore_errors=True)
+                    removed["requests"] += 1
+
+        if os.path.isdir(self.objects_dir):
+            for shard in os.scandir(self.objects_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    stat = entry.stat()
+                    if entry.name.endswith(".tmp"):
+                        orphaned = stat.st_mtime < cutoff  # left behind by a failed write
+                    else:
+                        orphaned = stat.st_nlink <= 1
+                    if orphaned:
+                        os.remove(entry.path)
+                        removed["objects"] += 1
+
+        if removed["requests"] or removed["objects"]:
+            utils.log_status(
+                f"🧹 Artifact retention: removed {removed['requests']} request folders, {removed['objects']} objects"
+            )
+        return removed
+
+
+def _fsync_dir(folder: str):
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return  # directories cannot be opened for fsync on some platforms (e.g. Windows)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ----------------------------------------------------------
+# 🔌 Shared store
+# ----------------------------------------------------------
+_process_request_id = f"run-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+_store = None
+_store_lock = threading.Lock()
+
+
+def default_request_id() -> str:
+    """The current trace ID, else one ID per process."""
+    return telemetry.current_trace_id() or _process_request_id
+
+
+def item_request_id(index: int, source=None) -> str:
+    """
+    Request ID for one item of a run that shares a trace (batch mode), so items get
+    their own folders: "<trace>-0003-resume_a" (the file stem is added for file paths).
+    """
+    request_id = f"{default_request_id()}-{index:04d}"
+    if isinstance(source, str) and os.path.isfile(source):
+        request_id += "-" + os.path.splitext(os.path.basename(source))[0]
+    return request_id
+
+
+def get_store():
+    """Return the shared store for config.ARTIFACT_DIR, or None when the store is disabled."""
+    global _store
+    if not config.ARTIFACT_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None or _store.root != config.ARTIFACT_DIR:
+            if _store is not None:
+                _store.flush()
+            _store = ArtifactStore(config.ARTIFACT_DIR)
+        return _store
+
+
+def save_json(data, legacy_path: str, request_id: str = None) -> str:
+    """
+    Save a stage's JSON output. Goes to the request's folder (named like legacy_path)
+    through the store, or is written synchronously to legacy_path when the store is disabled.
+    """
+    store = get_store()
+    if store is None:
+        utils.save_json(data, legacy_path)
+        return legacy_path
+    return store.put_json(os.path.basename(legacy_path), data, request_id)
+
+
+def flush(timeout: float = None, paths=None) -> bool:
+    """Wait for queued writes of the shared store (no-op if it was never used); see ArtifactStore.flush."""
+    return _store.flush(timeout, paths) if _store is not None else True
+
+
+atexit.register(flush)
@@ -0,0 +1,163 @@
+# ==========================================================
+# 📊 ats_matrix.py
+# Vectorized many-to-many ATS scoring (candidates × jobs)
+# Scores are identical to stage3_tailor.compute_ats_score per pair.
+# ==========================================================
+
+import numpy as np
+from Codebase import keyword_matcher
+
+
+# Upper bound on cells of one dense (resumes × jobs) block computed at a time
+_MAX_BLOCK_CELLS = 4_000_000
+
+
+class ATSScoringEngine:
+    """
+    Precomputes a shared keyword vocabulary and a sparse (CSR-style) JD term
+    matrix once, then scores any number of resumes against every JD with
+    batched NumPy operations.
+
+    Parameters
+    ----------
+    jd_keyword_lists : list[list[str]]
+        One keyword list per job, as passed to compute_ats_score.
+    """
+
+    def __init__(self, jd_keyword_lists):
+        # keyword_matcher semantics: keywords as normalized token runs, distinct per job, empty ones dropped
+        jd_sets = [
+            {" ".join(tokens) for tokens in map(keyword_matcher.normalize, keywords) if tokens}
+            for keywords in jd_keyword_lists
+        ]
+
+        self.vocabulary = {}
+        for jd_set in jd_sets:
+            for word in jd_set:
+                self.vocabulary.setdefault(word, len(self.vocabulary))
+
+        self.n_jobs = len(jd_sets)
+        self.denominators = np.fromiter((len(s) for s in jd_sets), dtype=np.int64, count=self.n_jobs)
+
+        # Inverted postings (term → job ids), i.e. the JD matrix in column-major CSR form
+        term_ids = np.fromiter(
+            (self.vocabulary[w] for s in jd_sets for w in s), dtype=np.int64, count=int(self.denominators.sum())
+        )
+        job_ids = np.repeat(np.arange(self.n_jobs, dtype=np.int64), self.denominators)
+        order = np.argsort(term_ids, kind="stable")
+        self._posting_jobs = job_ids[order]
+        self._posting_ptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocabulary)), out=self._posting_ptr[1:])
+
+        self._score_table, self._table_row = self._build_score_table()
+        # One automaton over the whole vocabulary; its keyword indices are the term ids
+        self._matcher = keyword_matcher.KeywordMatcher(list(self.vocabulary))
+
+    # ----------------------------------------------------------
+    # 🧮 Exact score lookup table
+    # ----------------------------------------------------------
+    def _build_score_table(self):
+        """
+        Scores only depend on (matched, denominator), so every distinct value
+        is computed once with Python's round() and then gathered by index.
+        """
+        unique_denominators = np.unique(self.denominators)
+        max_denominator = int(unique_denominators.max()) if len(unique_denominators) else 0
+        table = np.zeros((len(unique_denominators), max_denominator + 1), dtype=np.float64)
+        for row, d in enumerate(unique_denominators.tolist()):
+            if d:
+                table[row, : d + 1] = [round((m / d) * 100, 2) for m in range(d + 1)]
+        table_row = np.searchsorted(unique_denominators, self.denominators)
+        return table, table_row
+
+    # ----------------------------------------------------------
+    # 🧾 Resume term matrix
+    # ----------------------------------------------------------
+    def resume_term_matrix(self, resume_texts):
+        """
+        Return (indptr, term_ids) CSR arrays of vocabulary terms present in each resume.
+        Terms are found like compute_ats_score finds them: phrases as contiguous normalized tokens.
+        """
+        rows = [sorted(self._matcher.find(text)) for text in resume_texts]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=indptr[1:])
+        term_ids = np.fromiter((t for r in rows for t in r), dtype=np.int64, count=int(indptr[-1]))
+        return indptr, term_ids
+
+    def _matched_counts(self, indptr, term_ids, start, stop):
+        """Sparse × sparse product for resume rows [start, stop): matched keyword counts per job."""
+        n_rows = stop - start
+        row_nnz = np.diff(indptr[start:stop + 1])
+        rows = np.repeat(np.arange(n_rows, dtype=np.int64), row_nnz)
+        terms = term_ids[indptr[start]:indptr[stop]]
+
+        # Expand every (resume, term) pair into that term's job postings
+        posting_len = self._posting_ptr[terms + 1] - self._posting_ptr[terms]
+        total = int(posting_len.sum())
+        pair_rows = np.repeat(rows, posting_len)
+        offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(posting_len) - posting_len, posting_len)
+        pair_jobs = self._posting_jobs[np.repeat(self._posting_ptr[terms], posting_len) + offsets]
+
+        counts = np.bincount(pair_rows * self.n_jobs + pair_jobs, minlength=n_rows * self.n_jobs)
+        return counts.reshape(n_rows, self.n_jobs)
+
+    # ----------------------------------------------------------
+    # 📊 Scoring API
+    # ----------------------------------------------------------
+    def iter_score_blocks(self, resume_texts):
+        """Yield (row_offset, scores_block) so huge matrices can be consumed block by block."""
+        indptr, term_ids = self.resume_term_matrix(resume_texts)
+        n_resumes = len(indptr) - 1
+        block_rows = max(1, _MAX_BLOCK_CELLS // max(self.n_jobs, 1))
+
+        for start in range(0, n_resumes, block_rows):
+            stop = min(start + block_rows, n_resumes)
+            matched = self._matched_counts(indptr, term_ids, start, stop)
+            yield start, self._score_table[self._table_row[None, :], matched]
+
+    def score_matrix(self, resume_texts) -> np.ndarray:
+        """Return the full (n_resumes × n_jobs) score matrix in percent."""
+        scores = np.zeros((len(resume_texts), self.n_jobs), dtype=np.float64)
+        for start, block in self.iter_score_blocks(resume_texts):
+            scores[start:start + len(block)] = block
+        return scores
+
+    def top_k_jobs(self, resume_texts, k: int):
+        """
+        Return (job_indices, scores), each (n_resumes × k), best jobs first per resume.
+        Computed block by block, so the full matrix is never materialized.
+        """
+        k = min(k, self.n_jobs)
+        indices = np.zeros((len(resume_texts), k), dtype=np.int64)
+        values = np.zeros((len(resume_texts), k), dtype=np.float64)
+        for start, block in self.iter_score_blocks(resume_texts):
+            idx, val = top_k(block, k)
+            indices[start:start + len(block)] = idx
+            values[start:start + len(block)] = val
+        return indices, values
+
+
+def top_k(scores: np.ndarray, k: int):
+    """
+    Return (indices, values) of the k highest scores in each row, sorted descending
+    and then by column index. Which of several equal scores at the k-th place is
+    kept is unspecified. Use scores.T to rank rows per column.
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64), np.zeros((scores.shape[0], 0))
+
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+
+    values = np.take_along_axis(scores, candidates, axis=1)
+    order = np.lexsort((candidates, -values), axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.take_along_axis(values, order, axis=1)
+
+
+def score_matrix(resume_texts, jd_keyword_lists) -> np.ndarray:
+    """Convenience wrapper: full score matrix for resumes × keyword lists."""
+    return ATSScoringEngine(jd_keyword_lists).score_matrix(resume_texts)
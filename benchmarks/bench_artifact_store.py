@@ -0,0 +1,125 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_artifact_store.py
+# Artifact store vs synchronous save_json: request-thread latency
+# per fsync policy, de-duplication, isolation of concurrent
+# requests and retention cleanup
+#
+#   python benchmarks/bench_artifact_store.py --requests 500
+# ==========================================================
+
+import argparse, os, sys, tempfile, threading, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import artifact_store, telemetry, utils
+from Codebase.benchmarks import corpus
+
+
+def _disk_bytes(root: str) -> int:
+    """Bytes actually allocated under root (hard links counted once)."""
+    seen, total = set(), 0
+    for folder, _, files in os.walk(root):
+        for name in files:
+            st = os.stat(os.path.join(folder, name))
+            if st.st_ino not in seen:
+                seen.add(st.st_ino)
+                total += st.st_size
+    return total
+
+
+def _percentiles(values: list) -> str:
+    values = sorted(values)
+    p = lambda q: values[min(len(values) - 1, int(len(values) * q))] * 1e6
+    return f"p50 {p(0.5):8.1f}µs  p99 {p(0.99):8.1f}µs"
+
+
+def bench_latency(payloads: list, tmp: str):
+    """
+    Per-write latency seen by the request thread, and total time until everything
+    is on disk (the synchronous baseline never fsyncs).
+    """
+    print(f"{'writer':<24}{'request-thread latency':>36}{'until durable':>16}{'on disk':>12}")
+    latencies, root = [], os.path.join(tmp, "sync")
+    start = time.perf_counter()
+    for i, data in enumerate(payloads):
+        t0 = time.perf_counter()
+        utils.save_json(data, os.path.join(root, f"r{i}", "candidate_output.json"))
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    print(f"{'save_json (sync)':<24}{_percentiles(latencies):>36}{total * 1000:>13.1f}ms"
+          f"{_disk_bytes(root) / 1024:>10.0f}KB")
+
+    for policy in artifact_store.FSYNC_POLICIES:
+        root = os.path.join(tmp, policy)
+        store = artifact_store.ArtifactStore(root, fsync=policy)
+        latencies = []
+        start = time.perf_counter()
+        for i, data in enumerate(payloads):
+            t0 = time.perf_counter()
+            store.put_json("candidate_output.json", data, request_id=f"r{i}")
+            latencies.append(time.perf_counter() - t0)
+        store.flush()
+        total = time.perf_counter() - start
+        print(f"{'store fsync=' + policy:<24}{_percentiles(latencies):>36}{total * 1000:>13.1f}ms"
+              f"{_disk_bytes(root) / 1024:>10.0f}KB  ({store.stats['deduplicated']} deduplicated)")
+
+
+def check_isolation(tmp: str, users: int) -> bool:
+    """Concurrent requests under their own trace IDs must each get their own, intact output."""
+    store = artifact_store.ArtifactStore(os.path.join(tmp, "isolation"))
+    paths = {}
+
+    def user(i):
+        with telemetry.trace(f"user{i}"):
+            for _ in range(20):
+                paths[i] = store.put_json("candidate_output.json", {"user": i})
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.flush()
+    ok = len(set(paths.values())) == users and all(utils.load_json(p) == {"user": i} for i, p in paths.items())
+    print(f"\n{users} concurrent requests → {len(set(paths.values()))} distinct outputs, "
+          f"{'all intact' if ok else '❌ CORRUPTED'}")
+    return ok
+
+
+def check_retention(tmp: str, keep: int) -> bool:
+    """Only the newest `keep` request folders survive; objects only they referenced are removed."""
+    root = os.path.join(tmp, "retention")
+    store = artifact_store.ArtifactStore(root, max_requests=keep, cleanup_interval=3600)
+    for i in range(keep * 3):
+        store.put_json("candidate_output.json", {"request": i}, request_id=f"r{i:03d}")
+        store.flush()
+        age = time.time() - (keep * 3 - i)  # deterministic age order, all within retention
+        os.utime(store.request_dir(f"r{i:03d}"), (age, age))
+    removed = store.cleanup()
+    left = sorted(os.listdir(store.requests_dir))
+    objects = sum(len(files) for _, _, files in os.walk(store.objects_dir))
+    ok = len(left) == keep and objects == keep and left[-1] == f"r{keep * 3 - 1:03d}"
+    print(f"Retention (keep {keep}): removed {removed['requests']} folders / {removed['objects']} objects, "
+          f"{len(left)} folders and {objects} objects left {'✅' if ok else '❌'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Artifact store benchmark")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--duplicate_rate", type=float, default=0.5,
+                        help="Share of writes repeating an earlier payload (e.g. the same resume uploaded again)")
+    parser.add_argument("--users", type=int, default=8)
+    args = parser.parse_args()
+
+    candidates = corpus.generate_candidates(max(1, int(args.requests * (1 - args.duplicate_rate))), seed=2)
+    payloads = [candidates[i % len(candidates)] for i in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_latency(payloads, tmp)
+        ok = check_isolation(tmp, args.users)
+        ok = check_retention(tmp, keep=5) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
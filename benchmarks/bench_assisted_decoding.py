@@ -0,0 +1,129 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_assisted_decoding.py
+# Stage 3 assisted decoding: greedy generation with and without a
+# draft model on Stage 3 prompts. Reports tokens/sec, speedup and
+# draft acceptance, and checks the output is unchanged.
+#
+#   python benchmarks/bench_assisted_decoding.py            # tiny local target + draft
+#   python benchmarks/bench_assisted_decoding.py --target meta-llama/Llama-3.2-3b-instruct \
+#       --draft meta-llama/Llama-3.2-1B-Instruct --max_new_tokens 300
+#
+# The default pair is a tiny random target whose deeper layers only
+# nudge its first layer, and a draft made of that first layer: a
+# stand-in for a well-distilled draft that shows the mechanism.
+# Random models say nothing about real acceptance rates.
+# Exits non-zero if any assisted output differs from plain greedy.
+# ==========================================================
+
+import argparse, contextlib, os, sys, tempfile, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import config, generation, models, stage2_jd, stage3_tailor, utils
+from Codebase.benchmarks import corpus, run_suite, stubs
+
+
+def build_tiny_target(path: str, hidden_size: int = 768, layers: int = 8, deep_scale: float = 0.05) -> str:
+    """Tiny random LLaMA whose layers after the first write only a scaled-down update to the residual stream."""
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    stubs.build_tiny_model(path, hidden_size=hidden_size, layers=layers)
+    model = AutoModelForCausalLM.from_pretrained(path)
+    with torch.no_grad():
+        for layer in model.model.layers[1:]:
+            layer.self_attn.o_proj.weight.mul_(deep_scale)
+            layer.mlp.down_proj.weight.mul_(deep_scale)
+    model.save_pretrained(path)
+    return path
+
+
+def build_truncated_draft(target: str, path: str, layers: int) -> str:
+    """Save a copy of the target model keeping only its first `layers` decoder layers."""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    model = AutoModelForCausalLM.from_pretrained(target)
+    model.model.layers = model.model.layers[:layers]
+    model.config.num_hidden_layers = layers
+    model.save_pretrained(path)
+    AutoTokenizer.from_pretrained(target).save_pretrained(path)
+    return path
+
+
+def stage3_prompts(n: int, tokenizer) -> list:
+    import random
+    rng = random.Random(5)
+    return [
+        stage3_tailor._build_prompt(c, stage2_jd.parse_jd_text(corpus.generate_jd_text(rng)), tokenizer)
+        for c in corpus.generate_candidates(n, seed=5)
+    ]
+
+
+def run(pipe, prompts, max_new_tokens: int, assisted: bool):
+    """Greedy Stage 3 generation for each prompt; returns (texts, seconds, new tokens)."""
+    texts, seconds, tokens = [], 0.0, 0
+    for prompt in prompts:
+        kwargs = {"max_new_tokens": max_new_tokens, "do_sample": False, "return_full_text": False}
+        if assisted:
+            kwargs.update(generation.assisted_generation_kwargs(pipe))
+        kwargs.update(generation.section_generation_kwargs(pipe, max_new_tokens, prompt if assisted else None))
+        start = time.perf_counter()
+        with generation.assisted_tracking(pipe, kwargs) as record_assisted:
+            text = utils.generated_text(pipe(prompt, **kwargs))
+            record_assisted(text)
+        seconds += time.perf_counter() - start
+        tokens += len(pipe.tokenizer(text, add_special_tokens=False)["input_ids"])
+        texts.append(text)
+    return texts, seconds, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage 3 assisted decoding benchmark")
+    parser.add_argument("--target", help="Target causal LM (default: tiny local LLaMA)")
+    parser.add_argument("--draft", help="Draft model sharing the target's tokenizer (default: truncated target)")
+    parser.add_argument("--draft_layers", type=int, default=1, help="Layers kept in the default draft")
+    parser.add_argument("--assistant_tokens", type=int, default=config.STAGE3_ASSISTANT_TOKENS)
+    parser.add_argument("--n", type=int, default=3, help="Stage 3 prompts")
+    parser.add_argument("--max_new_tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    tmp = tempfile.gettempdir()
+    if not args.target:
+        args.target = os.path.join(tmp, "ats-bench-tiny-target-768")
+        if not os.path.exists(os.path.join(args.target, "config.json")):
+            build_tiny_target(args.target)
+    if not args.draft:
+        args.draft = os.path.join(tmp, f"ats-bench-draft-{os.path.basename(args.target)}-{args.draft_layers}")
+        if not os.path.exists(os.path.join(args.draft, "config.json")):
+            build_truncated_draft(args.target, args.draft, args.draft_layers)
+
+    with tempfile.TemporaryDirectory() as out, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            run_suite.isolate_outputs(out)
+            config.STAGE3_ASSISTANT_MODEL = args.draft
+            config.STAGE3_ASSISTANT_TOKENS = args.assistant_tokens
+            pipe = models.build_pipeline("text-generation", args.target, config.HF_TOKEN)
+            generation.load_assistant(args.draft)
+            prompts = stage3_prompts(args.n, pipe.tokenizer)
+            run(pipe, prompts[:1], 8, assisted=True)  # warm-up
+
+            plain, plain_s, plain_tokens = run(pipe, prompts, args.max_new_tokens, assisted=False)
+            before = generation.assisted_stats()
+            assisted, assisted_s, assisted_tokens = run(pipe, prompts, args.max_new_tokens, assisted=True)
+            after = generation.assisted_stats()
+
+    draft_tokens = after["draft_tokens"] - before["draft_tokens"]
+    accepted = (after["new_tokens"] - before["new_tokens"]) - (after["target_steps"] - before["target_steps"])
+    print(f"target {args.target}\ndraft  {args.draft}\n")
+    print(f"{'mode':<12}{'tokens':>8}{'seconds':>10}{'tokens/s':>10}")
+    print(f"{'greedy':<12}{plain_tokens:>8}{plain_s:>10.2f}{plain_tokens / plain_s:>10.1f}")
+    print(f"{'assisted':<12}{assisted_tokens:>8}{assisted_s:>10.2f}{assisted_tokens / assisted_s:>10.1f}")
+    print(f"\nSpeedup {plain_s / assisted_s:.2f}x | draft acceptance "
+          f"{accepted / draft_tokens if draft_tokens else 0:.0%} ({accepted}/{draft_tokens})")
+
+    identical = plain == assisted
+    print(f"Greedy output unchanged: {'✅' if identical else '❌'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_clean_output.py
+# Stage 3 output cleaner: checks stage3_tailor._clean_output
+# against the previous regex implementation on a golden corpus
+# and random fuzz inputs, then times both on growing inputs
+# (up to several MB) to show linear scaling
+#
+#   python benchmarks/bench_clean_output.py
+#   python benchmarks/bench_clean_output.py --fuzz 20000 --max_mb 8
+#
+# Exits non-zero on any output difference or if time per byte
+# grows more than --max_growth between the mid and largest size.
+# ==========================================================
+
+import argparse, os, random, re, sys, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import stage2_jd, stage3_tailor
+from Codebase.benchmarks import corpus, stubs
+
+
+def legacy_clean_output(raw: str) -> str:
+    """The regex-per-step cleaner this benchmark compares against (kept verbatim)."""
+    raw = re.sub(r"CANDIDATE DATA:.*?Now write the tailored resume below:", "", raw, flags=re.S | re.I)
+    raw = re.sub(r"JOB DESCRIPTION DATA:.*?$", "", raw, flags=re.S | re.I)
+    raw = re.sub(r"(?i)rules\s*:.*?(?=\n[A-Z])", "", raw, flags=re.S)
+    raw = re.sub(r"(?i)note\s*:.*", "", raw, flags=re.S)
+    raw = re.sub(r"(?i)(education\s*education)", "Education", raw)
+    raw = re.sub(r"(?i)(summary\s*summary)", "Summary", raw)
+    raw = re.sub(r"[*_#>`]+", "", raw)
+    raw = re.sub(r"\n\s*•\s*", "\n• ", raw)
+    raw = re.sub(r"•{2,}", "•", raw)
+    repl = {"–": "-", "—": "-", "•": "•", "“": '"', "”": '"', "‘": "'", "’": "'"}
+    for k, v in repl.items():
+        raw = raw.replace(k, v)
+    raw = re.sub(r"\n{3,}", "\n\n", raw).strip()
+    return raw.strip()
+
+
+# ----------------------------------------------------------
+# 🧾 Golden corpus and fuzz inputs
+# ----------------------------------------------------------
+_NOISE = [
+    "Note: generated by the model.", "\nRules:\n- No markdown.\n- Be concise.\n", "**SKILLS**", "## Summary",
+    "Summary\nSummary", "EDUCATION education", "\n\n\n\n", "\n  ••  ", "— “quoted” ‘text’ –", "> `code`",
+]
+
+_FRAGMENTS = [
+    "CANDIDATE DATA:", "candidate data:", "Now write the tailored resume below:", "now WRITE the tailored resume below:",
+    "JOB DESCRIPTION DATA:", "job description data:", "Rules:", "rules :", "RULES\t:", "Note:", "NOTE :", "note",
+    "education", "Education", "EDUCATION", "summary", "SUMMARY", "ſummary", "\n", "\n\n\n", "\r\n", " ", "\t",
+    " ", "\x0c", "•", "••", "• ", "*", "**", "_", "#", ">", "`", "–", "—", "“", "”", "‘", "’", ":", "A", "a",
+    "x", "\nA", "\nb", "\n•", "K", "ı", "İ", "ß", "Skills", "Python, SQL", "{\"name\": \"x\"}",
+]
+
+
+def golden_corpus(n: int, seed: int = 0) -> list:
+    """Stub LLaMA outputs, with and without the echoed prompt, plus typical model noise."""
+    rng = random.Random(seed)
+    llama = stubs.StubPipeline("llama")
+    texts = []
+    for c in corpus.generate_candidates(n, seed=seed):
+        prompt = stage3_tailor._render_prompt(repr(c), repr(stage2_jd.parse_jd_text(corpus.generate_jd_text(rng))))
+        answer = llama(prompt, return_full_text=False)[0]["generated_text"]
+        lines = answer.split("\n")
+        for _ in range(rng.randint(0, 4)):
+            lines.insert(rng.randint(0, len(lines)), rng.choice(_NOISE))
+        noisy = "\n".join(lines)
+        texts += [prompt + answer, answer, noisy, prompt + noisy]
+    return texts
+
+
+def fuzz_inputs(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 40)))
+
+
+def check(texts) -> int:
+    """Return the number of inputs where the new and legacy cleaners disagree (first few are printed)."""
+    mismatches = 0
+    for text in texts:
+        if stage3_tailor._clean_output(text) != legacy_clean_output(text):
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"  ❌ mismatch on {text[:200]!r}")
+    return mismatches
+
+
+# ----------------------------------------------------------
+# 📈 Scaling
+# ----------------------------------------------------------
+def scaling_inputs(size: int, typical: str) -> dict:
+    """Inputs of about `size` characters: realistic output and the old cleaner's worst cases."""
+    return {
+        "typical": (typical * (size // len(typical) + 1))[:size],
+        "rules without end": ("rules: x " * (size // 9 + 1))[:size],
+        "prompt without end": ("CANDIDATE DATA: " * (size // 16 + 1))[:size],
+        "blank lines": "\n" * size + "x",
+    }
+
+
+def _time(fn, text: str, budget_s: float) -> float:
+    """Best of a few runs, in seconds."""
+    best, spent = float("inf"), 0.0
+    while spent < budget_s or best == float("inf"):
+        start = time.perf_counter()
+        fn(text)
+        elapsed = time.perf_counter() - start
+        best, spent = min(best, elapsed), spent + elapsed
+        if elapsed > budget_s:
+            break
+    return best
+
+
+def run_scaling(max_mb: float, legacy_limit_s: float, max_growth: float) -> list:
+    typical = golden_corpus(1)[3]
+    sizes, size = [], 16 * 1024
+    while size <= max_mb * 1024 * 1024:
+        sizes.append(size)
+        size *= 4
+
+    failures, legacy_too_slow = [], set()
+    print(f"\n{'input':<20}{'size':>10}{'new ms':>11}{'ns/char':>9}{'legacy ms':>12}")
+    for name in scaling_inputs(1, typical):
+        per_char = []
+        for size in sizes:
+            text = scaling_inputs(size, typical)[name]
+            new_s = _time(stage3_tailor._clean_output, text, 0.2)
+            per_char.append(new_s / len(text) * 1e9)
+            legacy = "skipped"
+            if name not in legacy_too_slow:
+                legacy_s = _time(legacy_clean_output, text, 0.2)
+                legacy = f"{legacy_s * 1000:.1f}"
+                if legacy_s > legacy_limit_s:
+                    legacy_too_slow.add(name)
+            print(f"{name:<20}{size / 1024:>8.0f}KB{new_s * 1000:>11.2f}{per_char[-1]:>9.1f}{legacy:>12}")
+        growth = per_char[-1] / per_char[len(per_char) // 2] if len(per_char) > 1 else 1.0
+        if growth > max_growth:
+            failures.append((name, growth))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage 3 output cleaner equivalence and scaling benchmark")
+    parser.add_argument("--golden", type=int, default=50, help="Candidates in the golden corpus (4 texts each)")
+    parser.add_argument("--fuzz", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max_mb", type=float, default=4.0)
+    parser.add_argument("--legacy_limit_s", type=float, default=2.0,
+                        help="Stop timing the legacy cleaner on an input once it takes longer than this")
+    parser.add_argument("--max_growth", type=float, default=3.0,
+                        help="Allowed growth of time per char from the mid to the largest size")
+    args = parser.parse_args()
+
+    golden = golden_corpus(args.golden, args.seed)
+    golden_mismatches = check(golden)
+    print(f"Golden corpus: {len(golden) - golden_mismatches}/{len(golden)} identical")
+    fuzz_mismatches = check(fuzz_inputs(args.fuzz, args.seed))
+    print(f"Fuzz:          {args.fuzz - fuzz_mismatches}/{args.fuzz} identical")
+
+    failures = run_scaling(args.max_mb, args.legacy_limit_s, args.max_growth)
+    for name, growth in failures:
+        print(f"❌ {name}: time per char grew {growth:.1f}x")
+    if golden_mismatches or fuzz_mismatches or failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
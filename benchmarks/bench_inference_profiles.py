@@ -0,0 +1,111 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_inference_profiles.py
+# Compare CPU inference profiles (config.INFERENCE_PROFILES):
+# load time, generated tokens/sec, peak RSS and Stage 1 JSON
+# validity rate, each profile measured in its own process
+#
+#   python benchmarks/bench_inference_profiles.py                      # tiny local model
+#   python benchmarks/bench_inference_profiles.py --model google/gemma-2b-it \
+#       --task text2text-generation --n 20 --max_new_tokens 700
+#
+# A tiny random model never produces valid JSON; use a real model
+# for meaningful validity rates.
+# ==========================================================
+
+import argparse, contextlib, json, os, subprocess, sys, tempfile, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import config
+
+
+def run_profile(args) -> dict:
+    """Load the model with one profile and run Stage 1 prompts through it."""
+    from Codebase import models, stage1_resume, prompt_builder, utils
+    from Codebase.benchmarks import corpus, run_suite
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            run_suite.isolate_outputs(tmp)
+
+            start = time.perf_counter()
+            pipe = models.build_pipeline(args.task, args.model, config.HF_TOKEN, args.worker)
+            load_s = time.perf_counter() - start
+            load_rss = run_suite.peak_rss_mb()
+
+            tokenizer = pipe.tokenizer
+            texts = [corpus.candidate_to_resume_text(c) for c in corpus.generate_candidates(args.n, seed=3)]
+            prompts = [stage1_resume._build_prompt(t, tokenizer) for t in texts]
+            pipe(prompts[0], max_new_tokens=8, do_sample=False)  # warm-up
+
+            generated, valid, gen_s = 0, 0, 0.0
+            for prompt in prompts:
+                t0 = time.perf_counter()
+                output = utils.generated_text(pipe(prompt, max_new_tokens=args.max_new_tokens, do_sample=False))
+                gen_s += time.perf_counter() - t0
+                new_text = output[len(prompt):] if output.startswith(prompt) else output
+                generated += prompt_builder.count_tokens(new_text, tokenizer)
+                parsed = stage1_resume._parse_model_output(new_text)
+                valid += bool(parsed) and "raw_output" not in parsed
+
+    return {
+        "profile": args.worker,
+        "load_s": round(load_s, 2),
+        "tokens_per_s": round(generated / gen_s, 2) if gen_s else 0.0,
+        "generated_tokens": generated,
+        "json_valid_rate": round(valid / len(prompts), 3),
+        "load_rss_mb": round(load_rss, 1),
+        "peak_rss_mb": round(run_suite.peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU inference profile benchmark")
+    parser.add_argument("--profiles", nargs="+", default=list(config.INFERENCE_PROFILES))
+    parser.add_argument("--model", help="Model name or path (default: a tiny local random LLaMA)")
+    parser.add_argument("--task", default="text-generation")
+    parser.add_argument("--n", type=int, default=4, help="Resumes per profile")
+    parser.add_argument("--max_new_tokens", type=int, default=64)
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--result_file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(run_profile(args), f)
+        return
+
+    if not args.model:
+        from Codebase.benchmarks import stubs
+        args.model = os.path.join(tempfile.gettempdir(), "ats-bench-tiny-llama-256")
+        if not os.path.exists(os.path.join(args.model, "config.json")):
+            stubs.build_tiny_model(args.model, hidden_size=256, layers=4)
+
+    results = []
+    for profile in args.profiles:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_file = f.name
+        try:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", profile, "--result_file", result_file,
+                 "--model", args.model, "--task", args.task, "--n", str(args.n),
+                 "--max_new_tokens", str(args.max_new_tokens)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                raise RuntimeError(f"Profile {profile} failed (exit {proc.returncode})")
+            with open(result_file, "r", encoding="utf-8") as f:
+                r = json.load(f)
+        finally:
+            os.remove(result_file)
+        results.append(r)
+        print(f"{profile:<8} load {r['load_s']:6.2f}s  {r['tokens_per_s']:9.1f} tok/s  "
+              f"JSON valid {r['json_valid_rate']:6.1%}  peak RSS {r['peak_rss_mb']:8.1f} MB")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "task": args.task, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
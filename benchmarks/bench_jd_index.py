@@ -0,0 +1,143 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_jd_index.py
+# JD index: bulk build, incremental update (changed + new postings),
+# compaction, and top-N query latency / memory for Stage 1-style
+# candidates in a fresh process. Top-N scores are checked against
+# a brute-force scan of every indexed job.
+#
+#   python benchmarks/bench_jd_index.py                      # 100k synthetic JDs
+#   python benchmarks/bench_jd_index.py --jobs 300000 --queries 500
+#   python benchmarks/bench_jd_index.py --index /tmp/jd.sqlite --skip_build   # reuse an index
+# ==========================================================
+
+import argparse, json, math, os, random, statistics, subprocess, sys, tempfile, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import config
+
+
+def run_queries(args) -> dict:
+    """Worker: open the index cold and time top_jobs for generated candidates."""
+    from Codebase import jd_index, model_manager
+    from Codebase.benchmarks import corpus
+
+    candidates = corpus.generate_candidates(args.queries, seed=11)
+    rss_before = model_manager.peak_rss_mb()
+    index = jd_index.JDIndex(args.index)
+    start = time.perf_counter()
+    index.top_jobs(candidates[0], args.top_n)
+    first_ms = (time.perf_counter() - start) * 1000
+    latencies = []
+    for candidate in candidates:
+        start = time.perf_counter()
+        index.top_jobs(candidate, args.top_n)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "first_ms": first_ms,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "max_ms": latencies[-1],
+        "rss_added_mb": model_manager.peak_rss_mb() - rss_before,
+    }
+
+
+def check_exact(index, n_candidates: int, top_n: int) -> bool:
+    """Compare top_jobs scores with a brute-force scan of every job (index must be compacted)."""
+    from Codebase import jd_index
+    from Codebase.benchmarks import corpus
+
+    jobs = [jd_index.jd_terms(json.loads(data)) for (data,) in index._conn.execute("SELECT data FROM jobs")]
+    df = {}
+    for terms in jobs:
+        for term in terms:
+            df[term] = df.get(term, 0) + 1
+    ok = True
+    for candidate in corpus.generate_candidates(n_candidates, seed=12):
+        query = {(f, t) for f, terms in jd_index.candidate_terms(candidate).items() for t in terms}
+        brute = sorted((
+            sum(config.JD_INDEX_FIELD_WEIGHTS[f] * math.log(1 + len(jobs) / df[(f, t)]) for f, t in terms & query)
+            for terms in jobs
+        ), reverse=True)[:top_n]
+        got = [r["score"] for r in index.top_jobs(candidate, top_n)]
+        ok &= len(got) == len(brute) and all(abs(g - b) <= 1e-3 * max(1.0, b) for g, b in zip(got, brute))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JD index build / update / query benchmark")
+    parser.add_argument("--jobs", type=int, default=100_000, help="Synthetic JDs in the bulk build")
+    parser.add_argument("--update_fraction", type=float, default=0.01, help="Share of jobs changed and added again")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top_n", type=int, default=config.JD_INDEX_TOP_N)
+    parser.add_argument("--check", type=int, default=3, help="Candidates checked against brute force (0 to skip)")
+    parser.add_argument("--index", help="Index path (default: a temporary file)")
+    parser.add_argument("--skip_build", action="store_true", help="Query an existing --index as-is")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_queries(args)))
+        return
+
+    from Codebase import jd_index, stage2_jd
+    from Codebase.benchmarks import corpus
+
+    tmp = None
+    if not args.index:
+        tmp = tempfile.TemporaryDirectory()
+        args.index = os.path.join(tmp.name, "jd_index.sqlite")
+
+    try:
+        index = jd_index.JDIndex(args.index)
+        if not args.skip_build:
+            texts = corpus.generate_jd_corpus(args.jobs, seed=3)
+            start = time.perf_counter()
+            index.upsert(stage2_jd.parse_jd_stream(list(enumerate(texts))))
+            build_s = time.perf_counter() - start
+            print(f"Bulk build      {args.jobs:>9,} JDs  {build_s:8.2f}s  {args.jobs / build_s:>10,.0f} JDs/s (parse + index)")
+
+            # Incremental: rewrite a slice of existing postings and append as many new ones
+            k = max(1, int(args.jobs * args.update_fraction))
+            rng = random.Random(9)
+            changed = [(i, corpus.generate_jd_text(rng)) for i in rng.sample(range(args.jobs), k)]
+            added = [(args.jobs + i, corpus.generate_jd_text(rng)) for i in range(k)]
+            start = time.perf_counter()
+            counts = index.upsert(stage2_jd.parse_jd_stream(changed + added, workers=1))
+            update_s = time.perf_counter() - start
+            print(f"Incremental     {2 * k:>9,} JDs  {update_s:8.2f}s  {2 * k / update_s:>10,.0f} JDs/s "
+                  f"({counts['updated']} updated, {counts['added']} added)")
+
+            start = time.perf_counter()
+            index.compact()
+            print(f"Compaction                     {time.perf_counter() - start:8.2f}s")
+
+        stats = index.stats()
+        print(f"\nIndex: {stats['jobs']:,} jobs, {stats['terms']:,} terms, {stats['postings']:,} postings, "
+              f"{stats['bytes'] / 1e6:.1f} MB on disk")
+
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--index", args.index,
+             "--queries", str(args.queries), "--top_n", str(args.top_n)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            raise RuntimeError(f"query worker failed (exit {proc.returncode})")
+        q = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"\ntop_jobs (n={args.top_n}, {args.queries} candidates, fresh process)")
+        print(f"first query {q['first_ms']:.1f} ms | p50 {q['p50_ms']:.1f} ms | p95 {q['p95_ms']:.1f} ms | "
+              f"max {q['max_ms']:.1f} ms | RSS added {q['rss_added_mb']:.0f} MB")
+
+        if args.check and not stats["dead_postings"]:
+            ok = check_exact(index, args.check, args.top_n)
+            print(f"\nTop-{args.top_n} scores match a brute-force scan ({args.check} candidates): {'✅' if ok else '❌'}")
+            if not ok:
+                sys.exit(1)
+        index.close()
+    finally:
+        if tmp:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_jd_parser.py
+# Docs/sec of the Stage 2 JD parser: baseline regexes vs precompiled scanner
+#
+#   python benchmarks/bench_jd_parser.py --docs 20000 --workers 4
+# ==========================================================
+
+import argparse, os, re, sys, time, random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import stage2_jd
+from Codebase.benchmarks import corpus
+
+
+def legacy_extract_jd_data(jd_text: str) -> dict:
+    """Baseline extract_jd_data_rulebased field logic (without its JSON write)."""
+    def find_after(label):
+        pattern = rf"{label}\s*[:\-]\s*(.*)"
+        match = re.search(pattern, jd_text, flags=re.I)
+        return match.group(1).strip() if match else None
+
+    def section(pattern):
+        match = re.search(pattern, jd_text, flags=re.I | re.S)
+        return [r.strip("•- \t") for r in re.split(r"[\n;]", match.group(1)) if r.strip()] if match else []
+
+    edu_match = re.search(r"(Bachelor|Master|B\.?Tech|M\.?Tech|B\.?Sc|M\.?Sc)[^\n]*", jd_text, flags=re.I)
+    return {
+        "job_title": find_after("Job Title"),
+        "location": find_after("Location"),
+        "experience_required": find_after("Experience"),
+        "must_have_skills": section(r"Requirements\s*[:\-]?(.*?)(?:\n\n|Preferred|$)"),
+        "nice_to_have_skills": section(r"Preferred\s*[:\-]?(.*?)(?:\n\n|$)"),
+        "responsibilities": section(r"Responsibilities\s*[:\-]?(.*?)(?:\n\n|Requirements|Preferred|$)"),
+        "education_required": edu_match.group(0).strip() if edu_match else None,
+    }
+
+
+def fuzz_documents(n: int, seed: int = 1) -> list:
+    """Short random documents built from label fragments, to exercise edge cases."""
+    rng = random.Random(seed)
+    fragments = ["Job Title", "job title", "Location", "LOCATION", "Experience", "Responsibilities",
+                 "Requirements", "Preferred", "Bachelor", "B.Tech", "bsc", "M.Sc", "master",
+                 ":", "-", " ", "\n", "\n\n", ";", "•", "Python", "x", "İ", "ſ", "relocation"]
+    return ["".join(rng.choice(fragments) for _ in range(rng.randint(0, 40))) for _ in range(n)]
+
+
+def timed(label, fn, n_docs):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed:8.3f}s  {n_docs / elapsed:12,.0f} docs/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage 2 JD parser throughput benchmark")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    docs = corpus.generate_jd_corpus(args.docs)
+
+    # Parity first: the scanner must reproduce the baseline output exactly
+    for text in docs + fuzz_documents(20000):
+        assert stage2_jd.parse_jd_text(text) == legacy_extract_jd_data(text), repr(text)
+    print(f"✅ Output identical to baseline on {len(docs)} corpus + 20,000 fuzz documents\n")
+
+    base = timed("baseline regexes (1 process)", lambda: [legacy_extract_jd_data(d) for d in docs], len(docs))
+    scan = timed("parse_jd_text (1 process)", lambda: [stage2_jd.parse_jd_text(d) for d in docs], len(docs))
+    pool = timed(
+        f"parse_jd_stream ({args.workers} workers)",
+        lambda: list(stage2_jd.parse_jd_stream(enumerate(docs), workers=args.workers)),
+        len(docs),
+    )
+    print(f"\nSpeedup: scanner {base / scan:.2f}x | scanner + pool {base / pool:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
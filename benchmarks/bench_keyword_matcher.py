@@ -0,0 +1,101 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_keyword_matcher.py
+# ATS keyword scoring: the legacy whitespace set scorer (what
+# compute_ats_score used to do) vs the compiled phrase automaton (keyword_matcher) on growing
+# keyword lists. Reports resumes/sec, compile time and how many
+# keywords each one finds.
+#
+#   python benchmarks/bench_keyword_matcher.py
+#   python benchmarks/bench_keyword_matcher.py --resumes 2000 --sizes 100 1000 10000 100000
+#
+# Keyword lists are Stage 2 keywords from synthetic JDs (skills and key
+# phrases of requirement lines), padded with generated 1-3 word phrases that no
+# resume contains, so larger lists add work but not matches.
+# ==========================================================
+
+import argparse, os, random, sys, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import stage2_jd, stage3_tailor, keyword_matcher
+from Codebase.benchmarks import corpus
+
+# Spellings the set scorer misses and the matcher normalizes. JD list entries are
+# split into key phrases first (as Stage 3 does), so a requirement line is found
+# when the resume words it differently.
+EXAMPLES = [
+    ("machine learning", "Built machine-learning models for churn."),
+    ("python", "Skills: Python, SQL, Docker."),
+    ("scikit-learn", "Tuned Scikit-Learn pipelines."),
+    ("5 years Python, SQL", "3+ years of Python and SQL in production."),
+    ("Hands-on experience with AWS (EC2, Lambda)", "Deployed services on AWS Lambda and EC2."),
+]
+
+
+def keyword_list(size: int, seed: int = 7) -> list:
+    """Stage 2 JD keywords, padded with generated phrases over the same vocabulary to `size` entries."""
+    rng = random.Random(seed)
+    keywords = []
+    for text in corpus.generate_jd_corpus(max(1, size // 20), seed=seed):
+        keywords.extend(stage3_tailor._extract_keywords(stage2_jd.parse_jd_text(text)))
+    keywords = list(dict.fromkeys(keywords))
+    vocab = sorted({tok for kw in keywords for tok in keyword_matcher.normalize(kw)})
+    while len(keywords) < size:
+        keywords.append(" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 3))) + f" {len(keywords)}")
+    return keywords[:size]
+
+
+def set_score(resume_text: str, keywords) -> float:
+    """Legacy scorer: whole keyword entries against the resume's whitespace-split words."""
+    jd_set = set(word.lower() for word in keywords if word.strip())
+    resume_words = set(resume_text.lower().split())
+    matched = sum(1 for word in jd_set if word in resume_words)
+    return round((matched / len(jd_set)) * 100, 2) if jd_set else 0.0
+
+
+def run_set_scorer(resumes, keywords):
+    return [set_score(text, keywords) for text in resumes]
+
+
+def run_matcher(resumes, matcher):
+    return [matcher.score(text) for text in resumes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set-based vs automaton keyword scoring benchmark")
+    parser.add_argument("--resumes", type=int, default=500)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000, 50_000], help="Keyword list sizes")
+    args = parser.parse_args()
+
+    resumes = [corpus.candidate_to_resume_text(c) for c in corpus.generate_candidates(args.resumes, seed=4)]
+
+    print("Spellings found (set scorer / matcher):")
+    for keyword, text in EXAMPLES:
+        found_set = set_score(text, [keyword]) > 0
+        found_matcher = keyword_matcher.KeywordMatcher(keyword_matcher.key_phrases(keyword)).score(text) == 100
+        print(f"  {keyword!r:<44} in {text!r:<46} {'✅' if found_set else '❌'} / {'✅' if found_matcher else '❌'}")
+
+    print(f"\n{args.resumes} resumes per keyword list")
+    print(f"{'keywords':>9}{'set res/s':>12}{'matcher res/s':>15}{'compile s':>11}{'speedup':>9}"
+          f"{'set found':>11}{'matcher found':>15}")
+    for size in args.sizes:
+        keywords = keyword_list(size)
+
+        start = time.perf_counter()
+        set_scores = run_set_scorer(resumes, keywords)
+        set_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matcher = keyword_matcher.KeywordMatcher(keywords)
+        compile_s = time.perf_counter() - start
+        start = time.perf_counter()
+        matcher_scores = run_matcher(resumes, matcher)
+        matcher_s = time.perf_counter() - start
+
+        # Mean keywords found per resume
+        set_found = sum(set_scores) / len(set_scores) / 100 * len({k.lower() for k in keywords if k.strip()})
+        matcher_found = sum(matcher_scores) / len(matcher_scores) / 100 * len(matcher)
+        print(f"{size:>9,}{len(resumes) / set_s:>12,.0f}{len(resumes) / matcher_s:>15,.0f}{compile_s:>11.3f}"
+              f"{set_s / (matcher_s + compile_s):>8.1f}x{set_found:>11.1f}{matcher_found:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_model_manager.py
+# Memory-budgeted model residency: peak RSS, swap-ins and wall
+# time for both models resident vs a budget that fits one model
+# (offload / unload), with Stage 1 work phased before Stage 3 or
+# interleaved per pair. Each configuration runs in its own process.
+#
+#   python benchmarks/bench_model_manager.py               # two tiny local models
+#   python benchmarks/bench_model_manager.py --pairs 16 --max_new_tokens 32
+# ==========================================================
+
+import argparse, json, os, subprocess, sys, tempfile, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import config
+
+CONFIGS = [
+    ("resident", None, "offload", "phased"),
+    ("offload", "one", "offload", "phased"),
+    ("unload", "one", "unload", "phased"),
+    ("offload", "one", "offload", "interleaved"),
+]
+
+
+def run_config(args) -> dict:
+    """Worker: run Stage 1-like then Stage 3-like generations under one configuration."""
+    from Codebase import models, model_manager
+
+    budget = None if args.budget_mb < 0 else args.budget_mb
+    manager = model_manager.ModelManager(budget, args.policy, offload_dir=args.offload_dir)
+    gemma = manager.pipeline("stage1", lambda: models.build_pipeline("text-generation", args.stage1_model, None),
+                             models.estimate_weights_mb(args.stage1_model))
+    llama = manager.pipeline("stage3", lambda: models.build_pipeline("text-generation", args.stage3_model, None),
+                             models.estimate_weights_mb(args.stage3_model))
+    kwargs = {"max_new_tokens": args.max_new_tokens, "do_sample": False}
+
+    start = time.perf_counter()
+    if args.order == "phased":
+        stage1 = [gemma(f"Resume {i}", **kwargs) for i in range(args.pairs)]
+        stage3 = [llama(f"Tailor {i}", **kwargs) for i in range(args.pairs)]
+    else:
+        stage1, stage3 = [], []
+        for i in range(args.pairs):
+            stage1.append(gemma(f"Resume {i}", **kwargs))
+            stage3.append(llama(f"Tailor {i}", **kwargs))
+    wall = time.perf_counter() - start
+    stats = manager.stats()
+    manager.close()
+    return {"wall_s": round(wall, 2), "outputs": [str(o) for o in stage1 + stage3], **stats}
+
+
+def _ensure_model(path: str, hidden_size: int, layers: int) -> str:
+    from Codebase.benchmarks import stubs
+    if not os.path.exists(os.path.join(path, "config.json")):
+        stubs.build_tiny_model(path, hidden_size=hidden_size, layers=layers)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model memory budget benchmark")
+    parser.add_argument("--stage1_model", help="Causal LM for the Stage 1 role (default: tiny local model)")
+    parser.add_argument("--stage3_model", help="Causal LM for the Stage 3 role (default: larger tiny local model)")
+    parser.add_argument("--pairs", type=int, default=8)
+    parser.add_argument("--max_new_tokens", type=int, default=16)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--budget_mb", type=float, default=-1, help=argparse.SUPPRESS)
+    parser.add_argument("--policy", default=config.MODEL_EVICTION, help=argparse.SUPPRESS)
+    parser.add_argument("--order", default="phased", help=argparse.SUPPRESS)
+    parser.add_argument("--offload_dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_config(args)))
+        return
+
+    tmp = tempfile.gettempdir()
+    args.stage1_model = args.stage1_model or _ensure_model(os.path.join(tmp, "ats-bench-tiny-llama-512"), 512, 6)
+    args.stage3_model = args.stage3_model or _ensure_model(os.path.join(tmp, "ats-bench-tiny-llama-768"), 768, 8)
+
+    results, one_model_mb = [], None
+    with tempfile.TemporaryDirectory() as offload_dir:
+        for name, budget, policy, order in CONFIGS:
+            budget_mb = -1 if budget is None else one_model_mb
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", "--budget_mb", str(budget_mb),
+                 "--policy", policy, "--order", order, "--offload_dir", offload_dir,
+                 "--stage1_model", args.stage1_model, "--stage3_model", args.stage3_model,
+                 "--pairs", str(args.pairs), "--max_new_tokens", str(args.max_new_tokens)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                raise RuntimeError(f"{name}/{order} failed (exit {proc.returncode})")
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            if one_model_mb is None:
+                # A budget that holds the larger model but not both
+                one_model_mb = max(m["size_mb"] for m in r["models"].values()) * 1.1
+            results.append((f"{name} ({order})", r))
+
+    print(f"{'configuration':<26}{'budget MB':>10}{'peak RSS MB':>13}{'swap-ins':>10}{'swap-in s':>11}{'wall s':>9}")
+    for label, r in results:
+        budget = f"{r['budget_mb']:.0f}" if r["budget_mb"] else "∞"
+        print(f"{label:<26}{budget:>10}{r['peak_rss_mb']:>13.0f}{r['swap_ins']:>10}"
+              f"{r['swap_in_seconds']:>11.2f}{r['wall_s']:>9.2f}")
+    identical = len({json.dumps(r["outputs"]) for _, r in results}) == 1
+    print(f"\nOutputs identical across configurations: {'✅' if identical else '❌'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
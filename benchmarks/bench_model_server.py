@@ -0,0 +1,121 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_model_server.py
+# Cold CLI-style runs with in-process model loading vs runs that
+# attach to a resident model server: time from process start to
+# the first generated resume, and identical greedy output
+#
+#   python benchmarks/bench_model_server.py                # tiny local model
+#   python benchmarks/bench_model_server.py --runs 5 --max_new_tokens 128
+#
+# Each run is a fresh Python process, like `python main.py --ui_mode cli`.
+# ==========================================================
+
+import time
+_PROCESS_START = time.perf_counter()
+
+import argparse, json, os, statistics, subprocess, sys, tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Codebase import config
+
+
+def _tiny_pipe(model: str):
+    from Codebase import models
+    return models.LazyPipeline(f"tiny model {model}", lambda: models.build_pipeline("text-generation", model, None))
+
+
+def run_server(args):
+    """Worker: hold the model and serve it as both stage models."""
+    from Codebase import model_server
+
+    pipe = _tiny_pipe(args.model).load()
+    model_server.ModelServer({"gemma": (pipe, args.model), "llama": (pipe, args.model)}, args.socket).serve_forever()
+
+
+def run_client(args) -> dict:
+    """Worker: one Stage 3 generation in a fresh process, attached or loading in-process."""
+    from Codebase import model_server, generation, stage3_tailor, utils
+    from Codebase.benchmarks import corpus
+
+    local = _tiny_pipe(args.model)
+    pipe = local
+    if args.worker == "attached":
+        pipe = model_server.attach(None, local, local, args.socket)[1]
+
+    candidate = corpus.generate_candidates(1, seed=4)[0]
+    prompt = stage3_tailor._build_prompt(candidate, {"skills": ["Python", "SQL"]}, pipe.tokenizer)
+    output = pipe(prompt, max_new_tokens=args.max_new_tokens, do_sample=False, return_full_text=False,
+                  **generation.section_generation_kwargs(pipe, args.max_new_tokens))
+    return {"seconds": time.perf_counter() - _PROCESS_START, "text": utils.generated_text(output)}
+
+
+def _worker_cmd(args, worker: str) -> list:
+    return [sys.executable, os.path.abspath(__file__), "--worker", worker, "--model", args.model,
+            "--socket", args.socket, "--max_new_tokens", str(args.max_new_tokens)]
+
+
+def _client(args, worker: str) -> dict:
+    proc = subprocess.run(_worker_cmd(args, worker), capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise RuntimeError(f"{worker} client failed (exit {proc.returncode})")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model server vs in-process loading benchmark")
+    parser.add_argument("--model", help="Causal LM name or path (default: a tiny local random LLaMA)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh client processes per mode")
+    parser.add_argument("--max_new_tokens", type=int, default=64)
+    parser.add_argument("--socket", help="Socket path (default: in a fresh owner-only temp folder)")
+    parser.add_argument("--worker", choices=["server", "local", "attached"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker == "server":
+        run_server(args)
+        return
+    if args.worker:
+        print(json.dumps(run_client(args)))
+        return
+
+    if not args.socket:
+        args.socket = os.path.join(tempfile.mkdtemp(prefix="ats-bench-server-"), "server.sock")
+    if not args.model:
+        from Codebase.benchmarks import stubs
+        args.model = os.path.join(tempfile.gettempdir(), "ats-bench-tiny-llama-256")
+        if not os.path.exists(os.path.join(args.model, "config.json")):
+            stubs.build_tiny_model(args.model, hidden_size=256, layers=4)
+
+    from Codebase import model_server
+
+    start = time.perf_counter()
+    server = subprocess.Popen(_worker_cmd(args, "server"), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while model_server.server_stats(args.socket) is None:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server failed to start:\n{server.stderr.read().decode()}")
+            time.sleep(0.1)
+        print(f"Server ready in {time.perf_counter() - start:.2f}s (paid once)\n")
+
+        results = {mode: [_client(args, mode) for _ in range(args.runs)] for mode in ("local", "attached")}
+        stats = model_server.server_stats(args.socket)
+    finally:
+        model_server.stop_server(args.socket)
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    print(f"{'mode':<12}{'median s':>10}{'min s':>9}   (process start → generated resume)")
+    for mode, runs in results.items():
+        seconds = [r["seconds"] for r in runs]
+        print(f"{mode:<12}{statistics.median(seconds):>10.2f}{min(seconds):>9.2f}")
+    identical = len({r["text"] for runs in results.values() for r in runs}) == 1
+    print(f"\nGreedy output identical across modes: {'✅' if identical else '❌'}")
+    print(f"Server: {stats['requests_total']} requests, {stats['tokens_served']} tokens served, "
+          f"uptime {stats['uptime_s']:.1f}s")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# ==========================================================
+# ⏱️ benchmarks/bench_pdf_render.py
+# PDFs/sec for BaseCVTemplate: per-call styles vs cached styles,
+# disk vs in-memory output, and the process-pool batch renderer
+#
+#   python benchmarks/bench_pdf_render.py --pdfs 300 --workers 4
+# ==========================================================
+
+import argparse, contextlib, io, os, sys, tempfile, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from reportlab import rl_config
+from Codebase import BaseCVTemplate
+from Codebase.benchmarks import corpus
+
+
+def timed(label, fn, n):
+    with contextlib.redirect_stdout(io.StringIO()):  # silence per-PDF prints
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.3f}s  {n / elapsed:10,.1f} PDFs/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume PDF rendering benchmark")
+    parser.add_argument("--pdfs", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    candidates = corpus.generate_candidates(args.pdfs, seed=5)
+    items = [(c, corpus.candidate_sections(c)) for c in candidates]
+
+    # Same layout as before: cached styles must not change the document
+    rl_config.invariant = 1
+    BaseCVTemplate._get_styles.cache_clear()
+    fresh = BaseCVTemplate.render_cv_bytes(*items[0])       # builds the styles
+    BaseCVTemplate.render_cv_bytes(*items[-1])              # another document reuses them first
+    cached = BaseCVTemplate.render_cv_bytes(*items[0])
+    assert BaseCVTemplate._get_styles.cache_info().hits >= 2, "second render did not use cached styles"
+    assert cached == fresh, "cached styles changed the document"
+    print("✅ Cached-style output identical to freshly built styles\n")
+
+    def uncached_to_disk(tmp):
+        for i, (c, s) in enumerate(items):
+            BaseCVTemplate._get_styles.cache_clear()  # baseline rebuilt styles on every call
+            BaseCVTemplate.build_cv_from_data(c, s, os.path.join(tmp, f"a{i}.pdf"))
+
+    def cached_to_disk(tmp):
+        for i, (c, s) in enumerate(items):
+            BaseCVTemplate.build_cv_from_data(c, s, os.path.join(tmp, f"b{i}.pdf"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = timed("baseline (styles per call, to disk)", lambda: uncached_to_disk(tmp), len(items))
+        timed("cached styles, to disk", lambda: cached_to_disk(tmp), len(items))
+        mem = timed("cached styles, BytesIO", lambda: [BaseCVTemplate.render_cv_bytes(c, s) for c, s in items], len(items))
+        pool = timed(
+            f"build_cv_batch ({args.workers} workers, bytes)",
+            lambda: BaseCVTemplate.build_cv_batch(items, workers=args.workers),
+            len(items),
+        )
+
+    print(f"\nSpeedup: in-memory {base / mem:.2f}x | process pool {base / pool:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
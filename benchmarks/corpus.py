@@ -0,0 +1,112 @@
+# ==========================================================
+# 🧪 benchmarks/corpus.py
+# Deterministic synthetic corpora for the benchmark scripts
+# ==========================================================
+
+import random
+
+TITLES = ["Data Engineer", "Machine Learning Engineer", "Backend Developer", "Data Analyst",
+          "DevOps Engineer", "Frontend Developer", "Product Analyst", "Cloud Architect"]
+LOCATIONS = ["Remote", "Bengaluru, India", "Berlin, Germany", "Austin, TX", "London, UK", "Hybrid - Pune"]
+SKILLS = ["Python", "SQL", "Java", "Spark", "Airflow", "Docker", "Kubernetes", "AWS", "GCP", "Azure",
+          "TensorFlow", "PyTorch", "React", "TypeScript", "Go", "Kafka", "Tableau", "Power BI",
+          "Pandas", "NumPy", "Scikit-learn", "Terraform", "Linux", "Git", "REST APIs", "GraphQL",
+          "PostgreSQL", "MongoDB", "Redis", "Snowflake", "dbt", "Machine Learning", "NLP", "C++"]
+DUTIES = ["Build and maintain data pipelines", "Design scalable backend services",
+          "Collaborate with product and design teams", "Own model deployment and monitoring",
+          "Write clean, tested code", "Improve query performance", "Mentor junior engineers",
+          "Automate infrastructure provisioning", "Analyse business metrics", "Review pull requests"]
+EDUCATION = ["Bachelor's degree in Computer Science or related field", "B.Tech in Computer Science",
+             "Master's degree in Data Science", "M.Sc in Statistics", "BSc in Mathematics"]
+FILLER = ("We are a fast-growing company building products used by millions of people. "
+          "Our team values ownership, curiosity and clear communication. ")
+FIRST_NAMES = ["Aarav", "Priya", "John", "Maria", "Wei", "Fatima", "Lukas", "Sara", "Kenji", "Olivia"]
+LAST_NAMES = ["Sharma", "Patel", "Smith", "Garcia", "Chen", "Khan", "Muller", "Rossi", "Tanaka", "Brown"]
+
+
+def generate_jd_text(rng: random.Random) -> str:
+    """Return one realistic job description (roughly 1-3 KB)."""
+    bullet = rng.choice(["", "- ", "• "])
+    lines = [
+        FILLER * rng.randint(1, 4),
+        f"Job Title: {rng.choice(TITLES)}",
+        f"Location: {rng.choice(LOCATIONS)}",
+        f"Experience: {rng.randint(1, 10)}+ years",
+        "",
+        "Responsibilities:",
+        *[bullet + d for d in rng.sample(DUTIES, rng.randint(3, 6))],
+        "",
+        "Requirements:",
+        *[bullet + s for s in rng.sample(SKILLS, rng.randint(4, 10))],
+        "",
+        "Preferred:",
+        *[bullet + s for s in rng.sample(SKILLS, rng.randint(2, 5))],
+        rng.choice(EDUCATION),
+        "",
+        FILLER * rng.randint(0, 3),
+    ]
+    return "\n".join(lines)
+
+
+def generate_jd_corpus(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [generate_jd_text(rng) for _ in range(n)]
+
+
+def generate_candidate(rng: random.Random) -> dict:
+    """Return one Stage 1-style candidate dictionary."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(5, 12))
+    return {
+        "name": name,
+        "email": name.lower().replace(" ", ".") + "@example.com",
+        "phone": f"+91 9{rng.randint(100000000, 999999999)}",
+        "location": rng.choice(LOCATIONS),
+        "education": [rng.choice(EDUCATION)],
+        "skills": skills,
+        "experience": [
+            f"{rng.choice(TITLES)} at Company {i}: {rng.choice(DUTIES)} using {', '.join(rng.sample(skills, 2))}"
+            for i in range(rng.randint(1, 4))
+        ],
+        "projects": [
+            f"Project {i}: {rng.choice(DUTIES)} with {rng.choice(skills)}"
+            for i in range(rng.randint(1, 3))
+        ],
+    }
+
+
+def candidate_to_resume_text(candidate: dict) -> str:
+    """Render a candidate dictionary as unstructured resume text."""
+    return "\n".join([
+        candidate["name"],
+        f"{candidate['email']} | {candidate['phone']} | {candidate['location']}",
+        "",
+        "SKILLS",
+        ", ".join(candidate["skills"]),
+        "",
+        "EXPERIENCE",
+        *candidate["experience"],
+        "",
+        "PROJECTS",
+        *candidate["projects"],
+        "",
+        "EDUCATION",
+        *candidate["education"],
+    ])
+
+
+def generate_candidates(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [generate_candidate(rng) for _ in range(n)]
+
+
+def candidate_sections(candidate: dict) -> dict:
+    """Stage 3-style resume sections for a candidate (what _segment_sections returns)."""
+    return {
+        "SUMMARY": f"{candidate['experience'][0].split(':')[0]} with hands-on experience in "
+                   f"{', '.join(candidate['skills'][:3])}. Focused on measurable, reliable delivery.",
+        "SKILLS": "\n".join(candidate["skills"]),
+        "PROJECTS": "\n".join(f"- {p}" for p in candidate["projects"]),
+        "EXPERIENCE": "\n".join(f"- {e}" for e in candidate["experience"]),
+        "EDUCATION": "\n".join(candidate["education"]),
+    }
@@ -0,0 +1,264 @@
+# ==========================================================
+# ⏱️ benchmarks/run_suite.py
+# Offline per-stage benchmark suite: latency percentiles,
+# throughput and peak RSS for every pipeline stage, written as
+# JSON so runs can be compared between commits
+#
+#   python benchmarks/run_suite.py --n 200 --out bench.json
+#   python benchmarks/run_suite.py --n 200 --compare bench.json
+#   python benchmarks/run_suite.py --models tiny --n 5 --stages stage1 stage3
+# ==========================================================
+
+import argparse, contextlib, json, os, platform, random, resource, subprocess, sys, tempfile, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+STAGES = ("stage1", "stage2", "stage3", "ats", "pdf")
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+# ----------------------------------------------------------
+# 🧱 Stage workloads (run inside the per-stage subprocess)
+# ----------------------------------------------------------
+def isolate_outputs(tmp: str):
+    """Point every output path at a scratch dir and disable caches, so timings are cold."""
+    from Codebase import config
+
+    config.OUTPUT_DIR = tmp
+    config.STRUCTURED_JSON_DIR = os.path.join(tmp, "structured_json")
+    config.TAILORED_PDF_DIR = os.path.join(tmp, "tailored_pdfs")
+    config.CANDIDATE_JSON = os.path.join(config.STRUCTURED_JSON_DIR, "candidate.json")
+    config.JD_JSON = os.path.join(config.STRUCTURED_JSON_DIR, "jd.json")
+    config.ARTIFACT_DIR = os.path.join(tmp, "artifacts")
+    config.JD_INDEX_PATH = os.path.join(tmp, "jd_index.sqlite")
+    config.JD_INDEX_AUTO_ADD = False
+    config.STAGE1_CACHE_ENABLED = False
+    config.INGEST_CACHE_ENABLED = False
+    config.ensure_dirs()
+
+
+def _load_pipes(args):
+    from Codebase.benchmarks import stubs
+
+    if args.models == "tiny":
+        return stubs.tiny_pipelines(args.tiny_model_dir, args.profile)
+    return stubs.stub_pipelines(args.stub_ms_per_token)
+
+
+def build_workload(stage: str, args) -> list:
+    """Return one zero-argument callable per benchmarked item."""
+    from Codebase import stage1_resume, stage2_jd, stage3_tailor, BaseCVTemplate
+    from Codebase.benchmarks import corpus
+
+    rng = random.Random(args.seed)
+    candidates = corpus.generate_candidates(args.n, seed=args.seed)
+    jd_texts = [corpus.generate_jd_text(rng) for _ in range(args.n)]
+
+    if stage == "stage1":
+        gemma, _ = _load_pipes(args)
+        return [lambda t=corpus.candidate_to_resume_text(c): stage1_resume.extract_resume_data(t, gemma)
+                for c in candidates]
+
+    if stage == "stage2":
+        return [lambda t=t: stage2_jd.extract_jd_data_rulebased(t) for t in jd_texts]
+
+    if stage == "stage3":
+        _, llama = _load_pipes(args)
+        jds = [stage2_jd.parse_jd_text(t) for t in jd_texts]
+        return [lambda c=c, j=j: stage3_tailor.tailor_resume_with_llama(c, j, llama) for c, j in zip(candidates, jds)]
+
+    if stage == "ats":
+        jd_keywords = [stage3_tailor._extract_keywords(stage2_jd.parse_jd_text(t)) for t in jd_texts]
+        texts = [corpus.candidate_to_resume_text(c) for c in candidates]
+        return [lambda t=t, k=k: stage3_tailor.compute_ats_score(t, k) for t, k in zip(texts, jd_keywords)]
+
+    if stage == "pdf":
+        from Codebase import utils
+        return [lambda c=c, i=i: BaseCVTemplate.build_cv_from_data(
+                    c, corpus.candidate_sections(c), utils.get_batch_pdf_output_path(c["name"], f"bench{i}"))
+                for i, c in enumerate(candidates)]
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def run_stage(stage: str, args) -> dict:
+    """Time every item of one stage; log output from the stages is discarded."""
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            isolate_outputs(tmp)
+            start = time.perf_counter()
+            items = build_workload(stage, args)
+            for item in items[:args.warmup]:
+                item()
+            setup_s = time.perf_counter() - start
+            setup_rss = peak_rss_mb()
+
+            latencies, errors = [], 0
+            wall_start = time.perf_counter()
+            for item in items:
+                t0 = time.perf_counter()
+                try:
+                    item()
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+            wall = time.perf_counter() - wall_start
+
+            from Codebase import artifact_store
+            artifact_store.flush()  # background writes must land before tmp is removed
+
+    latencies.sort()
+    return {
+        "items": len(latencies),
+        "errors": errors,
+        "setup_s": round(setup_s, 4),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 4),
+        "p90_ms": round(_percentile(latencies, 90) * 1000, 4),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        "throughput_per_s": round(len(latencies) / wall, 3) if wall else 0.0,
+        "setup_rss_mb": round(setup_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+# ----------------------------------------------------------
+# 📊 Driver, results and comparison
+# ----------------------------------------------------------
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _worker_argv(stage: str, args, result_file: str) -> list:
+    argv = [sys.executable, os.path.abspath(__file__), "--worker", stage, "--result_file", result_file,
+            "--n", str(args.n), "--seed", str(args.seed), "--warmup", str(args.warmup),
+            "--models", args.models, "--stub_ms_per_token", str(args.stub_ms_per_token),
+            "--tiny_model_dir", args.tiny_model_dir]
+    if args.profile:
+        argv += ["--profile", args.profile]
+    return argv
+
+
+def run_suite(args) -> dict:
+    """Run each stage in its own process so peak RSS is attributed per stage."""
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "models": args.models,
+            "profile": args.profile,
+            "n": args.n,
+            "seed": args.seed,
+        },
+        "stages": {},
+    }
+    for stage in args.stages:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_file = f.name
+        try:
+            proc = subprocess.run(_worker_argv(stage, args, result_file), capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                raise RuntimeError(f"Benchmark worker for {stage} failed (exit {proc.returncode})")
+            with open(result_file, "r", encoding="utf-8") as f:
+                results["stages"][stage] = json.load(f)
+        finally:
+            os.remove(result_file)
+        _print_stage(stage, results["stages"][stage])
+    return results
+
+
+def _print_stage(stage: str, r: dict):
+    print(f"{stage:<8} n={r['items']:<5} p50 {r['p50_ms']:9.2f}ms  p90 {r['p90_ms']:9.2f}ms  "
+          f"p99 {r['p99_ms']:9.2f}ms  {r['throughput_per_s']:10,.1f}/s  "
+          f"peak RSS {r['peak_rss_mb']:7.1f} MB" + (f"  ⚠️ {r['errors']} errors" if r["errors"] else ""))
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Return regressions of current vs baseline: p50/p90 latency up, throughput
+    down, or peak RSS up by more than threshold (a fraction, e.g. 0.10).
+    """
+    regressions = []
+    print(f"\nComparison vs {baseline['meta'].get('commit', '?')} (threshold {threshold:.0%}):")
+    for stage, new in current["stages"].items():
+        old = baseline["stages"].get(stage)
+        if not old:
+            print(f"  {stage:<8} (no baseline)")
+            continue
+        for metric, higher_is_worse in (("p50_ms", True), ("p90_ms", True),
+                                        ("throughput_per_s", False), ("peak_rss_mb", True)):
+            if not old[metric]:
+                continue
+            change = (new[metric] - old[metric]) / old[metric]
+            worse = change > threshold if higher_is_worse else change < -threshold
+            flag = "❌" if worse else "  "
+            print(f"  {flag} {stage:<8} {metric:<18} {old[metric]:12.3f} → {new[metric]:12.3f}  ({change:+.1%})")
+            if worse:
+                regressions.append((stage, metric, old[metric], new[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline per-stage benchmark suite")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--n", type=int, default=100, help="Items per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed items run first")
+    parser.add_argument("--models", choices=("stub", "tiny"), default="stub",
+                        help="Deterministic stub pipelines or tiny random local models")
+    parser.add_argument("--stub_ms_per_token", type=float, default=0.0,
+                        help="Simulated model cost for stub pipelines")
+    parser.add_argument("--tiny_model_dir", default=os.path.join(tempfile.gettempdir(), "ats-bench-tiny-llama"))
+    parser.add_argument("--profile", help="Inference profile for --models tiny (config.INFERENCE_PROFILES)")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--worker", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--result_file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_stage(args.worker, args)
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    results = run_suite(args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
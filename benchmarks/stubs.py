@@ -0,0 +1,142 @@
+# ==========================================================
+# 🧪 benchmarks/stubs.py
+# Offline stand-ins for the Gemma and LLaMA pipelines:
+# deterministic stub pipelines and tiny randomly initialised models
+# ==========================================================
+
+import re, json, os, string, time
+from Codebase.benchmarks import corpus
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+_PHONE = re.compile(r"\+?\d[\d\s()-]{7,}\d")
+
+
+class StubPipeline:
+    """
+    Deterministic replacement for a transformers text-generation pipeline.
+
+    "gemma" stubs answer the Stage 1 prompt with JSON built from the resume text
+    (like text2text-generation, without echoing the prompt). "llama" stubs answer
+    the Stage 3 prompt with a sectioned resume built from the candidate JSON,
+    echoing the prompt first unless return_full_text=False (like text-generation).
+
+    ms_per_token > 0 adds a sleep proportional to prompt + output length, so
+    prompt-size regressions show up in the timings.
+    """
+
+    def __init__(self, kind: str, ms_per_token: float = 0.0):
+        if kind not in ("gemma", "llama"):
+            raise ValueError(f"Unknown stub kind: {kind}")
+        self.kind = kind
+        self.ms_per_token = ms_per_token
+        self.tokenizer = None
+        self.calls = 0
+
+    def __call__(self, prompts, **kwargs):
+        single = isinstance(prompts, str)
+        full = kwargs.get("return_full_text", True)
+        outputs = [[{"generated_text": self._generate(p, full)}] for p in ([prompts] if single else prompts)]
+        return outputs[0] if single else outputs
+
+    def _generate(self, prompt: str, full: bool = True) -> str:
+        self.calls += 1
+        if self.kind == "gemma":
+            text = self._answer_resume(prompt)
+        else:
+            text = (prompt if full else "") + self._answer_tailor(prompt)
+        if self.ms_per_token:
+            time.sleep((len(prompt) + len(text)) / 4 * self.ms_per_token / 1000)
+        return text
+
+    @staticmethod
+    def _answer_resume(prompt: str) -> str:
+        resume = prompt.split("Resume:", 1)[-1]
+        lines = [line.strip() for line in resume.splitlines() if line.strip()]
+        email, phone = _EMAIL.search(resume), _PHONE.search(resume)
+        return json.dumps({
+            "name": lines[0] if lines else None,
+            "email": email.group(0) if email else None,
+            "phone": phone.group(0) if phone else None,
+            "location": None,
+            "skills": [s for s in corpus.SKILLS if s in resume],
+            "experience": [line for line in lines if line.startswith(("-", "•"))][:6],
+            "education": [line for line in lines if any(d in line for d in ("B.", "M.", "Bachelor", "Master"))],
+            "projects": [],
+        })
+
+    @staticmethod
+    def _answer_tailor(prompt: str) -> str:
+        match = re.search(r"CANDIDATE DATA:\s*(\{.*?\})\s*JOB DESCRIPTION DATA:", prompt, re.S)
+        try:
+            candidate = json.loads(match.group(1)) if match else {}
+        except ValueError:
+            candidate = {}
+        skills = candidate.get("skills") or []
+        experience = candidate.get("experience") or []
+        education = candidate.get("education") or []
+        return "\n".join([
+            "",
+            str(candidate.get("name") or "Candidate"),
+            "CONTACT",
+            f"{candidate.get('email') or ''} | {candidate.get('phone') or ''}",
+            "SUMMARY",
+            f"Engineer with hands-on experience in {', '.join(map(str, skills[:3])) or 'software'}.",
+            "SKILLS",
+            ", ".join(map(str, skills)),
+            "EXPERIENCE",
+            *[f"• {json.dumps(e) if not isinstance(e, str) else e}" for e in experience],
+            "EDUCATION",
+            *[json.dumps(e) if not isinstance(e, str) else e for e in education],
+        ])
+
+
+def stub_pipelines(ms_per_token: float = 0.0):
+    """Return (gemma_pipe, llama_pipe) stubs."""
+    return StubPipeline("gemma", ms_per_token), StubPipeline("llama", ms_per_token)
+
+
+# ----------------------------------------------------------
+# 🐣 Tiny random models
+# ----------------------------------------------------------
+def build_tiny_model(path: str, hidden_size: int = 64, layers: int = 2, seed: int = 0) -> str:
+    """
+    Save a randomly initialised character-level LLaMA model and tokenizer to path.
+    Runs offline; outputs are gibberish but exercise real tokenization,
+    padding, batching and generation costs. Markup characters are left out
+    of the vocabulary so generated text is always safe for ReportLab.
+    """
+    import torch
+    from tokenizers import Tokenizer, models as tok_models, pre_tokenizers, decoders
+    from transformers import PreTrainedTokenizerFast, LlamaConfig, LlamaForCausalLM
+
+    vocab = {"<pad>": 0, "<s>": 1, "</s>": 2, "<unk>": 3}
+    for ch in string.printable + "•–—“”‘’":
+        if ch not in "<>&":
+            vocab.setdefault(ch, len(vocab))
+
+    tokenizer = Tokenizer(tok_models.WordLevel(vocab=vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Split("", "isolated")
+    tokenizer.decoder = decoders.Fuse()
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>", unk_token="<unk>", pad_token="<pad>"
+    )
+
+    torch.manual_seed(seed)
+    model = LlamaForCausalLM(LlamaConfig(
+        vocab_size=len(vocab), hidden_size=hidden_size, intermediate_size=hidden_size * 2,
+        num_hidden_layers=layers, num_attention_heads=4, num_key_value_heads=4,
+        max_position_embeddings=8192, bos_token_id=1, eos_token_id=2, pad_token_id=0,
+    ))
+    model.save_pretrained(path)
+    fast.save_pretrained(path)
+    return path
+
+
+def tiny_pipelines(path: str, profile: str = None):
+    """Return (gemma_pipe, llama_pipe) backed by the tiny model at path (built if missing)."""
+    from Codebase import models
+
+    if not os.path.exists(os.path.join(path, "config.json")):
+        build_tiny_model(path)
+    pipe = models.build_pipeline("text-generation", path, None, profile)
+    return pipe, pipe
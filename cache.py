@@ -0,0 +1,91 @@
+# ==========================================================
+# 🗃️ cache.py
+# Disk-backed, size-bounded LRU cache for deterministic stage outputs
+# ==========================================================
+
+import os, json, time, sqlite3, hashlib, threading
+from Codebase import telemetry
+
+
+def content_key(*parts: str) -> str:
+    """Return a SHA-256 hex digest over the given string parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DiskLRUCache:
+    """
+    Persistent key → JSON value cache stored in a single SQLite file.
+    When the stored payload exceeds max_bytes, least recently used entries are evicted.
+    Safe to share between threads of one process.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                telemetry.inc("cache_requests_total", cache=self.name, result="miss")
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            telemetry.inc("cache_requests_total", cache=self.name, result="hit")
+            return json.loads(row[0])
+
+    def set(self, key: str, value):
+        """Store a JSON-serializable value, evicting LRU entries beyond max_bytes."""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, size, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+
+            while self._total_bytes > self.max_bytes:
+                victim = self._conn.execute(
+                    "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 1"
+                ).fetchone()
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (victim[0],))
+                self._total_bytes -= victim[1]
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
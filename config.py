@@ -34,17 +34,201 @@ LLAMA_MODEL_NAME = "meta-llama/Llama-3.2-3b-instruct"
 # Hugging Face token placeholder (to be passed at runtime)
 HF_TOKEN = None
 
+# Models load lazily on first use; True starts background loading at startup
+MODEL_WARM_UP = False
+
+# ----------------------------------------------------------
+# ⚙️ INFERENCE PROFILE (CPU nodes)
+# ----------------------------------------------------------
+# dtype: "float32" or "bfloat16"
+# quantize_int8: dynamic int8 quantization of nn.Linear layers (float32 weights only)
+# threads: torch intra-op threads (None = torch default)
+# low_cpu_mem_usage: stream weights in while loading (needs `accelerate`)
+INFERENCE_PROFILES = {
+    "fp32": {"device": "cpu", "dtype": "float32", "quantize_int8": False, "threads": None, "low_cpu_mem_usage": False},
+    "bf16": {"device": "cpu", "dtype": "bfloat16", "quantize_int8": False, "threads": None, "low_cpu_mem_usage": True},
+    "int8": {"device": "cpu", "dtype": "float32", "quantize_int8": True, "threads": None, "low_cpu_mem_usage": True},
+}
+INFERENCE_PROFILE = "fp32"
+
+# ----------------------------------------------------------
+# 🧮 MODEL MEMORY BUDGET (model_manager.py)
+# ----------------------------------------------------------
+# None keeps both models resident for the whole run. With a budget (MB of model
+# weights), models load on demand and the least recently used idle one is evicted
+# when the next would not fit: "offload" moves its weights to a memory-mapped file
+# for a fast reload, "unload" drops it and reloads it from the model files.
+MODEL_MEMORY_BUDGET_MB = None
+MODEL_EVICTION = "offload"
+MODEL_OFFLOAD_DIR = os.path.join(OUTPUT_DIR, "cache", "offload")
+# Model name -> weights size in MB, used to make room before a model's first load
+# (otherwise estimated from the model files on disk, or measured after loading)
+MODEL_SIZE_HINTS_MB = {}
+
+# ----------------------------------------------------------
+# 🌐 GRADIO UI
+# ----------------------------------------------------------
+# Stream LLaMA tokens into the UI as they are generated.
+# Streamed calls bypass request batching; set False to batch Stage 3 across users.
+UI_STREAMING = True
+
+# Concurrent Gradio requests allowed into the pipeline
+UI_CONCURRENCY = 8
+
+# Dynamic batching window shared by concurrent users (scheduler.BatchingScheduler)
+SCHEDULER_MAX_BATCH_SIZE = 4
+SCHEDULER_MAX_WAIT_MS = 50
+
+# ----------------------------------------------------------
+# 🔌 MODEL SERVER (model_server.py)
+# ----------------------------------------------------------
+# `python main.py --serve_models` keeps both models loaded in a resident process;
+# other runs attach to it over this Unix socket and skip loading models themselves.
+# The socket lives in a per-user directory (mode 0700): $XDG_RUNTIME_DIR, else output/run.
+# Clients only attach to a socket owned by their own user.
+MODEL_SERVER_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or os.path.join(OUTPUT_DIR, "run"),
+                                   "ats-model-server.sock")
+MODEL_SERVER_AUTO_ATTACH = True
+MODEL_SERVER_CONNECT_TIMEOUT = 2.0   # seconds to wait for the server to answer a health check
+
+# ----------------------------------------------------------
+# 🗃️ STAGE 1 CACHE
+# ----------------------------------------------------------
+# Greedy Gemma extraction is deterministic, so results are cached on disk
+# keyed by normalized resume text + model name + prompt version.
+# Bump STAGE1_PROMPT_VERSION whenever the Stage 1 prompt changes.
+STAGE1_CACHE_ENABLED = True
+STAGE1_CACHE_PATH = os.path.join(OUTPUT_DIR, "cache", "stage1_cache.sqlite")
+STAGE1_CACHE_MAX_BYTES = 256 * 1024 * 1024
+STAGE1_PROMPT_VERSION = "v3"
+
+# ----------------------------------------------------------
+# 🔎 STAGE 1 HYBRID EXTRACTION (rules first, Gemma for the rest)
+# ----------------------------------------------------------
+STAGE1_HYBRID = True
+# Gemma is skipped when these are all found by rules and enough fields are filled overall
+STAGE1_REQUIRED_FIELDS = ("name", "email", "skills", "experience", "education")
+STAGE1_SKIP_LLM_CONFIDENCE = 0.75   # fraction of the 8 fields filled by rules
+# Generation budget per field still asked of Gemma (plus JSON overhead), capped at 700
+STAGE1_FIELD_TOKEN_BUDGETS = {
+    "name": 16, "email": 24, "phone": 16, "location": 16,
+    "skills": 120, "experience": 260, "projects": 160, "education": 100,
+}
+STAGE1_JSON_OVERHEAD_TOKENS = 24
+
+# Stop each Gemma row once a complete top-level JSON object has been generated
+STAGE1_JSON_EARLY_STOP = True
+# Constrain decoding to the candidate schema (needs `lm-format-enforcer`)
+STAGE1_CONSTRAINED_DECODING = False
+
+# ----------------------------------------------------------
+# 🧠 STAGE 3 GENERATION
+# ----------------------------------------------------------
+STAGE3_MAX_NEW_TOKENS = 900
+# Stop each LLaMA row once EDUCATION is complete (closing chatter follows it),
+# a filled section header repeats or a "Note:" trailer starts
+STAGE3_SECTION_STOP = True
+# Assisted decoding: a small draft model sharing LLaMA's tokenizer proposes tokens that
+# LLaMA verifies (e.g. "meta-llama/Llama-3.2-1B-Instruct"). Used for single-resume calls;
+# batched Stage 3 calls decode normally. None turns it off.
+STAGE3_ASSISTANT_MODEL = None
+STAGE3_ASSISTANT_TOKENS = 5   # draft tokens per step to start with (transformers adapts it)
+
+# ----------------------------------------------------------
+# 📈 TELEMETRY (telemetry.py)
+# ----------------------------------------------------------
+TELEMETRY_ENABLED = False   # spans/counters/histograms are no-ops when off
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464         # /metrics (Prometheus text) and /metrics.json
+METRICS_PREFIX = "ats_"
+
+# ----------------------------------------------------------
+# ✂️ PROMPT TOKEN BUDGETS (prompt_builder.py)
+# ----------------------------------------------------------
+STAGE1_RESUME_TOKEN_BUDGET = 1536     # resume text pasted into the Gemma prompt
+STAGE3_CANDIDATE_TOKEN_BUDGET = 1024  # compact candidate JSON in the LLaMA prompt
+STAGE3_JD_TOKEN_BUDGET = 512          # compact JD JSON in the LLaMA prompt
+
+# ----------------------------------------------------------
+# 📥 DOCUMENT INGESTION (utils.read_file_text)
+# ----------------------------------------------------------
+INGEST_MAX_FILE_BYTES = 25 * 1024 * 1024   # larger PDF/DOCX uploads are rejected (.txt is streamed)
+INGEST_MAX_PAGES = 40                      # PDF pages read at most
+INGEST_MAX_CHARS = 200_000                 # extraction stops once this much text is read
+INGEST_PDF_WORKERS = min(4, os.cpu_count() or 1)
+INGEST_PARALLEL_MIN_PAGES = 8              # smaller PDFs are extracted in-process
+
+# Extracted PDF/DOCX text cached by file content hash
+INGEST_CACHE_ENABLED = True
+INGEST_CACHE_PATH = os.path.join(OUTPUT_DIR, "cache", "ingest_cache.sqlite")
+INGEST_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# ----------------------------------------------------------
+# 🗄️ ARTIFACT STORE (artifact_store.py)
+# ----------------------------------------------------------
+# Stage outputs are written to artifacts/requests/<request_id>/, hard-linked to
+# content-addressed files in artifacts/objects/ so identical JSON/PDFs are stored once.
+# False restores the fixed CANDIDATE_JSON / JD_JSON / per-name PDF paths.
+ARTIFACT_STORE_ENABLED = True
+ARTIFACT_DIR = os.path.join(OUTPUT_DIR, "artifacts")
+ARTIFACT_WRITE_BATCH = 32        # queued writes flushed together by the background writer
+ARTIFACT_WRITE_INTERVAL = 0.05   # seconds the writer waits to fill a batch
+ARTIFACT_FSYNC = "batch"         # "always" (per write), "batch" (once per flush) or "never"
+ARTIFACT_RETENTION_HOURS = 72    # request folders older than this are removed...
+ARTIFACT_MAX_REQUESTS = 1000     # ...as are all but the newest N
+ARTIFACT_CLEANUP_INTERVAL = 600  # seconds between retention sweeps
+
+# ----------------------------------------------------------
+# 📦 BATCH PROCESSING
+# ----------------------------------------------------------
+# Prompts per model forward pass in --batch mode
+STAGE1_BATCH_SIZE = 4
+STAGE3_BATCH_SIZE = 2
+
+# Threads rendering PDFs / ATS reports while the next LLaMA batch generates.
+# Kept at 1 by default: ReportLab is not guaranteed to be thread-safe.
+STAGE3_RENDER_WORKERS = 1
+
+# Default batch input folders and results summary
+BATCH_RESUME_DIR = os.path.join(INPUT_DIR, "resumes")
+BATCH_JD_DIR = os.path.join(INPUT_DIR, "jds")
+BATCH_RESULTS_JSONL = os.path.join(OUTPUT_DIR, "batch_results.jsonl")
+
+# Bounded queue size between stages in --pipelined batch mode
+PIPELINE_QUEUE_SIZE = 4
+
+# Documents per worker task when parsing JD feeds (--parse_jds)
+JD_BATCH_CHUNKSIZE = 256
+
+# ----------------------------------------------------------
+# 🗂️ JD INDEX (jd_index.py)
+# ----------------------------------------------------------
+# Persistent inverted index of parsed Stage 2 JDs for candidate → job matching.
+# Postings are per (field, term) arrays of job numbers in one SQLite file.
+JD_INDEX_PATH = os.path.join(OUTPUT_DIR, "index", "jd_index.sqlite")
+JD_INDEX_AUTO_ADD = True          # add every JD parsed in Stage 2 to the index (queued, written in the background)
+JD_INDEX_BATCH_SIZE = 2000        # JDs per upsert transaction
+JD_INDEX_WRITE_INTERVAL = 1.0     # seconds the background writer collects Stage 2 JDs into one transaction
+JD_INDEX_COMPACT_RATIO = 0.3      # rewrite postings once this fraction points at replaced/removed JDs
+JD_INDEX_MMAP_BYTES = 256 * 1024 * 1024
+JD_INDEX_TOP_N = 10
+# Score = Σ weight × idf over matched terms; candidate skills match required and preferred skills
+JD_INDEX_FIELD_WEIGHTS = {"skill": 1.0, "preferred": 0.5, "title": 0.75, "location": 0.25}
+
 # ----------------------------------------------------------
 # 🧾 FOLDER INITIALIZATION
 # ----------------------------------------------------------
-for path in [INPUT_DIR, STRUCTURED_JSON_DIR, TAILORED_PDF_DIR]:
-    os.makedirs(path, exist_ok=True)
+def ensure_dirs():
+    """Create the input/output folders (called at run time, not on import)."""
+    for path in [INPUT_DIR, STRUCTURED_JSON_DIR, TAILORED_PDF_DIR]:
+        os.makedirs(path, exist_ok=True)
 
 # ----------------------------------------------------------
 # ✅ LOGGING UTILITY
 # ----------------------------------------------------------
 def show_structure():
     """Utility to confirm that all folders exist."""
+    ensure_dirs()
     print(f"📁 Base Directory: {BASE_DIR}")
     print(f"├── Input: {INPUT_DIR}")
     print(f"├── Output: {OUTPUT_DIR}")
@@ -0,0 +1,503 @@
+# ==========================================================
+# 🛑 generation.py
+# Generation controls shared by the stages: early stopping once a
+# complete JSON object (Stage 1) or resume (Stage 3) is out,
+# optional schema-constrained decoding and assisted decoding
+# with a draft model (Stage 3)
+# ==========================================================
+
+import re, copy, time, weakref, threading, types, contextvars
+from contextlib import contextmanager
+from functools import lru_cache
+from Codebase import config, utils, telemetry
+
+_stats_lock = threading.Lock()
+_stats = {}  # kind -> {"requests", "stopped_early", "tokens_saved"}
+
+
+# ----------------------------------------------------------
+# 🧮 Per-row decode tracking
+# ----------------------------------------------------------
+class _RowTracker:
+    """
+    Decodes each row's new tokens and feeds them to a scanner.
+
+    Normally every call adds one token. Assisted decoding also checks draft
+    candidates that may be rejected, so calls can add several tokens or step
+    back: only the prefix shared with the previous call is folded into the
+    committed scanners, the rest is scanned on a copy. There the first call
+    already contains candidates, so the prompt length must be given.
+    """
+
+    def __init__(self, tokenizer, max_new_tokens: int, kind: str, prompt_tokens: int = None):
+        self.tokenizer = tokenizer
+        self.max_new_tokens = max_new_tokens
+        self.kind = kind
+        self.prompt_tokens = prompt_tokens
+        self._ids = None        # input_ids of the previous call
+        self._start = None      # prompt length of the current generate() call
+        self._base_len = None   # tokens folded into the committed scanners
+        self._base = []
+        self._last = []         # scanners after the previous call
+        self._recorded = []
+
+    def _new_call(self, input_ids) -> bool:
+        """True when input_ids belong to a new generate() call (pipelines reuse kwargs per batch)."""
+        if self._ids is None or input_ids.shape[0] != self._ids.shape[0]:
+            return True
+        if self.prompt_tokens is not None:
+            return input_ids.shape[1] <= self._start
+        if input_ids.shape[1] != self._ids.shape[1] + 1:
+            return True
+        return not bool((input_ids[:, :-1] == self._ids).all())
+
+    def _feed(self, scanners, token_rows):
+        for row, tokens in zip(scanners, token_rows):
+            for token in tokens:
+                if row.done:
+                    break
+                row.feed(self.tokenizer.decode([token], skip_special_tokens=True))
+
+    def step(self, input_ids, make_scanner):
+        """Scan every row up to its newest token; returns the per-row scanners."""
+        if self._new_call(input_ids):
+            fits = self.prompt_tokens is not None and self.prompt_tokens < input_ids.shape[1]
+            self._start = self.prompt_tokens if fits else input_ids.shape[1] - 1
+            self._base_len = self._start
+            self._base = [make_scanner() for _ in range(input_ids.shape[0])]
+            self._recorded = [False] * input_ids.shape[0]
+            with _stats_lock:
+                _kind_stats(self.kind)["requests"] += input_ids.shape[0]
+        else:
+            # Commit what this call shares with the previous one (all of it without assisted decoding)
+            common = self._ids.shape[1]
+            if self.prompt_tokens is not None:
+                n, b = min(input_ids.shape[1], common), self._base_len
+                same = (input_ids[:, b:n] == self._ids[:, b:n]).all(dim=0).tolist()
+                common = b + same.index(False) if False in same else n
+            if common == self._ids.shape[1]:
+                self._base, self._base_len = self._last, common
+            elif common > self._base_len:
+                self._feed(self._base, self._ids[:, self._base_len:common].tolist())
+                self._base_len = common
+
+        rows = [copy.copy(row) for row in self._base]
+        self._feed(rows, input_ids[:, self._base_len:].tolist())
+        self._ids, self._last = input_ids, rows
+
+        step = input_ids.shape[1] - self._start
+        for i, row in enumerate(rows):
+            if row.done and not self._recorded[i]:
+                self._recorded[i] = True
+                _record_early_stop(self.kind, self.max_new_tokens - step)
+        return rows
+
+
+def _kind_stats(kind: str) -> dict:
+    return _stats.setdefault(kind, {"requests": 0, "stopped_early": 0, "tokens_saved": 0})
+
+
+def _record_early_stop(kind: str, saved: int):
+    with _stats_lock:
+        stats = _kind_stats(kind)
+        stats["stopped_early"] += 1
+        stats["tokens_saved"] += max(saved, 0)
+    telemetry.inc("early_stop_tokens_saved_total", max(saved, 0), kind=kind)
+
+
+def stop_stats(kind: str) -> dict:
+    """Totals since process start for one kind ("json", "sections"), with the average budget saved per request."""
+    with _stats_lock:
+        stats = dict(_kind_stats(kind))
+    stats["avg_tokens_saved"] = round(stats["tokens_saved"] / stats["requests"], 1) if stats["requests"] else 0.0
+    return stats
+
+
+def json_stop_stats() -> dict:
+    return stop_stats("json")
+
+
+# ----------------------------------------------------------
+# 🧱 Balanced JSON detection
+# ----------------------------------------------------------
+class JSONObjectScanner:
+    """
+    Character-level scanner that reports when the first top-level JSON object
+    is complete. Braces inside strings (including escaped quotes) are ignored.
+    """
+
+    __slots__ = ("depth", "in_string", "escaped", "started", "done")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.done = False
+
+    def feed(self, text: str):
+        for ch in text:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.started:
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+                self.started = True
+            elif ch == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+                    return
+
+
+# ----------------------------------------------------------
+# 📑 Resume completion detection
+# ----------------------------------------------------------
+_SECTION_HEADER = re.compile(r"(?i)^\s*(CONTACT|SUMMARY|SKILLS|PROJECTS|EXPERIENCE|EDUCATION)\s*:?\s*$")
+_NOTE_START = re.compile(r"(?i)^\s*[*_#>`]*\s*note\s*:")
+# Sections the Stage 3 prompt asks for before EDUCATION (CONTACT is often written without a header)
+_SECTIONS_BEFORE_EDUCATION = frozenset({"SUMMARY", "SKILLS", "PROJECTS", "EXPERIENCE"})
+# First line of an education entry: a degree, an institution, a grade or a year
+_EDUCATION_ENTRY = re.compile(
+    r"(?i)\b(?:(?-i:[BM]\.?\s?(?:A|S|Sc|E|Eng|Tech|Com)\b)|mba|ph\.?\s?d|bachelor|master|doctor|diploma|degree"
+    r"|associate|university|college|institute|school|academy|certificat\w*|gpa|cgpa|graduat\w*|(?:19|20)\d\d)"
+)
+_RULE = re.compile(r"^\s*([-=*_~])\1{2,}\s*$")
+
+
+class ResumeSectionScanner:
+    """
+    Line-level scanner for Stage 3 output. Sections may come in any order and
+    hold blank-line separated entries. Done when:
+      - a line starts a "Note:" trailer;
+      - a header repeats for a section that already has a body (the model has started over);
+      - EDUCATION is complete: it has a body, the other sections have been written,
+        and after a blank line comes something that is neither a header nor an
+        education entry (closing chatter), or a horizontal rule.
+    """
+
+    __slots__ = ("line", "section", "section_lines", "filled", "seen", "blank", "done")
+
+    def __init__(self):
+        self.line = ""
+        self.section = None
+        self.section_lines = 0
+        self.filled = frozenset()  # immutable: the row tracker shallow-copies scanners
+        self.seen = frozenset()
+        self.blank = False
+        self.done = False
+
+    def feed(self, text: str):
+        for ch in text:
+            if ch != "\n":
+                self.line += ch
+                continue
+            self._end_line(self.line)
+            self.line = ""
+            if self.done:
+                return
+        if _NOTE_START.match(self.line):
+            self.done = True
+
+    def _end_line(self, line: str):
+        header = _SECTION_HEADER.match(line)
+        blank_before, self.blank = self.blank, not line.strip()
+        if _NOTE_START.match(line):
+            self.done = True
+        elif header:
+            if self.section_lines:
+                self.filled |= {self.section}
+            self.section = header.group(1).upper()
+            self.seen |= {self.section}
+            self.section_lines = 0
+            if self.section in self.filled:
+                self.done = True
+        elif self.section and line.strip():
+            if self._education_complete() and (_RULE.match(line) or (blank_before and not _EDUCATION_ENTRY.search(line))):
+                self.done = True
+                return
+            self.section_lines += 1
+
+    def _education_complete(self) -> bool:
+        return self.section == "EDUCATION" and self.section_lines > 0 and _SECTIONS_BEFORE_EDUCATION <= self.seen
+
+
+@lru_cache(maxsize=None)
+def _criteria_classes():
+    """transformers-based classes, defined on first use to keep imports light."""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class ScannerStopping(StoppingCriteria):
+        def __init__(self, tokenizer, max_new_tokens: int, kind: str, make_scanner, prompt_tokens: int = None):
+            self.tracker = _RowTracker(tokenizer, max_new_tokens, kind, prompt_tokens)
+            self.make_scanner = make_scanner
+
+        def __call__(self, input_ids, scores, **kwargs):
+            rows = self.tracker.step(input_ids, self.make_scanner)
+            return torch.tensor([row.done for row in rows], dtype=torch.bool, device=input_ids.device)
+
+    class KeyedStoppingCriteriaList(StoppingCriteriaList):
+        """
+        Criteria that keep per-row state only carry a batch_key, so the
+        batching scheduler may let requests share them in one batch, and a
+        JSON spec from which from_spec rebuilds them (e.g. in the model server).
+        """
+        batch_key = None
+        spec = None
+
+    return ScannerStopping, KeyedStoppingCriteriaList
+
+
+def _stopping_criteria(tokenizer, max_new_tokens: int, kind: str, make_scanner, prompt_tokens: int = None):
+    stopping_cls, list_cls = _criteria_classes()
+    criteria = list_cls([stopping_cls(tokenizer, max_new_tokens, kind, make_scanner, prompt_tokens)])
+    criteria.batch_key = (kind, max_new_tokens, prompt_tokens)
+    criteria.spec = {"kind": kind, "max_new_tokens": max_new_tokens, "prompt_tokens": prompt_tokens}
+    return criteria
+
+
+def json_stopping_criteria(tokenizer, max_new_tokens: int):
+    """
+    StoppingCriteriaList that ends each row as soon as it has emitted one balanced
+    top-level JSON object. Rows are tracked independently, so it is safe for batches.
+    """
+    return _stopping_criteria(tokenizer, max_new_tokens, "json", JSONObjectScanner)
+
+
+def section_stopping_criteria(tokenizer, max_new_tokens: int, prompt_tokens: int = None):
+    """
+    StoppingCriteriaList that ends each row once its resume is complete (see
+    ResumeSectionScanner). prompt_tokens is required with assisted decoding.
+    """
+    return _stopping_criteria(tokenizer, max_new_tokens, "sections", ResumeSectionScanner, prompt_tokens)
+
+
+# ----------------------------------------------------------
+# 🧩 Optional schema-constrained decoding (lm-format-enforcer)
+# ----------------------------------------------------------
+def candidate_schema(fields, list_fields) -> dict:
+    """JSON schema for a Stage 1 answer covering the requested fields."""
+    return {
+        "type": "object",
+        "properties": {
+            f: {"type": "array", "items": {"type": "string"}} if f in list_fields else {"type": "string"}
+            for f in fields
+        },
+        "required": list(fields),
+    }
+
+
+@lru_cache(maxsize=32)
+def _schema_prefix_fn(tokenizer, fields: tuple, list_fields: tuple):
+    from lmformatenforcer import JsonSchemaParser
+    from lmformatenforcer.integrations.transformers import build_transformers_prefix_allowed_tokens_fn
+
+    fn = build_transformers_prefix_allowed_tokens_fn(tokenizer, JsonSchemaParser(candidate_schema(fields, list_fields)))
+    spec = {"kind": "json_schema", "fields": list(fields), "list_fields": list(list_fields)}
+    return _KeyedPrefixFn(fn, ("json_schema", fields), spec)
+
+
+class _KeyedPrefixFn:
+    """prefix_allowed_tokens_fn wrapper with a batch_key for the scheduler and a JSON spec."""
+
+    def __init__(self, fn, batch_key, spec):
+        self.fn = fn
+        self.batch_key = batch_key
+        self.spec = spec
+
+    def __call__(self, batch_id, input_ids):
+        return self.fn(batch_id, input_ids)
+
+
+_warned_missing_enforcer = False
+
+
+def json_generation_kwargs(pipe, max_new_tokens: int, fields=(), list_fields=()) -> dict:
+    """
+    Extra generate() kwargs for JSON-producing calls: early stopping on a complete
+    object and, when config.STAGE1_CONSTRAINED_DECODING is on and lm-format-enforcer
+    is installed, decoding constrained to the candidate schema.
+    Returns {} for pipelines without a tokenizer (e.g. stubs).
+    """
+    global _warned_missing_enforcer
+    tokenizer = getattr(pipe, "tokenizer", None)
+    if tokenizer is None or not (config.STAGE1_JSON_EARLY_STOP or config.STAGE1_CONSTRAINED_DECODING):
+        return {}
+
+    kwargs = {}
+    if config.STAGE1_JSON_EARLY_STOP:
+        kwargs["stopping_criteria"] = json_stopping_criteria(tokenizer, max_new_tokens)
+
+    if config.STAGE1_CONSTRAINED_DECODING and fields:
+        try:
+            kwargs["prefix_allowed_tokens_fn"] = _schema_prefix_fn(tokenizer, tuple(fields), tuple(list_fields))
+        except ImportError:
+            if not _warned_missing_enforcer:
+                utils.log_status("⚠️ Constrained decoding needs `lm-format-enforcer`; using early stopping only.")
+                _warned_missing_enforcer = True
+    return kwargs
+
+
+def section_generation_kwargs(pipe, max_new_tokens: int, prompt: str = None) -> dict:
+    """
+    Extra generate() kwargs for Stage 3: stop once the resume is complete. {} without
+    a tokenizer. Pass the prompt for single-prompt calls that may use assisted decoding.
+    """
+    tokenizer = getattr(pipe, "tokenizer", None)
+    if tokenizer is None or not config.STAGE3_SECTION_STOP:
+        return {}
+    # Tokenized like the text-generation pipeline does (no special tokens added)
+    prompt_tokens = len(tokenizer(prompt, add_special_tokens=False)["input_ids"]) if prompt is not None else None
+    return {"stopping_criteria": section_stopping_criteria(tokenizer, max_new_tokens, prompt_tokens)}
+
+
+def from_spec(spec: dict, tokenizer):
+    """Rebuild a stopping criteria list, prefix function or draft model from its .spec for tokenizer."""
+    kind = spec.get("kind")
+    if kind == "json":
+        return json_stopping_criteria(tokenizer, spec["max_new_tokens"])
+    if kind == "sections":
+        return section_stopping_criteria(tokenizer, spec["max_new_tokens"], spec.get("prompt_tokens"))
+    if kind == "json_schema":
+        return _schema_prefix_fn(tokenizer, tuple(spec["fields"]), tuple(spec["list_fields"]))
+    if kind == "assistant":
+        return load_assistant(spec["model"])
+    raise ValueError(f"Unknown generation spec: {spec!r}")
+
+
+# ----------------------------------------------------------
+# 🏎️ Assisted decoding (Stage 3)
+# ----------------------------------------------------------
+_assist_stats = {"calls": 0, "new_tokens": 0, "target_steps": 0, "draft_tokens": 0, "seconds": 0.0}
+
+
+@lru_cache(maxsize=4)
+def load_assistant(model_name: str, profile: str = None):
+    """Load a draft model once per process, in the inference profile's dtype."""
+    import torch
+    from transformers import AutoModelForCausalLM
+    from Codebase.models import get_profile
+
+    settings = get_profile(profile)
+    utils.log_status(f"🔄 Loading draft model {model_name} for assisted decoding...")
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name, token=config.HF_TOKEN, torch_dtype=getattr(torch, settings.get("dtype", "float32"))
+    ).eval()
+    model.generation_config.num_assistant_tokens = config.STAGE3_ASSISTANT_TOKENS
+    model.spec = {"kind": "assistant", "model": model_name}
+    return model
+
+
+def assisted_generation_kwargs(pipe) -> dict:
+    """
+    {"assistant_model": draft} when config.STAGE3_ASSISTANT_MODEL is set, else {}.
+    transformers only runs assisted decoding for one prompt at a time, so use it for
+    single-prompt calls only. Pipelines served by a model server get a reference the
+    server resolves, so the client never loads the draft itself.
+    """
+    global _warned_assistant
+    name = config.STAGE3_ASSISTANT_MODEL
+    if not name or getattr(pipe, "tokenizer", None) is None:
+        return {}
+    if _served(pipe):
+        return {"assistant_model": types.SimpleNamespace(spec={"kind": "assistant", "model": name})}
+
+    draft = load_assistant(name)
+    target_vocab = getattr(getattr(getattr(pipe, "model", None), "config", None), "vocab_size", None)
+    if target_vocab != draft.config.vocab_size:
+        if not _warned_assistant:
+            utils.log_status(f"⚠️ Draft model {name} does not share LLaMA's vocabulary; assisted decoding is off.")
+            _warned_assistant = True
+        return {}
+    return {"assistant_model": draft}
+
+
+_warned_assistant = False
+
+
+def _served(pipe) -> bool:
+    """
+    True for a model-server client, also behind BatchingSchedulers. Checked on the
+    class so lazy or managed local pipelines are not loaded just to answer it.
+    """
+    from Codebase.scheduler import BatchingScheduler
+
+    while isinstance(pipe, BatchingScheduler):
+        pipe = pipe.pipe
+    return getattr(type(pipe), "remote", False)
+
+
+# Forward counters of the call in the current context. Shared models carry one
+# permanent hook that counts into it, so concurrent calls (and calls queued on a
+# scheduler's model lock) never see each other's forward passes.
+_assist_counts = contextvars.ContextVar("assist_counts", default=None)
+_hooked_models = weakref.WeakSet()
+
+
+def _install_counter(model, key: str):
+    def hook(module, args, output):
+        counts = _assist_counts.get()
+        if counts is not None:
+            counts.setdefault("first_step", time.perf_counter())
+            counts[key] += 1
+
+    with _stats_lock:
+        if model not in _hooked_models:
+            model.register_forward_hook(hook)
+            _hooked_models.add(model)
+
+
+@contextmanager
+def assisted_tracking(pipe, kwargs: dict):
+    """
+    Count draft proposals and target verification steps of one assisted call made
+    in this block (threads it starts need contextvars.copy_context to be counted).
+    Call the yielded function with the generated text to record the call's stats.
+    """
+    draft = kwargs.get("assistant_model")
+    target = getattr(pipe, "model", None) if draft is not None else None
+    if not hasattr(draft, "register_forward_hook") or not hasattr(target, "register_forward_hook"):
+        yield lambda text: None
+        return
+
+    _install_counter(draft, "draft")
+    _install_counter(target, "target")
+    counts = {"draft": 0, "target": 0}
+
+    def record(text: str):
+        new_tokens = len(pipe.tokenizer(text, add_special_tokens=False)["input_ids"])
+        with _stats_lock:
+            _assist_stats["calls"] += 1
+            _assist_stats["new_tokens"] += new_tokens
+            _assist_stats["target_steps"] += counts["target"]
+            _assist_stats["draft_tokens"] += counts["draft"]
+            # From the call's first forward pass: time spent waiting for the model lock is not decoding
+            _assist_stats["seconds"] += time.perf_counter() - counts.get("first_step", time.perf_counter())
+        # Every verification step keeps the accepted draft tokens plus one from the target
+        telemetry.inc("assisted_draft_tokens_total", counts["draft"])
+        telemetry.inc("assisted_accepted_tokens_total", max(new_tokens - counts["target"], 0))
+
+    token = _assist_counts.set(counts)
+    try:
+        yield record
+    finally:
+        _assist_counts.reset(token)
+
+
+def assisted_stats() -> dict:
+    """Totals since process start: draft acceptance rate and generated tokens per second."""
+    with _stats_lock:
+        stats = dict(_assist_stats)
+    accepted = max(stats["new_tokens"] - stats["target_steps"], 0)
+    stats["acceptance_rate"] = round(accepted / stats["draft_tokens"], 3) if stats["draft_tokens"] else 0.0
+    stats["tokens_per_step"] = round(stats["new_tokens"] / stats["target_steps"], 2) if stats["target_steps"] else 0.0
+    stats["tokens_per_second"] = round(stats["new_tokens"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    stats["seconds"] = round(stats["seconds"], 2)
+    return stats
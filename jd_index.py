@@ -0,0 +1,354 @@
+# ==========================================================
+# 🗂️ jd_index.py
+# Persistent, incrementally updated inverted index of parsed
+# Stage 2 JDs, and top-N job matching for Stage 1 candidates
+# ==========================================================
+
+import os, json, math, time, queue, atexit, sqlite3, threading
+from itertools import islice
+import numpy as np
+from Codebase import config, utils, keyword_matcher
+from Codebase.cache import content_key
+
+# Posting lists: little-endian uint32 job numbers, ascending (jobs are numbered in insertion order)
+_DOC_DTYPE = "<u4"
+
+_FILLER = keyword_matcher.FILLER
+
+
+# ----------------------------------------------------------
+# 🔤 Terms
+# ----------------------------------------------------------
+def _phrases(item) -> set:
+    """Skill phrases in one skill entry, split like ATS keywords ("3+ years of Python, SQL" → {"python", "sql"})."""
+    return set(keyword_matcher.key_phrases(item))
+
+
+def _words(text) -> set:
+    return {t for t in keyword_matcher.normalize(text or "") if t not in _FILLER and not t[0].isdigit()}
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def jd_terms(jd_data: dict) -> set:
+    """(field, term) pairs a parsed JD is indexed under."""
+    terms = set()
+    for item in _as_list(jd_data.get("must_have_skills")):
+        terms.update(("skill", p) for p in _phrases(item))
+    for item in _as_list(jd_data.get("nice_to_have_skills")):
+        terms.update(("preferred", p) for p in _phrases(item))
+    terms.update(("title", w) for w in _words(jd_data.get("job_title")))
+    terms.update(("location", w) for w in _words(jd_data.get("location")))
+    return terms
+
+
+def candidate_terms(candidate: dict) -> dict:
+    """Query terms for a Stage 1 candidate: {field: set of terms}."""
+    skills = set()
+    for item in _as_list(candidate.get("skills")):
+        skills.update(_phrases(item))
+    # Candidates have no title field; past roles are read from experience entries
+    titles = _words(candidate.get("title") or candidate.get("job_title") or "")
+    for entry in _as_list(candidate.get("experience")):
+        titles.update(_words(entry))
+    return {
+        "skill": skills,
+        "preferred": skills,
+        "title": titles,
+        "location": set().union(*(_words(loc) for loc in _as_list(candidate.get("location")))),
+    }
+
+
+# ----------------------------------------------------------
+# 🗂️ Index
+# ----------------------------------------------------------
+class JDIndex:
+    """
+    Inverted index of parsed JDs in a single SQLite file.
+
+    Each job gets an increasing number; each (field, term) row holds the numbers of
+    the jobs containing it as a packed uint32 array, so a query reads one small blob per
+    query term rather than one row per posting. Upserts append to those arrays in
+    batches. A replaced or removed job leaves stale postings behind until compact()
+    (run automatically past config.JD_INDEX_COMPACT_RATIO); queries skip them, though
+    they still count towards term frequencies until then.
+    Safe to share between threads of one process.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or config.JD_INDEX_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(config.JD_INDEX_MMAP_BYTES)}")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " doc INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, digest TEXT NOT NULL,"
+            " job_title TEXT, location TEXT, n_terms INTEGER NOT NULL, data TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " field TEXT NOT NULL, term TEXT NOT NULL, docs BLOB NOT NULL, df INTEGER NOT NULL,"
+            " PRIMARY KEY (field, term)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            "INSERT OR IGNORE INTO meta VALUES ('postings', 0), ('dead_postings', 0);"
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _meta(self, key: str) -> int:
+        return self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def _bump(self, key: str, delta: int):
+        self._conn.execute("UPDATE meta SET value = value + ? WHERE key = ?", (delta, key))
+
+    # ----------------------------------------------------------
+    # ✍️ Updates
+    # ----------------------------------------------------------
+    def upsert(self, records, batch_size: int = None) -> dict:
+        """
+        Add or replace parsed JDs from an iterable of (job_id, jd_data), e.g. the output
+        of stage2_jd.parse_jd_stream. Unchanged JDs are skipped.
+        Returns {"added": n, "updated": n, "unchanged": n}.
+        """
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size or config.JD_INDEX_BATCH_SIZE))
+            if not batch:
+                break
+            with self._lock:
+                self._upsert_batch(batch, counts)
+        self._maybe_compact()
+        return counts
+
+    def _upsert_batch(self, batch, counts):
+        pending = {}
+        with self._conn:  # one transaction per batch
+            for job_id, jd_data in batch:
+                job_id = str(job_id)
+                payload = json.dumps(jd_data, ensure_ascii=False)
+                digest = content_key(payload)
+                old = self._conn.execute("SELECT doc, digest, n_terms FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if old and old[1] == digest:
+                    counts["unchanged"] += 1
+                    continue
+                if old:
+                    self._conn.execute("DELETE FROM jobs WHERE doc = ?", (old[0],))
+                    self._bump("dead_postings", old[2])
+                terms = jd_terms(jd_data)
+                doc = self._conn.execute(
+                    "INSERT INTO jobs (id, digest, job_title, location, n_terms, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, digest, jd_data.get("job_title"), jd_data.get("location"), len(terms), payload),
+                ).lastrowid
+                for term in terms:
+                    pending.setdefault(term, []).append(doc)
+                counts["updated" if old else "added"] += 1
+
+            for (field, term), docs in pending.items():
+                row = self._conn.execute(
+                    "SELECT docs FROM postings WHERE field = ? AND term = ?", (field, term)
+                ).fetchone()
+                blob = (row[0] if row else b"") + np.asarray(docs, dtype=_DOC_DTYPE).tobytes()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO postings (field, term, docs, df) VALUES (?, ?, ?, ?)",
+                    (field, term, blob, len(blob) // 4),
+                )
+            self._bump("postings", sum(len(d) for d in pending.values()))
+
+    def remove(self, job_ids) -> int:
+        """Remove JDs by id; returns how many were indexed."""
+        removed = 0
+        with self._lock, self._conn:
+            for job_id in job_ids:
+                row = self._conn.execute("SELECT doc, n_terms FROM jobs WHERE id = ?", (str(job_id),)).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM jobs WHERE doc = ?", (row[0],))
+                    self._bump("dead_postings", row[1])
+                    removed += 1
+        self._maybe_compact()
+        return removed
+
+    def _maybe_compact(self):
+        with self._lock:
+            total, dead = self._meta("postings"), self._meta("dead_postings")
+        if dead and dead > total * config.JD_INDEX_COMPACT_RATIO:
+            self.compact()
+
+    def compact(self):
+        """Drop postings of replaced/removed JDs from every posting list."""
+        with self._lock, self._conn:
+            live = np.fromiter((r[0] for r in self._conn.execute("SELECT doc FROM jobs ORDER BY doc")), dtype=_DOC_DTYPE)
+            rows = self._conn.execute("SELECT field, term, docs FROM postings").fetchall()
+            total = 0
+            for field, term, blob in rows:
+                docs = np.frombuffer(blob, dtype=_DOC_DTYPE)
+                kept = docs[np.isin(docs, live, assume_unique=True)]
+                if len(kept) == len(docs):
+                    total += len(docs)
+                elif len(kept):
+                    self._conn.execute(
+                        "UPDATE postings SET docs = ?, df = ? WHERE field = ? AND term = ?",
+                        (kept.tobytes(), len(kept), field, term),
+                    )
+                    total += len(kept)
+                else:
+                    self._conn.execute("DELETE FROM postings WHERE field = ? AND term = ?", (field, term))
+            self._conn.execute("UPDATE meta SET value = ? WHERE key = 'postings'", (total,))
+            self._conn.execute("UPDATE meta SET value = 0 WHERE key = 'dead_postings'")
+        utils.log_status(f"🗂️ JD index compacted: {total:,} postings for {len(live):,} jobs")
+
+    # ----------------------------------------------------------
+    # 🔎 Queries
+    # ----------------------------------------------------------
+    def get(self, job_id):
+        """Parsed JD stored under job_id, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (str(job_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def top_jobs(self, candidate: dict, n: int = None) -> list:
+        """
+        Best-matching indexed jobs for a Stage 1 candidate dictionary, best first.
+        Score is Σ field weight × idf over the job's terms the candidate has.
+
+        Returns
+        -------
+        list[dict]
+            {"id", "score", "job_title", "location", "matched": {field: [terms]}} per job.
+        """
+        n = n or config.JD_INDEX_TOP_N
+        query = {f: sorted(t) for f, t in candidate_terms(candidate).items() if t}
+        with self._lock:
+            n_jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            seq = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'jobs'").fetchone()
+            if not n_jobs or not query:
+                return []
+            lists = []
+            for field, terms in query.items():
+                for i in range(0, len(terms), 500):  # stay under SQLite's bound-parameter limit
+                    chunk = terms[i:i + 500]
+                    lists.extend(self._conn.execute(
+                        f"SELECT field, term, docs, df FROM postings WHERE field = ? AND term IN "
+                        f"({','.join('?' * len(chunk))})", (field, *chunk),
+                    ))
+
+            scores = np.zeros(seq[0] + 1, dtype=np.float32)
+            postings = []
+            for field, term, blob, df in lists:
+                docs = np.frombuffer(blob, dtype=_DOC_DTYPE)
+                scores[docs] += config.JD_INDEX_FIELD_WEIGHTS.get(field, 1.0) * math.log(1 + n_jobs / df)
+                postings.append((field, term, docs))
+
+            results, k = [], min(n * 2, len(scores))
+            while True:
+                # Best k job numbers, higher score then newer job first; stale ones are dropped below
+                top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+                top = top[scores[top] > 0]
+                top = top[np.lexsort((-top, -scores[top]))]
+                rows = {r[0]: r for r in self._conn.execute(
+                    f"SELECT doc, id, job_title, location FROM jobs WHERE doc IN ({','.join('?' * len(top))})",
+                    [int(d) for d in top],
+                )}
+                results = [rows[int(d)] for d in top if int(d) in rows][:n]
+                if len(results) == n or len(top) < k or k == len(scores):
+                    break
+                k = min(k * 2, len(scores))
+
+        out = [{"id": job_id, "score": round(float(scores[doc]), 3), "job_title": title, "location": location,
+                "matched": {}} for doc, job_id, title, location in results]
+        found = np.array([r[0] for r in results], dtype=_DOC_DTYPE)
+        for field, term, docs in postings:
+            hits = docs[np.minimum(np.searchsorted(docs, found), len(docs) - 1)] == found
+            for i in np.flatnonzero(hits):
+                out[i]["matched"].setdefault(field, []).append(term)
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            terms = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+            postings, dead = self._meta("postings"), self._meta("dead_postings")
+        return {"jobs": jobs, "terms": terms, "postings": postings, "dead_postings": dead,
+                "bytes": sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the shared index at config.JD_INDEX_PATH."""
+    global _index
+    with _index_lock:
+        if _index is None or _index.path != config.JD_INDEX_PATH:
+            _index = JDIndex(config.JD_INDEX_PATH)
+        return _index
+
+
+# ----------------------------------------------------------
+# 📥 Background adds (Stage 2 requests)
+# ----------------------------------------------------------
+_add_queue = queue.Queue()
+_add_cond = threading.Condition()
+_add_counts = {"submitted": 0, "completed": 0}
+_add_thread = None
+
+
+def add_later(job_id, jd_data: dict, index: JDIndex = None):
+    """
+    Queue one parsed JD for the index (default: the shared one) and return at once.
+    A background thread upserts queued JDs in batches, one transaction each, so
+    request threads never wait on SQLite. Call flush() before querying for them.
+    """
+    global _add_thread
+    index = index or get_index()
+    with _add_cond:
+        _add_counts["submitted"] += 1
+        if _add_thread is None:
+            _add_thread = threading.Thread(target=_run_adds, name="jd-index-writer", daemon=True)
+            _add_thread.start()
+    _add_queue.put((index, str(job_id), jd_data))
+
+
+def _run_adds():
+    while True:
+        batch = [_add_queue.get()]
+        deadline = time.monotonic() + config.JD_INDEX_WRITE_INTERVAL
+        while len(batch) < config.JD_INDEX_BATCH_SIZE:
+            try:
+                batch.append(_add_queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        by_index = {}
+        for index, job_id, jd_data in batch:
+            by_index.setdefault(index, {})[job_id] = jd_data  # the latest parse of a JD wins
+        for index, records in by_index.items():
+            try:
+                index.upsert(records.items())
+            except Exception as e:  # keep the writer alive; flush() must not wait forever
+                utils.log_status(f"⚠️ {len(records)} JDs not added to the index ({e})")
+        with _add_cond:
+            _add_counts["completed"] += len(batch)
+            _add_cond.notify_all()
+
+
+def flush(timeout: float = None) -> bool:
+    """Block until every JD queued with add_later so far is indexed; False if timeout expired first."""
+    with _add_cond:
+        target = _add_counts["submitted"]
+        return _add_cond.wait_for(lambda: _add_counts["completed"] >= target, timeout)
+
+
+atexit.register(flush)
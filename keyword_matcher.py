@@ -0,0 +1,140 @@
+# ==========================================================
+# 🔑 keyword_matcher.py
+# Multi-word JD keyword matching for ATS scoring: every keyword
+# and phrase is compiled into one token-level Aho-Corasick
+# automaton, and a resume is scanned once whatever the keyword count
+# ==========================================================
+
+import re
+from collections import deque
+from functools import lru_cache
+
+# Lowercase word tokens; keeps tech spellings whole ("c++", "c#", "node.js", "3+")
+# and drops surrounding punctuation ("Python," → "python", "SQL." → "sql")
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+
+# Words that carry no skill on their own in JD requirement lines
+FILLER = frozenset(
+    "a an and or of in on for to the with at as by from is are be our your we you "
+    "years year experience knowledge strong good plus etc using "
+    "hands proficiency proficient familiarity familiar understanding solid excellent".split()
+)
+# Separators between the items of one list entry ("/" is kept: "CI/CD" is one phrase)
+_ITEM_SPLIT = re.compile(r"[,;|()]|\band\b|\bor\b")
+
+
+def normalize(text: str) -> list[str]:
+    """Lowercased word tokens of text, punctuation stripped (hyphens and slashes split words)."""
+    return _TOKEN.findall(str(text).lower())
+
+
+def key_phrases(entry) -> list[str]:
+    """
+    Key phrases of one JD list entry, so requirement lines match however they are
+    worded: the entry is split at separators, filler words and numbers, and the
+    remaining word runs are kept ("3+ years of Python and SQL" → ["python", "sql"]).
+    """
+    phrases = []
+    for part in _ITEM_SPLIT.split(str(entry).lower().replace("'s ", " ")):
+        run = []
+        for tok in normalize(part) + [""]:
+            if tok and tok not in FILLER and not tok[0].isdigit():
+                run.append(tok)
+            elif run:
+                phrases.append(" ".join(run))
+                run = []
+    return list(dict.fromkeys(phrases))
+
+
+class KeywordMatcher:
+    """
+    Matches a fixed list of JD keywords and phrases against resume text.
+
+    Keywords are normalized like the resume, so "Machine Learning" matches
+    "machine-learning," and "Scikit-learn" matches "scikit learn". A phrase matches
+    only as a contiguous token run. Keywords that normalize to the same tokens are
+    scored once, under their first spelling; keywords with no tokens are ignored.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = []      # first spelling per distinct normalized keyword
+        self._goto = [{}]       # state → {token: next state}; state 0 is the root
+        self._fail = [0]
+        self._out = [()]        # state → keyword indices ending here (including via fail links)
+        seen = {}
+        for keyword in keywords:
+            tokens = tuple(normalize(keyword))
+            if tokens and tokens not in seen:
+                seen[tokens] = len(self.keywords)
+                self.keywords.append(keyword)
+                self._add(tokens, seen[tokens])
+        self._vocab = frozenset(tok for edges in self._goto for tok in edges)
+        self._link()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _add(self, tokens, index):
+        state = 0
+        for tok in tokens:
+            nxt = self._goto[state].get(tok)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][tok] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (index,)
+
+    def _link(self):
+        """Breadth-first fail links: the longest proper suffix of each state that is also a prefix."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and tok not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(tok, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> set[int]:
+        """Indices (into self.keywords) of the keywords found in text, in one pass over its tokens."""
+        found, goto, fail, out, vocab = set(), self._goto, self._fail, self._out, self._vocab
+        state, total = 0, len(self.keywords)
+        for tok in normalize(text):
+            if tok not in vocab:
+                state = 0  # no keyword continues through this token
+                continue
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            if out[state]:
+                found.update(out[state])
+                if len(found) == total:
+                    break
+        return found
+
+    def match(self, text: str) -> tuple[list[str], list[str]]:
+        """(matched, missing) keywords, each in keyword order."""
+        found = self.find(text)
+        matched = [kw for i, kw in enumerate(self.keywords) if i in found]
+        missing = [kw for i, kw in enumerate(self.keywords) if i not in found]
+        return matched, missing
+
+    def score(self, text: str) -> float:
+        """Percentage of keywords found in text (0.0 when there are none)."""
+        return round(len(self.find(text)) / len(self.keywords) * 100, 2) if self.keywords else 0.0
+
+
+@lru_cache(maxsize=64)
+def _compiled(keywords: tuple) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def compile_keywords(keywords) -> KeywordMatcher:
+    """KeywordMatcher for a keyword list, reused across resumes scored against the same JD."""
+    return _compiled(tuple(keywords))
@@ -3,41 +3,69 @@
 # Capstone_Project-HPPCS01
 # ==========================================================
 
-import argparse, os, sys
+import time
+_PROCESS_START = time.perf_counter()
+
+import argparse, csv, json, os, sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from transformers import pipeline
-from Codebase import config, utils, stage1_resume, stage2_jd, stage3_tailor
+from Codebase import artifact_store, config, utils, models, model_server, orchestrator, stage1_resume, stage2_jd, stage3_tailor, telemetry
 
+_IMPORTS_DONE = time.perf_counter()
 
 
 
-def load_models(hf_token: str):
+def load_models(hf_token: str, lazy: bool = True, warm_up: bool = False, profile: str = None,
+                use_server: bool = True):
     """
-    Loads both Gemma (for resume extraction) and LLaMA (for tailoring).
+    Prepares Gemma (for resume extraction) and LLaMA (for tailoring).
     Returns two pipeline objects: gemma_pipe, llama_pipe
+
+    When a model server (model_server.py) is running and use_server is True, both
+    pipelines are served by it and nothing is loaded here; otherwise, with lazy=True
+    each model is only loaded when its stage first runs and warm_up=True starts
+    loading both in background threads right away.
+    profile names an entry of config.INFERENCE_PROFILES (default: config.INFERENCE_PROFILE).
     """
+    profile = profile or config.INFERENCE_PROFILE
+    models.get_profile(profile)  # fail fast on a bad profile name
+    gemma_pipe, llama_pipe = models.stage_pipelines(hf_token, profile)
 
-    utils.log_status("🔄 Loading Gemma-2B-Instruct model for resume extraction...")
-    gemma_pipe = pipeline(
-        "text2text-generation",
-        model=config.GEMMA_MODEL_NAME,
-        token=hf_token
-    )
+    if use_server and config.MODEL_SERVER_AUTO_ATTACH:
+        remote = model_server.attach(hf_token, gemma_pipe, llama_pipe)
+        if remote:
+            return remote
 
-    utils.log_status("🔄 Loading LLaMA model for resume tailoring...")
-    llama_pipe = pipeline(
-        "text-generation",
-        model=config.LLAMA_MODEL_NAME,
-        token=hf_token
-    )
+    utils.log_status(f"⚙️ Inference profile: {profile} {config.INFERENCE_PROFILES[profile]}")
+    if not lazy:
+        gemma_pipe.load()
+        llama_pipe.load()
+    elif warm_up:
+        gemma_pipe.warm_up()
+        llama_pipe.warm_up()
 
     return gemma_pipe, llama_pipe
 
 
+def _model_manager(pipe):
+    """The ModelManager behind a pipeline, or None when models are not memory-budgeted."""
+    from Codebase.model_manager import ManagedPipeline
+    return pipe.manager if isinstance(pipe, ManagedPipeline) else None
+
+
+def _report_startup():
+    """Log cold-start timings: package imports and time until the selected mode starts work."""
+    now = time.perf_counter()
+    utils.log_status(
+        f"⏱️ Startup: imports {(_IMPORTS_DONE - _PROCESS_START) * 1000:.0f} ms | "
+        f"ready in {(now - _PROCESS_START) * 1000:.0f} ms"
+    )
+
+
 def run_cli_mode(gemma_pipe, llama_pipe):
     """Executes the full pipeline sequentially using sample files from /input."""
     utils.log_status("🧩 Running in CLI Mode...")
     config.show_structure()
+    _report_startup()
 
     resume_file = os.path.join(config.INPUT_DIR, "sample_resume.txt")
     jd_file = os.path.join(config.INPUT_DIR, "sample_jd.txt")
@@ -46,15 +74,13 @@ def run_cli_mode(gemma_pipe, llama_pipe):
         print("❌ Missing sample files in /input/. Please add 'sample_resume.txt' and 'sample_jd.txt'.")
         return
 
-    # ---------------- Stage 1 ----------------
-    utils.log_status("🔍 Extracting candidate data from resume...")
-    candidate_data, candidate_json = stage1_resume.extract_resume_data(resume_file, gemma_pipe)
-
-    # ---------------- Stage 2 ----------------
-    utils.log_status("🧾 Parsing job description...")
+    # ---------------- Stage 1 + Stage 2 (JD rules run alongside Gemma) ----------------
+    utils.log_status("🔍 Extracting candidate data from resume and parsing job description...")
     with open(jd_file, "r", encoding="utf-8") as f:
         jd_text = f.read()
-    jd_data, jd_json = stage2_jd.extract_jd_data_rulebased(jd_text)
+    (candidate_data, candidate_json), (jd_data, jd_json) = orchestrator.run_stage1_and_stage2(
+        resume_file, jd_text, gemma_pipe
+    )
 
     # ---------------- Stage 3 ----------------
     utils.log_status("🧠 Generating tailored resume...")
@@ -68,10 +94,182 @@ def run_cli_mode(gemma_pipe, llama_pipe):
     print(f"\n📊 ATS Comparison: Original {ats_report['original_score']}% → Tailored {ats_report['tailored_score']}% (+{ats_report['improvement']}%)\n")
 
 
+def _collect_batch_pairs(manifest=None, resume_dir=None, jd_dir=None):
+    """
+    Build the list of (resume_path, jd_path) pairs for batch mode.
+    A manifest (.csv or .jsonl with 'resume' and 'jd' fields) lists explicit pairs;
+    otherwise every resume in resume_dir is paired with every JD in jd_dir.
+    """
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", encoding="utf-8") as f:
+            if manifest.lower().endswith(".jsonl"):
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                rows = list(csv.DictReader(f))
+        return [
+            (os.path.join(base, row["resume"]), os.path.join(base, row["jd"]))
+            for row in rows
+        ]
+
+    def list_files(folder, exts):
+        if not os.path.isdir(folder):
+            return []
+        return sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if os.path.splitext(name)[-1].lower() in exts
+        )
+
+    resumes = list_files(resume_dir or config.BATCH_RESUME_DIR, (".txt", ".pdf", ".docx"))
+    jds = list_files(jd_dir or config.BATCH_JD_DIR, (".txt", ".pdf", ".docx"))
+    return [(r, j) for r in resumes for j in jds]
+
+
+def run_batch_mode(gemma_pipe, llama_pipe, pairs, stage1_batch_size=None, stage3_batch_size=None, pipelined=False):
+    """
+    Tailors every (resume, JD) pair with the models loaded once.
+    Stage 1 runs once per unique resume and Stage 2 once per unique JD.
+    With pipelined=True, pairs stream through the overlapped stage pipeline instead, unless
+    a model memory budget cannot hold both models (then all Stage 1 work runs first).
+    The pipeline sends one pair at a time to each model, so the batch sizes are not used there.
+    """
+    utils.log_status(f"📦 Running in Batch Mode ({len(pairs)} resume/JD pairs)...")
+    if not pairs:
+        print("❌ No resume/JD pairs found. Provide --manifest or populate the resume and JD folders.")
+        return
+
+    config.ensure_dirs()
+    _report_startup()
+    if pipelined and (stage1_batch_size or stage3_batch_size):
+        utils.log_status("⚠️ --pipelined sends one pair at a time to each model; batch sizes are ignored.")
+    stage1_batch_size = stage1_batch_size or config.STAGE1_BATCH_SIZE
+    stage3_batch_size = stage3_batch_size or config.STAGE3_BATCH_SIZE
+    start = time.perf_counter()
+
+    def stem(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    pdf_paths = [utils.get_batch_pdf_output_path(stem(r), stem(j)) for r, j in pairs]
+
+    manager = _model_manager(gemma_pipe)
+    if pipelined and manager is not None and not manager.fits_together():
+        # Overlapping the stages would swap the models in and out for every pair
+        utils.log_status("🧮 Both models do not fit the memory budget; running Stage 1 for the whole batch first.")
+        pipelined = False
+
+    if pipelined:
+        # ---------------- Stages 1-3 overlapped ----------------
+        jobs = [(r, j, pdf_path) for (r, j), pdf_path in zip(pairs, pdf_paths)]
+        outcomes, _ = orchestrator.run_pipelined(jobs, gemma_pipe, llama_pipe)
+        records = [
+            {"pdf": o.get("pdf_path"), "ats_report": o.get("ats_report"), **({"error": o["error"]} if "error" in o else {})}
+            for o in outcomes
+        ]
+    else:
+        # ---------------- Stage 1 ----------------
+        resume_files = list(dict.fromkeys(r for r, _ in pairs))
+        utils.log_status(f"🔍 Extracting candidate data from {len(resume_files)} resumes...")
+        candidates = dict(zip(
+            resume_files,
+            stage1_resume.extract_resume_data_batch(resume_files, gemma_pipe, batch_size=stage1_batch_size),
+        ))
+
+        # ---------------- Stage 2 ----------------
+        jd_files = list(dict.fromkeys(j for _, j in pairs))
+        utils.log_status(f"🧾 Parsing {len(jd_files)} job descriptions...")
+        # The whole batch runs under one trace: give each JD its own artifact folder
+        jds = {
+            j: stage2_jd.extract_jd_data_rulebased(utils.read_file_text(j), artifact_store.item_request_id(n, j))[0]
+            for n, j in enumerate(jd_files)
+        }
+
+        # ---------------- Stage 3 ----------------
+        results = stage3_tailor.tailor_resume_batch(
+            [(candidates[r], jds[j]) for r, j in pairs],
+            llama_pipe, batch_size=stage3_batch_size, output_pdf_paths=pdf_paths,
+        )
+        records = [{"pdf": pdf_path, "ats_report": ats_report} for _, pdf_path, ats_report in results]
+
+    # ---------------- Summary ----------------
+    os.makedirs(os.path.dirname(config.BATCH_RESULTS_JSONL), exist_ok=True)
+    with open(config.BATCH_RESULTS_JSONL, "w", encoding="utf-8") as f:
+        for (resume_file, jd_file), record in zip(pairs, records):
+            f.write(json.dumps({"resume": resume_file, "jd": jd_file, **record}, ensure_ascii=False) + "\n")
+
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for r in records if "error" in r)
+    if failed:
+        utils.log_status(f"⚠️ Batch finished with {failed}/{len(records)} pairs failed (see \"error\" in the results).")
+    else:
+        utils.log_status("✅ Batch completed successfully!")
+    print(f"\n📁 Batch results: {config.BATCH_RESULTS_JSONL}")
+    succeeded = len(records) - failed
+    print(f"⏱️ {succeeded} tailored resumes in {elapsed:.1f}s → {succeeded / (elapsed / 60):.2f} resumes/min\n")
+
+
+def run_jd_parse_mode(source, output_path=None, workers=None, index_path=None):
+    """Parses a JSONL file or folder of JDs across a process pool (no models needed), optionally indexing them."""
+    utils.log_status(f"🧾 Parsing job descriptions from {source}...")
+    if not os.path.exists(source):
+        print(f"❌ JD source not found: {source}")
+        return
+
+    start = time.perf_counter()
+    count = 0
+    stream = stage2_jd.parse_jd_stream(source, workers=workers, output_path=output_path)
+    if index_path:
+        from Codebase import jd_index
+        index = jd_index.JDIndex(index_path)
+        counts = index.upsert(stream)
+        count = sum(counts.values())
+    else:
+        for count, _ in enumerate(stream, start=1):
+            pass
+
+    elapsed = time.perf_counter() - start
+    utils.log_status(f"✅ Parsed {count} job descriptions in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} docs/s)")
+    if output_path:
+        print(f"\n📁 Parsed JDs: {output_path}\n")
+    if index_path:
+        stats = index.stats()
+        utils.log_status(
+            f"🗂️ JD index: {counts['added']} added, {counts['updated']} updated, {counts['unchanged']} unchanged "
+            f"→ {stats['jobs']:,} jobs, {stats['terms']:,} terms ({stats['bytes'] / 1e6:.1f} MB) at {index_path}"
+        )
+
+
+def run_job_match_mode(candidate_json, index_path=None, top_n=None):
+    """Prints the best-matching indexed jobs for a Stage 1 candidate JSON (no models needed)."""
+    from Codebase import jd_index
+
+    index = jd_index.JDIndex(index_path)
+    with open(candidate_json, "r", encoding="utf-8") as f:
+        candidate = json.load(f)
+    start = time.perf_counter()
+    matches = index.top_jobs(candidate, top_n)
+    elapsed = time.perf_counter() - start
+    utils.log_status(f"🔎 Top {len(matches)} of {len(index):,} indexed jobs in {elapsed * 1000:.1f} ms")
+    print(json.dumps(matches, indent=2, ensure_ascii=False))
+
+
+def run_server_control(show_stats: bool, stop: bool):
+    """Print the model server's health/stats and/or ask it to shut down."""
+    stats = model_server.server_stats()
+    if stats is None:
+        utils.log_status(f"🔌 No model server running at {config.MODEL_SERVER_SOCKET}")
+        return
+    if show_stats:
+        print(json.dumps(stats, indent=2))
+    if stop and model_server.stop_server():
+        utils.log_status(f"🔌 Model server (pid {stats['pid']}) is shutting down")
+
+
 def run_gradio_mode(gemma_pipe, llama_pipe):
     """Launches the Gradio interface for interactive testing."""
     utils.log_status("🧠 Launching Gradio Interface...")
+    config.ensure_dirs()
     from Codebase import ui_gradio
+    _report_startup()
     ui_gradio.launch_ui(gemma_pipe, llama_pipe)
 
 
@@ -82,8 +280,71 @@ def main():
     parser = argparse.ArgumentParser(description="Capstone Resume Tailoring Pipeline")
     parser.add_argument("--hf_token", type=str, help="Your Hugging Face access token")
     parser.add_argument("--ui_mode", type=str, default="cli", help="'cli' or 'gradio'")
+    parser.add_argument("--warm_up", action="store_true", help="Load both models in background threads at startup")
+    parser.add_argument("--batch", action="store_true", help="Tailor many resume/JD pairs with the models loaded once")
+    parser.add_argument("--manifest", type=str, help="Batch manifest (.csv or .jsonl) with 'resume' and 'jd' columns")
+    parser.add_argument("--resume_dir", type=str, help="Batch resume folder (default: input/resumes)")
+    parser.add_argument("--jd_dir", type=str, help="Batch JD folder (default: input/jds)")
+    parser.add_argument("--stage1_batch_size", type=int, help="Gemma prompts per batch in --batch mode")
+    parser.add_argument("--stage3_batch_size", type=int, help="LLaMA prompts per batch in --batch mode")
+    parser.add_argument("--pipelined", action="store_true", help="In --batch mode, overlap Stage 1/2/3 across pairs (one pair per model call)")
+    parser.add_argument("--parse_jds", type=str, help="Parse a JSONL file or folder of JDs and exit (no models loaded)")
+    parser.add_argument("--jd_output", type=str, help="JSONL output path for --parse_jds")
+    parser.add_argument("--workers", type=int, help="Worker processes for --parse_jds (default: CPU count)")
+    parser.add_argument("--jd_index", type=str, nargs="?", const=config.JD_INDEX_PATH,
+                        help="JD index file; with --parse_jds, also add the parsed JDs to it (default path if no value)")
+    parser.add_argument("--match_jobs", type=str, help="Print the top indexed jobs for a Stage 1 candidate JSON and exit")
+    parser.add_argument("--top_n", type=int, help=f"Jobs returned by --match_jobs (default: {config.JD_INDEX_TOP_N})")
+    parser.add_argument("--profile", type=str, choices=list(config.INFERENCE_PROFILES),
+                        help="CPU inference profile (default: config.INFERENCE_PROFILE)")
+    parser.add_argument("--memory_budget_mb", type=float,
+                        help="Keep loaded model weights within this many MB, evicting the least recently used model")
+    parser.add_argument("--eviction", type=str, choices=["offload", "unload"],
+                        help="How models are evicted under --memory_budget_mb (default: config.MODEL_EVICTION)")
+    parser.add_argument("--telemetry", action="store_true", help="Record per-stage metrics and trace IDs")
+    parser.add_argument("--metrics_port", type=int, help="Serve /metrics and /metrics.json on this port (implies --telemetry)")
+    parser.add_argument("--metrics_out", type=str, help="Write a JSON metrics snapshot here on exit (implies --telemetry)")
+    parser.add_argument("--serve_models", action="store_true", help="Keep both models loaded and serve other runs over a Unix socket")
+    parser.add_argument("--server_stats", action="store_true", help="Print the running model server's health/stats and exit")
+    parser.add_argument("--stop_server", action="store_true", help="Stop the running model server and exit")
+    parser.add_argument("--no_server", action="store_true", help="Load models in-process even if a model server is running")
     args = parser.parse_args()
 
+    # ------------------------------------------------------
+    # 📈 Telemetry (no-op unless enabled)
+    # ------------------------------------------------------
+    if args.telemetry or args.metrics_port or args.metrics_out:
+        config.TELEMETRY_ENABLED = True
+    if args.metrics_port:
+        config.METRICS_PORT = args.metrics_port
+        telemetry.start_metrics_server()
+        utils.log_status(f"📈 Metrics at http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+
+    try:
+        _run(args)
+    finally:
+        if args.metrics_out:
+            utils.save_json(telemetry.snapshot(), args.metrics_out)
+            utils.log_status(f"📈 Metrics snapshot saved at: {args.metrics_out}")
+
+
+def _run(args):
+
+    if args.parse_jds:
+        run_jd_parse_mode(args.parse_jds, args.jd_output, args.workers, args.jd_index)
+        return
+
+    if args.match_jobs:
+        run_job_match_mode(args.match_jobs, args.jd_index, args.top_n)
+        return
+
+    # ------------------------------------------------------
+    # 🔌 Model server control (no models loaded here)
+    # ------------------------------------------------------
+    if args.server_stats or args.stop_server:
+        run_server_control(args.server_stats, args.stop_server)
+        return
+
     # ------------------------------------------------------
     # 🔐 Token Management
     # ------------------------------------------------------
@@ -92,18 +353,38 @@ def main():
     config.HF_TOKEN = hf_token
     utils.log_status("🔐 Hugging Face token loaded successfully (using environment or CLI arg).")
 
+    if args.memory_budget_mb:
+        config.MODEL_MEMORY_BUDGET_MB = args.memory_budget_mb
+    if args.eviction:
+        config.MODEL_EVICTION = args.eviction
+
+    if args.serve_models:
+        model_server.serve(hf_token, args.profile)
+        return
+
     # ------------------------------------------------------
-    # 🧱 Load Models
+    # 🧱 Prepare Models (loaded lazily when each stage first runs)
     # ------------------------------------------------------
-    gemma_pipe, llama_pipe = load_models(hf_token)
+    gemma_pipe, llama_pipe = load_models(
+        hf_token, warm_up=args.warm_up or config.MODEL_WARM_UP, profile=args.profile, use_server=not args.no_server
+    )
 
     # ------------------------------------------------------
     # 🚀 Choose Mode
     # ------------------------------------------------------
-    if args.ui_mode.lower() == "gradio":
+    if args.batch:
+        pairs = _collect_batch_pairs(args.manifest, args.resume_dir, args.jd_dir)
+        with telemetry.trace():
+            run_batch_mode(gemma_pipe, llama_pipe, pairs, args.stage1_batch_size, args.stage3_batch_size, args.pipelined)
+    elif args.ui_mode.lower() == "gradio":
         run_gradio_mode(gemma_pipe, llama_pipe)
     else:
-        run_cli_mode(gemma_pipe, llama_pipe)
+        with telemetry.trace():
+            run_cli_mode(gemma_pipe, llama_pipe)
+
+    manager = _model_manager(gemma_pipe)
+    if manager is not None:
+        manager.log_stats()
 
 
 if __name__ == "__main__":
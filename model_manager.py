@@ -0,0 +1,295 @@
+# ==========================================================
+# 🧮 model_manager.py
+# Keeps the stage models within a memory budget: loads them on
+# demand and evicts or offloads the least recently used one
+# ==========================================================
+
+import gc, os, sys, time, atexit, resource, threading, itertools
+from contextlib import contextmanager
+from Codebase import config, utils, telemetry
+
+EVICTION_POLICIES = ("offload", "unload")
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+def _model_mb(pipe) -> float:
+    """In-memory size of a pipeline's weights (parameters and buffers, shared tensors counted once)."""
+    model = getattr(pipe, "model", None)
+    if model is None or not hasattr(model, "parameters"):
+        return 0.0
+    seen, total = set(), 0
+    for tensor in itertools.chain(model.parameters(), model.buffers()):
+        if tensor.data_ptr() not in seen:
+            seen.add(tensor.data_ptr())
+            total += tensor.numel() * tensor.element_size()
+    return total / (1024 * 1024)
+
+
+def _assign_weights(model, state_dict, copy: bool):
+    """Swap the model's weights for state_dict's tensors (copied into RAM when copy=True)."""
+    if copy:
+        copies = {}  # tied weights share one tensor; copy it once
+        state_dict = {
+            k: copies.setdefault(v.data_ptr(), v.clone()) if v.numel() else v for k, v in state_dict.items()
+        }
+    model.load_state_dict(state_dict, assign=True)
+    if hasattr(model, "tie_weights"):
+        model.tie_weights()
+
+
+class ManagedPipeline:
+    """
+    LazyPipeline-compatible handle for one model under a ModelManager.
+    Calls mark the model as in use, so it is never evicted mid-generation.
+    """
+
+    def __init__(self, manager, label: str, loader, size_mb: float = None):
+        self.manager = manager
+        self.label = label
+        self.size_mb = size_mb      # learned on first load unless given
+        self.state = "unloaded"     # "unloaded" | "loading" | "resident" | "offloaded"
+        self.policy = manager.policy
+        self.in_use = 0
+        self.last_used = 0
+        self.loads = 0
+        self._loader = loader
+        self._pipe = None
+        self._tokenizer = None
+        self._offload_path = None
+        self._warm_up_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.state == "resident"
+
+    def load(self):
+        """Make the model resident (evicting others if needed) and return the raw pipeline."""
+        with self.manager.use(self) as pipe:
+            return pipe
+
+    def warm_up(self):
+        if self.state != "resident" and self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=self.load, name=f"warm-up:{self.label}", daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    @property
+    def tokenizer(self):
+        # Kept across evictions, so prompt building never forces a reload
+        if self._tokenizer is None:
+            self.load()
+        return self._tokenizer
+
+    def __call__(self, *args, **kwargs):
+        with self.manager.use(self) as pipe:
+            return pipe(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        with self.manager.use(self) as pipe:
+            return getattr(pipe, attr)
+
+
+class ModelManager:
+    """
+    Memory-budgeted residency for the stage pipelines.
+
+    A model is made resident when it is called. If that would exceed budget_mb,
+    idle models are evicted least recently used first; with policy "offload" their
+    weights move to a memory-mapped file and are copied back on the next call,
+    with "unload" the pipeline is dropped and rebuilt by its loader. A model whose
+    size is not known in advance (see models.estimate_weights_mb) is measured after
+    its first load and room is made then. Models in use are never evicted: a caller that
+    needs the space waits for them to finish. Loads and swap-ins run outside the lock,
+    so calls to other resident models go on meanwhile; concurrent callers of the
+    model being loaded wait for that one load.
+    """
+
+    def __init__(self, budget_mb: float = None, policy: str = config.MODEL_EVICTION,
+                 offload_dir: str = config.MODEL_OFFLOAD_DIR):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}; choose one of {', '.join(EVICTION_POLICIES)}")
+        self.budget_mb = budget_mb
+        self.policy = policy
+        self.offload_dir = offload_dir
+        self.pipes = []
+        self._cond = threading.Condition()
+        self._clock = itertools.count(1)
+        self._stats = {"loads": 0, "swap_ins": 0, "evictions": 0, "swap_in_seconds": 0.0}
+        atexit.register(self.close)
+
+    def pipeline(self, label: str, loader, size_mb: float = None) -> ManagedPipeline:
+        """Register a model; size_mb (expected weights size) lets room be made before its first load."""
+        pipe = ManagedPipeline(self, label, loader, size_mb)
+        self.pipes.append(pipe)
+        return pipe
+
+    def resident_mb(self) -> float:
+        """Weights resident or being loaded (a load reserves its room up front)."""
+        return sum(p.size_mb or 0.0 for p in self.pipes if p.state in ("resident", "loading"))
+
+    def fits_together(self) -> bool:
+        """True when every known model fits the budget at once (no eviction between stages)."""
+        if self.budget_mb is None:
+            return True
+        sizes = [p.size_mb for p in self.pipes]
+        return all(s is not None for s in sizes) and sum(sizes) <= self.budget_mb
+
+    # ----------------------------------------------------------
+    # 🔁 Residency
+    # ----------------------------------------------------------
+    @contextmanager
+    def use(self, pipe: ManagedPipeline):
+        """Hold pipe resident for the duration of the block; yields the raw pipeline."""
+        with self._cond:
+            pipe.in_use += 1  # before loading, so it cannot be evicted while waiting for room
+        try:
+            self._make_resident(pipe)
+        except BaseException:
+            with self._cond:
+                pipe.in_use -= 1
+                self._cond.notify_all()
+            raise
+        try:
+            yield pipe._pipe
+        finally:
+            with self._cond:
+                pipe.in_use -= 1
+                self._cond.notify_all()
+
+    def _make_resident(self, pipe: ManagedPipeline):
+        """
+        Claim the load under the lock (state "loading"), run the loader or swap-in
+        without it, so calls to other models are not blocked, then publish the result.
+        """
+        with self._cond:
+            while pipe.state != "resident":
+                if pipe.state == "loading":
+                    self._cond.wait()  # another caller is loading it
+                    continue
+                self._make_room(pipe, pipe.size_mb or 0.0)
+                if pipe.state in ("unloaded", "offloaded"):  # not loaded by another caller while waiting for room
+                    break
+            else:
+                pipe.last_used = next(self._clock)
+                return
+            from_state, pipe.state = pipe.state, "loading"
+
+        start = time.perf_counter()
+        swap_in = pipe.loads > 0
+        try:
+            if from_state == "offloaded":
+                import torch
+                _assign_weights(pipe._pipe.model, torch.load(pipe._offload_path, mmap=True, weights_only=True),
+                                copy=True)
+            else:
+                utils.log_status(f"🔄 {'Reloading' if swap_in else 'Loading'} {pipe.label}...")
+                loaded = pipe._loader()
+        except BaseException:
+            with self._cond:
+                pipe.state = from_state
+                self._cond.notify_all()
+            raise
+        elapsed = time.perf_counter() - start
+
+        with self._cond:
+            if from_state == "unloaded":
+                pipe._pipe = loaded
+                pipe._tokenizer = getattr(loaded, "tokenizer", None)
+                pipe.size_mb = _model_mb(loaded)
+            pipe.state = "resident"
+            pipe.loads += 1
+            pipe.last_used = next(self._clock)
+            self._stats["loads"] += 1
+            if swap_in:
+                self._stats["swap_ins"] += 1
+                self._stats["swap_in_seconds"] += elapsed
+                telemetry.inc("model_swap_ins_total", model=pipe.label)
+            utils.log_status(
+                f"✅ {pipe.label} {'swapped in' if swap_in else 'loaded'} in {elapsed:.1f}s "
+                f"({pipe.size_mb:.0f} MB, {self.resident_mb():.0f} MB resident, peak RSS {peak_rss_mb():.0f} MB)"
+            )
+            # First load of a model of unknown size: make room now that it is known
+            self._make_room(pipe, 0.0, wait=False)
+            self._cond.notify_all()
+
+    def _make_room(self, pipe: ManagedPipeline, needed_mb: float, wait: bool = True):
+        while self.budget_mb is not None and self.resident_mb() + needed_mb > self.budget_mb:
+            others = [p for p in self.pipes if p is not pipe and p.state in ("resident", "loading")]
+            idle = [p for p in others if p.state == "resident" and p.in_use == 0]
+            if idle:
+                self._evict(min(idle, key=lambda p: p.last_used))
+            elif others and wait:
+                self._cond.wait()  # the models holding the memory are generating or loading
+            else:
+                utils.log_status(f"⚠️ Model memory budget exceeded: {self.resident_mb() + needed_mb:.0f} MB "
+                                 f"resident > {self.budget_mb:.0f} MB")
+                return
+
+    def _evict(self, pipe: ManagedPipeline):
+        if pipe.policy == "offload":
+            try:
+                self._offload(pipe)
+            except Exception as e:  # e.g. quantized layers without a plain state_dict
+                utils.log_status(f"⚠️ Cannot offload {pipe.label} ({e}); unloading it instead.")
+                pipe.policy = "unload"
+        if pipe.policy == "unload":
+            pipe._pipe = None
+            pipe.state = "unloaded"
+        gc.collect()
+        self._stats["evictions"] += 1
+        telemetry.inc("model_evictions_total", model=pipe.label, policy=pipe.policy)
+        utils.log_status(f"📤 {'Offloaded' if pipe.state == 'offloaded' else 'Unloaded'} {pipe.label} "
+                         f"({pipe.size_mb:.0f} MB) to stay within {self.budget_mb:.0f} MB")
+
+    def _offload(self, pipe: ManagedPipeline):
+        """Point the model's weights at a memory-mapped copy on disk (written once) and free the RAM copy."""
+        import torch
+
+        model = pipe._pipe.model
+        if pipe._offload_path is None:
+            os.makedirs(self.offload_dir, exist_ok=True)
+            path = os.path.join(self.offload_dir, f"{os.getpid()}-{id(pipe):x}.pt")
+            torch.save(model.state_dict(), path)
+            pipe._offload_path = path
+        _assign_weights(model, torch.load(pipe._offload_path, mmap=True, weights_only=True), copy=False)
+        pipe.state = "offloaded"
+
+    def close(self):
+        """Remove offload files (their models can no longer be swapped back in)."""
+        with self._cond:
+            for pipe in self.pipes:
+                if pipe._offload_path and os.path.exists(pipe._offload_path):
+                    if pipe.state == "offloaded":
+                        pipe._pipe, pipe.state = None, "unloaded"
+                    os.remove(pipe._offload_path)
+                    pipe._offload_path = None
+
+    # ----------------------------------------------------------
+    # 📈 Stats
+    # ----------------------------------------------------------
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "budget_mb": self.budget_mb,
+                "policy": self.policy,
+                "resident_mb": round(self.resident_mb(), 1),
+                "models": {p.label: {"state": p.state, "size_mb": round(p.size_mb or 0.0, 1), "loads": p.loads}
+                           for p in self.pipes},
+            })
+        stats["swap_in_seconds"] = round(stats["swap_in_seconds"], 2)
+        stats["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        return stats
+
+    def log_stats(self):
+        s = self.stats()
+        utils.log_status(
+            f"🧮 Model memory: peak RSS {s['peak_rss_mb']:.0f} MB | budget {s['budget_mb'] or '∞'} MB | "
+            f"{s['loads']} loads, {s['swap_ins']} swap-ins ({s['swap_in_seconds']:.1f}s), {s['evictions']} evictions"
+        )
@@ -0,0 +1,427 @@
+# ==========================================================
+# 🔌 model_server.py
+# Resident process that keeps Gemma and LLaMA loaded and serves
+# Stage 1 / Stage 3 generation over a Unix domain socket, and the
+# client pipelines that CLI and UI runs attach with
+# ==========================================================
+#
+#   python main.py --serve_models            # start (foreground)
+#   python main.py --server_stats            # health check
+#   python main.py --stop_server
+#
+# Protocol: one request per connection, one JSON object per line.
+#   → {"op": "generate", "model": "llama", "prompts": ..., "kwargs": {...}, "stream": false}
+#   ← {"chunk": "..."}*  (stream only)   then   {"result": ...} or {"error": "..."}
+#   → {"op": "stats"}   ← {"result": {...}}
+#   → {"op": "stop"}    ← {"result": "stopping"}
+# Generation objects (stopping criteria, prefix functions) travel as their
+# generation spec and are rebuilt on the server with its own tokenizer.
+
+import os, json, time, socket, threading, contextvars, socketserver
+from Codebase import config, utils, models, generation, prompt_builder, telemetry
+from Codebase.scheduler import BatchingScheduler
+
+_SPEC_KEY = "__spec__"
+
+
+def _send(wfile, message: dict):
+    wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+    wfile.flush()
+
+
+def _check_owner(socket_path: str):
+    """Refuse a socket another user created: requests carry resume text."""
+    if os.stat(socket_path).st_uid != os.getuid():
+        raise PermissionError(f"Model server socket {socket_path} is owned by another user")
+
+
+def _private_dir(folder: str):
+    """Create folder owner-only (0700); an existing one must already be ours and closed to others."""
+    os.makedirs(folder, mode=0o700, exist_ok=True)
+    info = os.stat(folder)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(
+            f"Model server socket folder {folder} must be owned by this user with mode 0700 "
+            f"(found uid {info.st_uid}, mode {oct(info.st_mode & 0o777)})"
+        )
+
+
+def _connect(socket_path: str, timeout: float = None):
+    _check_owner(socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(message: dict, socket_path: str = None, timeout: float = None, on_chunk=None):
+    """Send one request to the server and return its result (chunks go to on_chunk)."""
+    with _connect(socket_path or config.MODEL_SERVER_SOCKET, timeout) as sock:
+        sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as rfile:
+            for line in rfile:
+                reply = json.loads(line)
+                if "chunk" in reply:
+                    if on_chunk is not None:
+                        on_chunk(reply["chunk"])
+                elif "error" in reply:
+                    raise RuntimeError(f"Model server: {reply['error']}")
+                else:
+                    return reply["result"]
+    raise ConnectionError("Model server closed the connection without a result")
+
+
+# ----------------------------------------------------------
+# 🖥️ Server
+# ----------------------------------------------------------
+class ModelServer:
+    """
+    Serves already-built pipelines by name ({"gemma": (pipe, model_name), ...}).
+    Each model sits behind a BatchingScheduler, so requests from concurrent
+    clients are batched together exactly like concurrent UI users.
+    """
+
+    def __init__(self, pipes: dict, socket_path: str = None):
+        self.socket_path = socket_path or config.MODEL_SERVER_SOCKET
+        self.models = {
+            key: {"name": name, "scheduler": BatchingScheduler(pipe, f"server:{key}")}
+            for key, (pipe, name) in pipes.items()
+        }
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "in_flight": 0, "errors": 0,
+                       "tokens_served": {key: 0 for key in pipes}}
+        self._server = None
+
+    # ------------------------------------------------------
+    # 🔁 Lifecycle
+    # ------------------------------------------------------
+    def serve_forever(self):
+        """Bind the socket (owner-only, in an owner-only folder) and serve until stop() or Ctrl+C."""
+        _private_dir(os.path.dirname(os.path.abspath(self.socket_path)))
+        if os.path.exists(self.socket_path):
+            if _alive(self.socket_path):
+                raise RuntimeError(f"A model server is already running at {self.socket_path}")
+            os.remove(self.socket_path)  # stale socket from a server that did not shut down cleanly
+
+        server_ref = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server_ref._handle(self.rfile, self.wfile)
+
+        old_umask = os.umask(0o077)  # the socket is created owner-only, with no window before a chmod
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.daemon_threads = True
+        utils.log_status(f"🔌 Model server ready at {self.socket_path} ({', '.join(self.models)})")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            utils.log_status("🔌 Model server stopped")
+
+    def stop(self):
+        # shutdown() waits for serve_forever to return, so it cannot run on a handler thread directly
+        threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    # ------------------------------------------------------
+    # 📨 Requests
+    # ------------------------------------------------------
+    def _handle(self, rfile, wfile):
+        line = rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+            op = message.get("op")
+            if op == "generate":
+                self._generate(message, wfile)
+            elif op == "stats":
+                _send(wfile, {"result": self.stats()})
+            elif op == "stop":
+                _send(wfile, {"result": "stopping"})
+                self.stop()
+            else:
+                raise ValueError(f"Unknown op {op!r}")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            utils.log_status(f"⚠️ Model server request failed: {e}")
+            try:
+                _send(wfile, {"error": f"{type(e).__name__}: {e}"})
+            except OSError:
+                pass
+
+    def _generate(self, message: dict, wfile):
+        key = message["model"]
+        if key not in self.models:
+            raise ValueError(f"Unknown model {key!r}; serving {', '.join(self.models)}")
+        scheduler = self.models[key]["scheduler"]
+        tokenizer = prompt_builder.get_tokenizer(scheduler)
+        kwargs = {k: generation.from_spec(v[_SPEC_KEY], tokenizer) if isinstance(v, dict) and _SPEC_KEY in v else v
+                  for k, v in message.get("kwargs", {}).items()}
+        prompts = message["prompts"]
+
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["in_flight"] += 1
+        telemetry.inc("model_server_requests_total", model=key)
+        try:
+            with generation.assisted_tracking(scheduler, kwargs) as record_assisted:
+                if message.get("stream"):
+                    result = self._stream(scheduler, prompts, kwargs, wfile)
+                else:
+                    result = scheduler(prompts, **kwargs)
+                if isinstance(prompts, str):
+                    record_assisted(utils.generated_text(result))
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+
+        served = _tokens_served(prompts, result, tokenizer)
+        with self._lock:
+            self._stats["tokens_served"][key] += served
+        telemetry.inc("model_server_tokens_served_total", served, model=key)
+        _send(wfile, {"result": result})
+
+    @staticmethod
+    def _stream(scheduler, prompt: str, kwargs: dict, wfile):
+        """Run one streamed generation, forwarding text chunks as they are produced."""
+        from transformers import TextIteratorStreamer  # heavy import, deferred
+
+        streamer = TextIteratorStreamer(scheduler.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        outcome = {}
+
+        def generate():
+            try:
+                outcome["result"] = scheduler(prompt, streamer=streamer, **kwargs)
+            except BaseException as e:
+                outcome["error"] = e
+                streamer.end()
+
+        # The caller's context carries the assisted-decoding counters for this call
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(generate,),
+                                  name="model-server-stream", daemon=True)
+        thread.start()
+        for chunk in streamer:
+            if chunk:
+                _send(wfile, {"chunk": chunk})
+        thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    # ------------------------------------------------------
+    # 📈 Health / stats
+    # ------------------------------------------------------
+    def stats(self) -> dict:
+        """Uptime, queued and in-flight requests, tokens served and per-model batching stats."""
+        with self._lock:
+            stats = json.loads(json.dumps(self._stats))
+        per_model = {}
+        for key, entry in self.models.items():
+            scheduler_stats = entry["scheduler"].stats()
+            per_model[key] = {
+                "name": entry["name"],
+                "tokens_served": stats["tokens_served"][key],
+                "queue_depth": scheduler_stats["queue_depth"],
+                "batches": scheduler_stats["batches"],
+                "avg_batch_size": scheduler_stats["avg_batch_size"],
+            }
+        return {
+            "pid": os.getpid(),
+            "socket": self.socket_path,
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests_total": stats["requests"],
+            "requests_in_flight": stats["in_flight"],
+            "queued_requests": sum(m["queue_depth"] for m in per_model.values()),
+            "errors": stats["errors"],
+            "tokens_served": sum(stats["tokens_served"].values()),
+            "models": per_model,
+            "early_stop": {kind: generation.stop_stats(kind) for kind in ("json", "sections")},
+            "assisted": generation.assisted_stats(),
+            **self._memory_stats(),
+        }
+
+    def _memory_stats(self) -> dict:
+        from Codebase.model_manager import ManagedPipeline
+
+        for entry in self.models.values():
+            pipe = entry["scheduler"].pipe
+            if isinstance(pipe, ManagedPipeline):
+                return {"memory": pipe.manager.stats()}
+        return {}
+
+
+def _tokens_served(prompts, result, tokenizer) -> int:
+    """Generated tokens in a pipeline result (echoed prompts are not counted)."""
+    if isinstance(prompts, str):
+        prompts, result = [prompts], [result]
+    total = 0
+    for prompt, output in zip(prompts, result):
+        text = utils.generated_text(output)
+        new_text = text[len(prompt):] if text.startswith(prompt) else text
+        total += prompt_builder.count_tokens(new_text, tokenizer)
+    return total
+
+
+def _alive(socket_path: str) -> bool:
+    try:
+        request({"op": "stats"}, socket_path, timeout=config.MODEL_SERVER_CONNECT_TIMEOUT)
+        return True
+    except (OSError, RuntimeError, ValueError):
+        return False
+
+
+def serve(hf_token: str, profile: str = None, socket_path: str = None):
+    """Load both stage models with an inference profile and serve them until stopped."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("The model server needs Unix domain sockets (not available on this platform)")
+    profile = profile or config.INFERENCE_PROFILE
+    utils.log_status(f"⚙️ Inference profile: {profile} {config.INFERENCE_PROFILES[profile]}")
+    gemma_pipe, llama_pipe = models.stage_pipelines(hf_token, profile)
+    gemma_pipe.load()
+    llama_pipe.load()  # under a memory budget this may offload Gemma again
+    ModelServer(
+        {"gemma": (gemma_pipe, config.GEMMA_MODEL_NAME), "llama": (llama_pipe, config.LLAMA_MODEL_NAME)},
+        socket_path,
+    ).serve_forever()
+
+
+# ----------------------------------------------------------
+# 📞 Client
+# ----------------------------------------------------------
+class RemotePipeline:
+    """
+    Pipeline-compatible client for one served model. The tokenizer (for prompt
+    budgets and stopping criteria) is loaded locally; the model is not. If the
+    server goes away, calls fall back to the in-process LazyPipeline for good.
+    """
+
+    def __init__(self, label: str, model: str, model_name: str, hf_token: str, fallback, socket_path: str = None):
+        self.label = label
+        self.model = model
+        self.model_name = model_name
+        self.socket_path = socket_path or config.MODEL_SERVER_SOCKET
+        self._hf_token = hf_token
+        self._fallback = fallback
+        self._detached = False
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    remote = True  # generation.assisted_generation_kwargs sends a draft model reference instead of loading it
+
+    # LazyPipeline compatibility: the served model is already loaded
+    @property
+    def loaded(self) -> bool:
+        return True
+
+    def load(self):
+        return self._fallback.load() if self._detached else self
+
+    def warm_up(self):
+        return None
+
+    @property
+    def tokenizer(self):
+        if self._detached:
+            return self._fallback.tokenizer
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    from transformers import AutoTokenizer  # heavy import, deferred
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, token=self._hf_token)
+        return self._tokenizer
+
+    def __call__(self, prompts, streamer=None, **kwargs):
+        if self._detached:
+            return self._fallback(prompts, streamer=streamer, **kwargs) if streamer else self._fallback(prompts, **kwargs)
+
+        message = {"op": "generate", "model": self.model, "prompts": prompts,
+                   "kwargs": {k: _encode_kwarg(k, v) for k, v in kwargs.items()}, "stream": streamer is not None}
+        chunks = []
+
+        def on_chunk(text):
+            chunks.append(text)
+            streamer.on_finalized_text(text)
+
+        try:
+            result = request(message, self.socket_path, on_chunk=on_chunk if streamer is not None else None)
+        except (ConnectionError, FileNotFoundError, PermissionError) as e:
+            if chunks:
+                raise  # part of the answer was already streamed; do not start over
+            utils.log_status(f"⚠️ Model server unavailable ({e}); loading {self.label} in-process.")
+            self._detached = True
+            return self(prompts, streamer=streamer, **kwargs)
+        if streamer is not None:
+            streamer.end()
+        return result
+
+
+def _encode_kwarg(name: str, value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    spec = getattr(value, "spec", None)
+    if spec is None:
+        raise TypeError(f"Generation argument {name!r} cannot be sent to the model server")
+    return {_SPEC_KEY: spec}
+
+
+def server_stats(socket_path: str = None, timeout: float = None):
+    """Stats from a running server, or None if none answers."""
+    try:
+        return request({"op": "stats"}, socket_path, timeout=timeout or config.MODEL_SERVER_CONNECT_TIMEOUT)
+    except (OSError, RuntimeError, ValueError):
+        return None
+
+
+def stop_server(socket_path: str = None) -> bool:
+    """Ask a running server to shut down; False if none answers."""
+    try:
+        request({"op": "stop"}, socket_path, timeout=config.MODEL_SERVER_CONNECT_TIMEOUT)
+        return True
+    except (OSError, RuntimeError, ValueError):
+        return False
+
+
+def attach(hf_token: str, gemma_fallback, llama_fallback, socket_path: str = None):
+    """
+    (gemma_pipe, llama_pipe) served by a running model server, or None if none answers.
+    The fallbacks (LazyPipelines) take over if the server disappears later.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = socket_path or config.MODEL_SERVER_SOCKET
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        _check_owner(socket_path)
+    except PermissionError as e:
+        utils.log_status(f"⚠️ Not attaching: {e}")
+        return None
+    stats = server_stats(socket_path)
+    if stats is None or not {"gemma", "llama"} <= set(stats["models"]):
+        return None
+
+    names = {key: stats["models"][key]["name"] for key in ("gemma", "llama")}
+    utils.log_status(
+        f"🔌 Attached to model server (pid {stats['pid']}, up {stats['uptime_s']:.0f}s): "
+        f"{names['gemma']} / {names['llama']} — the server's inference profile applies"
+    )
+    return (
+        RemotePipeline(gemma_fallback.label, "gemma", names["gemma"], hf_token, gemma_fallback, socket_path),
+        RemotePipeline(llama_fallback.label, "llama", names["llama"], hf_token, llama_fallback, socket_path),
+    )
@@ -0,0 +1,161 @@
+# ==========================================================
+# 🧠 models.py
+# Lazy, thread-safe loading of the Gemma and LLaMA pipelines
+# ==========================================================
+
+import os, glob, json, threading, time, warnings, importlib.util
+from Codebase import config, utils
+
+
+def get_profile(name: str = None) -> dict:
+    """Return the named inference profile from config (default: config.INFERENCE_PROFILE)."""
+    name = name or config.INFERENCE_PROFILE
+    if name not in config.INFERENCE_PROFILES:
+        raise ValueError(f"Unknown inference profile '{name}'. Choose from: {', '.join(config.INFERENCE_PROFILES)}")
+    profile = config.INFERENCE_PROFILES[name]
+    if profile.get("quantize_int8") and profile.get("dtype", "float32") != "float32":
+        raise ValueError(f"Inference profile '{name}': int8 quantization needs float32 weights.")
+    return profile
+
+
+def build_pipeline(task: str, model_name: str, hf_token: str, profile: str = None):
+    """Build a transformers pipeline ready for batched generation, using an inference profile."""
+    import torch  # heavy imports, deferred until a model is needed
+    from transformers import pipeline
+
+    settings = get_profile(profile)
+    if settings.get("threads"):
+        torch.set_num_threads(settings["threads"])
+
+    model_kwargs = {}
+    if settings.get("low_cpu_mem_usage"):
+        if importlib.util.find_spec("accelerate"):
+            model_kwargs["low_cpu_mem_usage"] = True
+        else:
+            utils.log_status("⚠️ low_cpu_mem_usage needs `accelerate`; loading weights normally.")
+
+    pipe = pipeline(
+        task, model=model_name, token=hf_token, device=settings.get("device", "cpu"),
+        torch_dtype=getattr(torch, settings.get("dtype", "float32")), model_kwargs=model_kwargs,
+    )
+    if settings.get("quantize_int8"):
+        quantize_int8(pipe.model)
+    enable_batching(pipe)
+    return pipe
+
+
+_DTYPE_BYTES = {"float32": 4, "float16": 2, "bfloat16": 2}
+
+
+def estimate_weights_mb(model_name: str, profile: str = None):
+    """
+    Expected in-memory weights size (MB) from the model files on disk (a local folder
+    or the Hugging Face cache), scaled to the profile's dtype. None if not available offline.
+    """
+    folder = model_name
+    if not os.path.isdir(folder):
+        try:
+            from huggingface_hub import snapshot_download
+            folder = snapshot_download(model_name, local_files_only=True)
+        except Exception:
+            return None
+    files = glob.glob(os.path.join(folder, "*.safetensors")) or glob.glob(os.path.join(folder, "*.bin"))
+    if not files:
+        return None
+    try:
+        with open(os.path.join(folder, "config.json"), "r", encoding="utf-8") as f:
+            stored = json.load(f).get("torch_dtype") or "float32"
+    except (OSError, ValueError):
+        stored = "float32"
+    ratio = _DTYPE_BYTES.get(get_profile(profile).get("dtype", "float32"), 4) / _DTYPE_BYTES.get(stored, 4)
+    return sum(os.path.getsize(f) for f in files) * ratio / (1024 * 1024)
+
+
+def stage_pipelines(hf_token: str, profile: str = None, gemma_name: str = None, llama_name: str = None):
+    """
+    Lazy (gemma_pipe, llama_pipe) for Stage 1 extraction and Stage 3 tailoring,
+    under a shared ModelManager when config.MODEL_MEMORY_BUDGET_MB is set.
+    """
+    gemma_name = gemma_name or config.GEMMA_MODEL_NAME
+    llama_name = llama_name or config.LLAMA_MODEL_NAME
+    specs = [
+        ("Gemma-2B-Instruct model for resume extraction", "text2text-generation", gemma_name),
+        ("LLaMA model for resume tailoring", "text-generation", llama_name),
+    ]
+    loaders = [(label, name, lambda task=task, name=name: build_pipeline(task, name, hf_token, profile))
+               for label, task, name in specs]
+
+    if config.MODEL_MEMORY_BUDGET_MB is None:
+        return tuple(LazyPipeline(label, loader) for label, _, loader in loaders)
+
+    from Codebase.model_manager import ModelManager
+    manager = ModelManager(config.MODEL_MEMORY_BUDGET_MB)
+    return tuple(
+        manager.pipeline(label, loader, config.MODEL_SIZE_HINTS_MB.get(name) or estimate_weights_mb(name, profile))
+        for label, name, loader in loaders
+    )
+
+
+def quantize_int8(model):
+    """Dynamically quantize the model's nn.Linear layers to int8 in place (CPU only)."""
+    import torch
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # eager-mode quantization deprecation notices
+        torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def enable_batching(pipe):
+    """Give decoder-only tokenizers a pad token and left padding so prompts can be batched."""
+    tokenizer = pipe.tokenizer
+    if tokenizer.pad_token_id is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+
+
+class LazyPipeline:
+    """
+    Callable stand-in for a transformers pipeline that loads the model on first use.
+    Attribute access (e.g. .tokenizer) and calls are forwarded to the loaded pipeline.
+    """
+
+    def __init__(self, label: str, loader):
+        self.label = label
+        self._loader = loader
+        self._pipe = None
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._pipe is not None
+
+    def load(self):
+        """Load the pipeline once (thread-safe) and return it."""
+        if self._pipe is None:
+            with self._lock:
+                if self._pipe is None:
+                    utils.log_status(f"🔄 Loading {self.label}...")
+                    start = time.perf_counter()
+                    self._pipe = self._loader()
+                    utils.log_status(f"✅ {self.label} loaded in {time.perf_counter() - start:.1f}s")
+        return self._pipe
+
+    def warm_up(self):
+        """Start loading in a background daemon thread; returns immediately."""
+        if self._pipe is None and self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(
+                target=self.load, name=f"warm-up:{self.label}", daemon=True
+            )
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        # Only reached for attributes not defined on the wrapper itself
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
@@ -0,0 +1,188 @@
+# ==========================================================
+# 🏭 orchestrator.py
+# Pipelined Stage 1 → Stage 2 → Stage 3 execution over a job queue
+# ==========================================================
+
+import os, time, asyncio, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from Codebase import config, utils, artifact_store, stage1_resume, stage2_jd, stage3_tailor
+
+_DONE = object()
+
+
+class StageStats:
+    """Per-stage counters used to find where the pipeline stalls."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0      # seconds spent doing work
+        self.starved = 0.0   # seconds waiting for input from the previous stage
+        self.blocked = 0.0   # seconds waiting for room in the next stage's queue
+
+    def as_dict(self, wall: float) -> dict:
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_s": round(self.busy, 3),
+            "utilisation": round(self.busy / wall, 3) if wall else 0.0,
+            "starved_s": round(self.starved, 3),
+            "blocked_s": round(self.blocked, 3),
+        }
+
+
+def _read_jd(jd_input) -> str:
+    if isinstance(jd_input, str) and os.path.exists(jd_input):
+        return utils.read_file_text(jd_input)
+    return jd_input
+
+
+# ----------------------------------------------------------
+# 🔀 Single request: Stage 1 and Stage 2 side by side
+# ----------------------------------------------------------
+def run_stage1_and_stage2(resume_input, jd_text: str, gemma_pipe):
+    """
+    Run Stage 2 (CPU regex) in a helper thread while Stage 1 (Gemma) runs.
+    Returns ((candidate_data, candidate_json), (jd_data, jd_json)).
+    """
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="stage2") as pool:
+        jd_future = pool.submit(contextvars.copy_context().run, stage2_jd.extract_jd_data_rulebased, jd_text)
+        stage1_result = stage1_resume.extract_resume_data(resume_input, gemma_pipe)
+        return stage1_result, jd_future.result()
+
+
+# ----------------------------------------------------------
+# 🏭 Job queue: all stages overlapped
+# ----------------------------------------------------------
+async def _stage(stats, fn, executor, inbox, outbox):
+    """Generic worker: take an item, run fn in the stage's executor, pass it on."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = time.perf_counter()
+        item = await inbox.get()
+        stats.starved += time.perf_counter() - t0
+        if item is _DONE:
+            await outbox.put(_DONE)
+            return
+
+        if "error" not in item:
+            t0 = time.perf_counter()
+            try:
+                await loop.run_in_executor(executor, contextvars.copy_context().run, fn, item)
+            except Exception as e:
+                item["error"] = f"{stats.name}: {e}"
+            stats.busy += time.perf_counter() - t0
+            stats.items += 1
+
+        t0 = time.perf_counter()
+        await outbox.put(item)
+        stats.blocked += time.perf_counter() - t0
+
+
+async def _join(stats, left, right, outbox):
+    """Pair Stage 1 and Stage 2 outputs (both arrive in job order)."""
+    while True:
+        t0 = time.perf_counter()
+        a, b = await left.get(), await right.get()
+        stats.starved += time.perf_counter() - t0
+        if a is _DONE:
+            await outbox.put(_DONE)
+            return
+        a["jd_data"] = b.get("jd_data")
+        if "error" in b:
+            a.setdefault("error", b["error"])
+        stats.items += 1
+        t0 = time.perf_counter()
+        await outbox.put(a)
+        stats.blocked += time.perf_counter() - t0
+
+
+async def run_pipeline_async(jobs, gemma_pipe, llama_pipe, queue_size: int = config.PIPELINE_QUEUE_SIZE):
+    """
+    Process (resume_input, jd_input, output_pdf_path) jobs with every stage overlapped.
+
+    Stage 1 (Gemma), Stage 2 (JD rules), Stage 3 generation (LLaMA) and Stage 3
+    rendering (clean + PDF + ATS) each run on their own single-worker executor,
+    connected by bounded queues. While LLaMA generates for job N, Gemma can
+    extract job N+1 and ReportLab can render job N-1. Each model call handles
+    one job; batch sizes (--stage1_batch_size / --stage3_batch_size) do not apply.
+
+    Returns
+    -------
+    tuple(list[dict], list[dict])
+        (results in job order, per-stage stats). Each result has index, job,
+        and either tailored_text / pdf_path / ats_report or error.
+    """
+    names = ("stage1_gemma", "stage2_jd", "join", "stage3_llama", "stage3_render")
+    stats = {name: StageStats(name) for name in names}
+    queues = {name: asyncio.Queue(maxsize=queue_size) for name in
+              ("to_stage1", "to_stage2", "stage1_out", "stage2_out", "to_llama", "to_render", "results")}
+    executors = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=name) for name in names if name != "join"}
+
+    def extract(item):
+        resume_input = item["job"][0]
+        item["candidate_data"] = stage1_resume.extract_resume_data(resume_input, gemma_pipe, item["request_id"])[0]
+
+    def parse_jd(item):
+        item["jd_data"] = stage2_jd.parse_jd_text(_read_jd(item["job"][1]))
+
+    def generate(item):
+        item["raw"] = stage3_tailor.generate_tailored_text(item["candidate_data"], item["jd_data"], llama_pipe)
+
+    def render(item):
+        pdf_path = item["job"][2] if len(item["job"]) > 2 else None
+        item["tailored_text"], item["pdf_path"], item["ats_report"] = stage3_tailor.finalize_tailored_output(
+            item["candidate_data"], item["jd_data"], item.pop("raw"), pdf_path, item["request_id"]
+        )
+
+    async def feed():
+        for index, job in enumerate(jobs):
+            # Jobs share the caller's trace; each gets its own artifact folder
+            request_id = artifact_store.item_request_id(index, job[0])
+            await queues["to_stage1"].put({"index": index, "job": job, "request_id": request_id})
+            await queues["to_stage2"].put({"index": index, "job": job, "request_id": request_id})
+        await queues["to_stage1"].put(_DONE)
+        await queues["to_stage2"].put(_DONE)
+
+    results = []
+
+    async def collect():
+        while (item := await queues["results"].get()) is not _DONE:
+            results.append(item)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            feed(),
+            _stage(stats["stage1_gemma"], extract, executors["stage1_gemma"], queues["to_stage1"], queues["stage1_out"]),
+            _stage(stats["stage2_jd"], parse_jd, executors["stage2_jd"], queues["to_stage2"], queues["stage2_out"]),
+            _join(stats["join"], queues["stage1_out"], queues["stage2_out"], queues["to_llama"]),
+            _stage(stats["stage3_llama"], generate, executors["stage3_llama"], queues["to_llama"], queues["to_render"]),
+            _stage(stats["stage3_render"], render, executors["stage3_render"], queues["to_render"], queues["results"]),
+            collect(),
+        )
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=False)
+    wall = time.perf_counter() - start
+
+    stage_stats = [stats[name].as_dict(wall) for name in names if name != "join"]
+    return sorted(results, key=lambda r: r["index"]), stage_stats
+
+
+def run_pipelined(jobs, gemma_pipe, llama_pipe, queue_size: int = config.PIPELINE_QUEUE_SIZE):
+    """Synchronous wrapper around run_pipeline_async that also logs the stage table."""
+    start = time.perf_counter()
+    results, stage_stats = asyncio.run(run_pipeline_async(jobs, gemma_pipe, llama_pipe, queue_size))
+    log_stage_stats(stage_stats, time.perf_counter() - start)
+    return results, stage_stats
+
+
+def log_stage_stats(stage_stats, wall: float):
+    """Print per-stage utilisation; the busiest stage is the bottleneck."""
+    utils.log_status(f"🏭 Pipeline finished in {wall:.1f}s")
+    for s in stage_stats:
+        utils.log_status(
+            f"   {s['stage']:<14} items {s['items']:>5} | busy {s['busy_s']:8.2f}s | "
+            f"util {s['utilisation'] * 100:5.1f}% | starved {s['starved_s']:8.2f}s | blocked {s['blocked_s']:8.2f}s"
+        )
@@ -0,0 +1,170 @@
+# ==========================================================
+# ✂️ prompt_builder.py
+# Compact, token-budgeted prompt inputs for Stage 1 and Stage 3
+# ==========================================================
+
+import re, json
+from Codebase import utils, telemetry
+
+# Field priority, highest first. Trimming starts from the other end:
+# unlisted fields go first, then these in reverse order.
+CANDIDATE_PRIORITY = ("name", "email", "phone", "location", "skills", "experience", "education", "projects")
+JD_PRIORITY = (
+    "job_title", "must_have_skills", "responsibilities", "experience_required",
+    "education_required", "nice_to_have_skills", "location",
+)
+
+# Unparsed Stage 1 output is kept only if there is room left for it
+_LOWEST_PRIORITY = ("raw_output",)
+
+_EMPTY_STRINGS = {"", "null", "none", "n/a"}
+_WHITESPACE_RUN = re.compile(r"(\s+)")
+
+
+# ----------------------------------------------------------
+# 🔢 Token counting
+# ----------------------------------------------------------
+def get_tokenizer(pipe):
+    """Return the pipeline's tokenizer, or None for pipelines without one."""
+    return getattr(pipe, "tokenizer", None)
+
+
+def count_tokens(text: str, tokenizer=None) -> int:
+    """Count tokens with the model tokenizer (≈4 characters per token without one)."""
+    if tokenizer is None:
+        return (len(text) + 3) // 4
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def _log_compaction(label: str, before: int, after: int):
+    utils.log_status(f"✂️ {label}: {before} → {after} tokens")
+    telemetry.observe("prompt_input_tokens", after, input=label)
+
+
+def _largest_fitting(n_max: int, fits) -> int:
+    """Largest n in [0, n_max] with fits(n) True, for monotone fits (fits(0) assumed)."""
+    lo, hi = 0, n_max
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+# ----------------------------------------------------------
+# 🧾 Resume text (Stage 1)
+# ----------------------------------------------------------
+def normalize_text(text: str) -> str:
+    """Collapse runs of spaces/tabs, strip each line and drop repeated blank lines."""
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def fit_text(text: str, budget: int, tokenizer=None, label: str = "Prompt text") -> str:
+    """
+    Normalize whitespace and keep the longest leading part of text within budget tokens.
+    Cuts fall on whitespace so no word is split.
+    """
+    before = count_tokens(text, tokenizer)
+    text = normalize_text(text)
+    after = count_tokens(text, tokenizer)
+
+    if budget and after > budget:
+        pieces = _WHITESPACE_RUN.split(text)
+        n = _largest_fitting(len(pieces), lambda n: count_tokens("".join(pieces[:n]), tokenizer) <= budget)
+        text = "".join(pieces[:n]).rstrip()
+        after = count_tokens(text, tokenizer)
+
+    _log_compaction(label, before, after)
+    return text
+
+
+# ----------------------------------------------------------
+# 🧱 Structured data (Stage 3)
+# ----------------------------------------------------------
+def compact(value):
+    """Recursively drop None, empty and placeholder values; collapse string whitespace."""
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            item = compact(item)
+            if not _is_empty(item):
+                out[key] = item
+        return out
+    if isinstance(value, list):
+        return [item for item in map(compact, value) if not _is_empty(item)]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def _is_empty(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() in _EMPTY_STRINGS
+    return value is None or value == [] or value == {}
+
+
+def dumps_compact(data) -> str:
+    """Serialize without pretty-print whitespace."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _trim_order(data: dict, priority) -> list:
+    """Keys of data, lowest priority first."""
+    def rank(key):
+        if key in _LOWEST_PRIORITY:
+            return -1
+        if key in priority:
+            return len(priority) - priority.index(key)
+        return 0
+    return sorted(data, key=rank)
+
+
+def fit_json(data: dict, priority, budget: int, tokenizer=None, label: str = "Prompt JSON") -> str:
+    """
+    Compact data and serialize it within budget tokens.
+
+    Fields are trimmed lowest priority first: lists lose trailing items and
+    strings trailing words, and a field is dropped once nothing of it fits.
+    Higher-priority fields are only touched when dropping the lower ones is
+    not enough.
+    """
+    if not isinstance(data, dict):
+        return dumps_compact(data)
+
+    before = count_tokens(json.dumps(data, indent=2), tokenizer)
+    data = compact(data)
+    text = dumps_compact(data)
+
+    if budget and count_tokens(text, tokenizer) > budget:
+        fits = lambda: count_tokens(dumps_compact(data), tokenizer) <= budget
+        for key in _trim_order(data, priority):
+            value = data[key]
+            if isinstance(value, list):
+                shrink = lambda n: value[:n]
+                size = len(value)
+            elif isinstance(value, str):
+                words = value.split(" ")
+                shrink = lambda n: " ".join(words[:n])
+                size = len(words)
+            else:
+                shrink = lambda n: value
+                size = 1
+
+            def fits_with(n):
+                data[key] = shrink(n)
+                return fits()
+
+            n = _largest_fitting(size, fits_with)
+            if n:
+                data[key] = shrink(n)
+                break
+            del data[key]
+            if fits():
+                break
+        text = dumps_compact(data)
+
+    _log_compaction(label, before, count_tokens(text, tokenizer))
+    return text
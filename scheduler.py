@@ -0,0 +1,157 @@
+# ==========================================================
+# 🚦 scheduler.py
+# Dynamic request batching in front of a shared model pipeline
+# ==========================================================
+
+import time, queue, threading
+from concurrent.futures import Future
+from Codebase import config, utils
+
+
+# Call arguments that tie a request to one caller or that transformers cannot batch
+_UNBATCHABLE_KWARGS = ("streamer", "assistant_model")
+
+
+class _Request:
+    __slots__ = ("prompt", "kwargs", "key", "future", "enqueued")
+
+    def __init__(self, prompt, kwargs):
+        self.prompt = prompt
+        self.kwargs = kwargs
+        self.key = _kwargs_key(kwargs)
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+def _kwargs_key(kwargs: dict):
+    """
+    Requests can share a batch only if their generation arguments are identical.
+    Objects that only keep per-row state (e.g. JSON stopping criteria) declare a
+    batch_key and match on it instead of on identity.
+    """
+    return tuple(sorted(
+        (k, v if isinstance(v, (str, int, float, bool, type(None))) else getattr(v, "batch_key", None) or id(v))
+        for k, v in kwargs.items()
+    ))
+
+
+class BatchingScheduler:
+    """
+    Pipeline-compatible front for one model shared by concurrent callers.
+
+    Calls are queued; a worker thread collects requests with identical
+    generation arguments for up to ``max_wait_ms`` (or ``max_batch_size``
+    requests), runs them as one batched pipeline call and routes each output
+    back to its caller. Calls with per-caller arguments (e.g. a streamer) run
+    directly, serialized with the batches on the same model lock.
+    """
+
+    def __init__(self, pipe, label: str,
+                 max_batch_size: int = config.SCHEDULER_MAX_BATCH_SIZE,
+                 max_wait_ms: float = config.SCHEDULER_MAX_WAIT_MS):
+        self.pipe = pipe
+        self.label = label
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue = queue.Queue()
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "last_batch_size": 0,
+                       "total_wait_ms": 0.0, "max_wait_ms_observed": 0.0}
+        self._worker = threading.Thread(target=self._run, name=f"scheduler:{label}", daemon=True)
+        self._worker.start()
+
+    # ----------------------------------------------------------
+    # 📞 Pipeline-compatible call
+    # ----------------------------------------------------------
+    def __call__(self, prompts, **kwargs):
+        if any(k in kwargs for k in _UNBATCHABLE_KWARGS):
+            with self._model_lock:
+                return self.pipe(prompts, **kwargs)
+
+        kwargs.pop("batch_size", None)  # the scheduler decides the batch size
+        single = isinstance(prompts, str)
+        requests = [_Request(p, kwargs) for p in ([prompts] if single else prompts)]
+        for request in requests:
+            self._queue.put(request)
+
+        results = [request.future.result() for request in requests]
+        return results[0] if single else results
+
+    def __getattr__(self, attr):
+        # Forward .tokenizer, .model, etc. to the wrapped pipeline
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.pipe, attr)
+
+    # ----------------------------------------------------------
+    # 🔁 Worker loop
+    # ----------------------------------------------------------
+    def _run(self):
+        held = []  # requests collected but not compatible with the last batch
+        while True:
+            first = held.pop(0) if held else self._queue.get()
+            batch, deadline = [first], first.enqueued + self.max_wait_ms / 1000
+
+            # Compatible requests already held back join first
+            for request in list(held):
+                if len(batch) < self.max_batch_size and request.key == first.key:
+                    batch.append(request)
+                    held.remove(request)
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    # Past the window, still take whatever is already queued
+                    request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                (batch if request.key == first.key else held).append(request)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        waits = [(started - r.enqueued) * 1000 for r in batch]
+        try:
+            with self._model_lock:
+                outputs = self.pipe([r.prompt for r in batch], batch_size=len(batch), **batch[0].kwargs)
+        except BaseException as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        for request, output in zip(batch, outputs):
+            # Match the single-prompt pipeline shape: a list of generation dicts
+            request.future.set_result(output if isinstance(output, list) else [output])
+
+        with self._stats_lock:
+            self._stats["requests"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["total_wait_ms"] += sum(waits)
+            self._stats["max_wait_ms_observed"] = max(self._stats["max_wait_ms_observed"], max(waits))
+
+        utils.log_status(
+            f"🚦 {self.label}: batch of {len(batch)} | waited {max(waits):.0f} ms | "
+            f"queue depth {self._queue.qsize()} | run {time.perf_counter() - started:.2f}s"
+        )
+
+    # ----------------------------------------------------------
+    # 📈 Tuning stats
+    # ----------------------------------------------------------
+    def stats(self) -> dict:
+        """Return queue depth, batch sizes and wait times for tuning the window."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches, requests = stats["batches"], stats["requests"]
+        stats.update({
+            "label": self.label,
+            "queue_depth": self._queue.qsize(),
+            "avg_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "avg_wait_ms": round(stats.pop("total_wait_ms") / requests, 1) if requests else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        })
+        return stats
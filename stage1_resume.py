@@ -2,43 +2,241 @@
 # 🧩 STAGE 1: Resume Extraction (Gemma-2B-Instruct)
 # ==========================================================
 
-import os, re, json
+import os, re, json, time
 from ast import literal_eval
-from Codebase import config, utils
+from Codebase import config, utils, prompt_builder, telemetry, generation, artifact_store
+from Codebase.cache import DiskLRUCache, content_key
 
+_cache = None
 
-def extract_resume_data(resume_input, gemma_pipe):
+
+def _get_cache():
+    """Return the shared Stage 1 cache, or None when caching is disabled."""
+    global _cache
+    if not config.STAGE1_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = DiskLRUCache(config.STAGE1_CACHE_PATH, config.STAGE1_CACHE_MAX_BYTES)
+    return _cache
+
+
+def _cache_key(resume_text: str) -> str:
+    """Key a resume by its whitespace-normalized text, model name and prompt version."""
+    normalized = " ".join(resume_text.split())
+    mode = "hybrid" if config.STAGE1_HYBRID else "llm"
+    return content_key(config.GEMMA_MODEL_NAME, config.STAGE1_PROMPT_VERSION, mode, normalized)
+
+
+def _log_cache(cache, event: str):
+    utils.log_status(f"🗃️ Stage 1 cache {event} (hits: {cache.hits} | misses: {cache.misses})")
+
+
+def _load_resume_text(resume_input) -> str:
+    """Return resume text from a file path (.txt/.pdf/.docx) or a raw string."""
+    if os.path.exists(resume_input):
+        return utils.read_file_text(resume_input)
+    return resume_input
+
+
+# ----------------------------------------------------------
+# 🔎 Rule-based pre-extraction (hybrid mode)
+# ----------------------------------------------------------
+FIELDS = ("name", "education", "skills", "experience", "projects", "location", "email", "phone")
+_LIST_FIELDS = ("education", "skills", "experience", "projects")
+_MAX_NEW_TOKENS = 700
+
+_SECTION_HEADERS = {
+    "skills": ("skills", "technical skills", "key skills", "core skills", "core competencies",
+               "skills & tools", "technologies", "tech stack"),
+    "experience": ("experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment"),
+    "projects": ("projects", "personal projects", "key projects", "academic projects"),
+    "education": ("education", "academic background", "education & training", "qualifications"),
+}
+_OTHER_HEADERS = ("summary", "professional summary", "profile", "objective", "certifications",
+                  "achievements", "awards", "languages", "interests", "contact", "references", "publications")
+_HEADER_LOOKUP = {name: section for section, names in _SECTION_HEADERS.items() for name in names}
+_HEADER_LOOKUP.update({name: "other" for name in _OTHER_HEADERS})
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"(?<![\w+])\+?\(?\d[\d\s().-]{7,}\d(?!\w)")
+_LABEL_RE = re.compile(r"^\s*(name|location|address|city)\s*[:\-]\s*(.+?)\s*$", re.I)
+_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z.'-]*(?:\s+[A-Za-z][A-Za-z.'-]*){1,3}$")
+_PLACE_RE = re.compile(r"^(?:[A-Za-z][A-Za-z .'-]*(?:,\s*[A-Za-z][A-Za-z .'-]*)+|remote|hybrid\b.*)$", re.I)
+_BULLET_RE = re.compile(r"^\s*(?:[-•*▪◦‣·]|\d+[.)])\s+")
+_CONTACT_SPLIT = re.compile(r"\s*[|•·]\s*|\s{3,}")
+_SKILL_SPLIT = re.compile(r"\s*[,;|•·\n]\s*")
+_SKILL_LABEL = re.compile(r"^[^:]{1,30}:\s*")
+
+
+def _header(line: str):
+    """Return (section, inline_text) when line is a section header, else None."""
+    head, _, rest = line.strip().strip("#*=_ ").partition(":")
+    section = _HEADER_LOOKUP.get(" ".join(head.lower().split()))
+    return (section, rest.strip()) if section else None
+
+
+def _split_sections(text: str):
+    """Split resume lines into the top (contact) block and known section bodies."""
+    top, sections, current = [], {}, None
+    for line in text.splitlines():
+        header = _header(line)
+        if header:
+            current, inline = header
+            sections.setdefault(current, [])
+            if inline:
+                sections[current].append(inline)
+        elif line.strip():
+            (sections[current] if current else top).append(line.strip())
+    return top, sections
+
+
+def _find_phone(text: str):
+    """First phone-like run with 9-15 digits (so date ranges are not mistaken for phones)."""
+    for match in _PHONE_RE.finditer(text):
+        digits = sum(ch.isdigit() for ch in match.group(0))
+        if 9 <= digits <= 15:
+            return " ".join(match.group(0).split())
+    return None
+
+
+def _find_location(top: list):
+    for line in top:
+        for part in _CONTACT_SPLIT.split(line):
+            part = part.strip()
+            if part and not _EMAIL_RE.search(part) and not _find_phone(part) and _PLACE_RE.match(part):
+                return part
+    return None
+
+
+def prefill_resume_fields(resume_text: str) -> dict:
     """
-    Extract structured information from a raw resume using Gemma-2B-Instruct.
+    Deterministically extract contact fields and section contents from resume text.
+    Only fields found are returned; list fields hold one string per entry.
+    """
+    top, sections = _split_sections(resume_text)
+    fields = {}
 
-    Parameters
-    ----------
-    resume_input : str
-        Either raw text (string) or file path to .txt/.pdf/.docx.
-    gemma_pipe : transformers pipeline
-        Pre-loaded Gemma inference pipeline.
+    labels = {}
+    for line in top:
+        match = _LABEL_RE.match(line)
+        if match:
+            labels.setdefault(match.group(1).lower(), match.group(2))
 
-    Returns
-    -------
-    tuple(dict, str)
-        (parsed_data, output_json_path)
+    name = labels.get("name") or next(
+        (line for line in top[:3] if _NAME_RE.match(line) and _header(line) is None), None
+    )
+    if name:
+        fields["name"] = name.title() if name.isupper() else name
+
+    email = _EMAIL_RE.search("\n".join(top)) or _EMAIL_RE.search(resume_text)
+    if email:
+        fields["email"] = email.group(0)
+    phone = _find_phone("\n".join(top)) or _find_phone(resume_text)
+    if phone:
+        fields["phone"] = phone
+
+    location = labels.get("location") or labels.get("city") or labels.get("address") or _find_location(top[1:])
+    if location:
+        fields["location"] = location
+
+    if sections.get("skills"):
+        skills = []
+        for item in _SKILL_SPLIT.split("\n".join(sections["skills"])):
+            item = _SKILL_LABEL.sub("", _BULLET_RE.sub("", item)).strip(" .")
+            if item and item not in skills:
+                skills.append(item)
+        if skills:
+            fields["skills"] = skills
+
+    for field in ("experience", "projects", "education"):
+        entries = [_BULLET_RE.sub("", line).strip() for line in sections.get(field, [])]
+        entries = [e for e in entries if e]
+        if entries:
+            fields[field] = entries
+
+    return fields
+
+
+def _plan_extraction(resume_text: str):
+    """
+    Return (prefilled, missing): fields found by rules and the fields Gemma must still
+    extract. missing is empty when rules are confident enough to skip Gemma entirely.
     """
+    if not config.STAGE1_HYBRID:
+        return {}, list(FIELDS)
 
-    # ----------------------------------------------------------
-    # 🧾 Step 1 – Load text from file or raw string
-    # ----------------------------------------------------------
-    if os.path.exists(resume_input):
-        resume_text = utils.read_file_text(resume_input)
+    prefilled = prefill_resume_fields(resume_text)
+    missing = [f for f in FIELDS if f not in prefilled]
+    confidence = len(prefilled) / len(FIELDS)
+    required = all(f in prefilled for f in config.STAGE1_REQUIRED_FIELDS)
+    if required and confidence >= config.STAGE1_SKIP_LLM_CONFIDENCE:
+        return prefilled, []
+    return prefilled, missing
+
+
+def _max_new_tokens(missing) -> int:
+    """Generation budget for the fields still asked of Gemma."""
+    if len(missing) == len(FIELDS):
+        return _MAX_NEW_TOKENS
+    budget = config.STAGE1_JSON_OVERHEAD_TOKENS + sum(config.STAGE1_FIELD_TOKEN_BUDGETS.get(f, 64) for f in missing)
+    return min(_MAX_NEW_TOKENS, budget)
+
+
+def _merge(prefilled: dict, parsed: dict) -> dict:
+    """Rule-extracted fields take precedence; Gemma fills the rest (schema order kept)."""
+    if not isinstance(parsed, dict):
+        parsed = {"raw_output": str(parsed)}
+    if not prefilled:
+        return parsed
+    merged = {**parsed, **prefilled}
+    ordered = {f: merged.get(f, [] if f in _LIST_FIELDS else None) for f in FIELDS}
+    ordered.update((k, v) for k, v in merged.items() if k not in ordered)
+    return ordered
+
+
+def _log_plan(prefilled: dict, missing: list):
+    if not config.STAGE1_HYBRID:
+        return
+    if missing:
+        utils.log_status(
+            f"🔎 Rules filled {len(prefilled)}/{len(FIELDS)} fields; asking Gemma for: {', '.join(missing)} "
+            f"(max_new_tokens={_max_new_tokens(missing)})"
+        )
     else:
-        resume_text = resume_input
+        utils.log_status(f"🔎 Rules filled {len(prefilled)}/{len(FIELDS)} fields; Gemma call skipped")
+    telemetry.inc("stage1_llm_calls_total", outcome="asked" if missing else "skipped")
 
-    # ----------------------------------------------------------
-    # 🤖 Step 2 – Prompt for the model
-    # ----------------------------------------------------------
-    prompt = f"""
+
+def _log_json_stop():
+    stats = generation.json_stop_stats()
+    if stats["stopped_early"]:
+        utils.log_status(
+            f"🛑 JSON early stop: {stats['stopped_early']}/{stats['requests']} requests, "
+            f"avg {stats['avg_tokens_saved']} tokens saved/request"
+        )
+
+
+def _field_list(fields) -> str:
+    if len(fields) == 1:
+        return fields[0]
+    if len(fields) == 2:
+        return f"{fields[0]} and {fields[1]}"
+    return ", ".join(fields[:-1]) + f", and {fields[-1]}"
+
+
+# ----------------------------------------------------------
+# 🧾 Prompt & output helpers
+# ----------------------------------------------------------
+def _build_prompt(resume_text: str, tokenizer=None, fields=FIELDS) -> str:
+    """Build the Gemma extraction prompt for one resume, trimmed to the token budget."""
+    resume_text = prompt_builder.fit_text(
+        resume_text, config.STAGE1_RESUME_TOKEN_BUDGET, tokenizer, label="Stage 1 resume"
+    )
+    return f"""
 You are an expert ATS resume parser.
 Your task is to read the following resume text and extract key information:
-name, education, skills, experience, projects, location, email, and phone.
+{_field_list(list(fields))}.
 
 Rules:
 - Respond ONLY with valid JSON.
@@ -50,14 +248,14 @@ Resume:
 {resume_text}
 """
 
-    # ----------------------------------------------------------
-    # 🚀 Step 3 – Generate structured output using Gemma
-    # ----------------------------------------------------------
-    result = gemma_pipe(prompt, max_new_tokens=700, do_sample=False)[0]["generated_text"]
 
-    # ----------------------------------------------------------
-    # 🧹 Step 4 – Extract JSON safely
-    # ----------------------------------------------------------
+def _cacheable(model_parsed: dict) -> bool:
+    """Only non-empty model parses are cached; empty ones and raw_output fallbacks are retried next time."""
+    return bool(model_parsed) and "raw_output" not in model_parsed
+
+
+def _parse_model_output(result: str) -> dict:
+    """Extract the JSON object from raw model output (falls back to raw_output)."""
     json_match = re.search(r"\{[\s\S]*\}", result)
     snippet = json_match.group(0) if json_match else "{}"
 
@@ -65,19 +263,178 @@ Resume:
         parsed = json.loads(snippet)
     except Exception:
         try:
-            parsed = literal_eval(snippet)
+            parsed = literal_eval(snippet)  # may also be a set or other literal, e.g. "{1, 2}"
         except Exception:
-            parsed = {"raw_output": result}
+            parsed = None
+    return parsed if isinstance(parsed, dict) else {"raw_output": result}
+
+
+@telemetry.timed("stage1")
+def extract_resume_data(resume_input, gemma_pipe, request_id=None):
+    """
+    Extract structured information from a raw resume using Gemma-2B-Instruct.
+
+    Parameters
+    ----------
+    resume_input : str
+        Either raw text (string) or file path to .txt/.pdf/.docx.
+    gemma_pipe : transformers pipeline
+        Pre-loaded Gemma inference pipeline.
+    request_id : str, optional
+        Artifact folder for the output JSON; defaults to the current trace ID.
+
+    Returns
+    -------
+    tuple(dict, str)
+        (parsed_data, output_json_path)
+    """
+
+    # ----------------------------------------------------------
+    # 🧾 Step 1 – Load text from file or raw string
+    # ----------------------------------------------------------
+    resume_text = _load_resume_text(resume_input)
+
+    cache = _get_cache()
+    key = _cache_key(resume_text)
+    parsed = cache.get(key) if cache else None
+
+    if parsed is not None:
+        _log_cache(cache, "hit")
+    else:
+        # ----------------------------------------------------------
+        # 🔎 Step 2 – Fill what rules can find; decide what Gemma must do
+        # ----------------------------------------------------------
+        prefilled, missing = _plan_extraction(resume_text)
+        _log_plan(prefilled, missing)
+
+        cacheable = True
+        if not missing:
+            parsed = _merge(prefilled, {})
+        else:
+            # ----------------------------------------------------------
+            # 🤖 Step 3 – Prompt for the remaining fields
+            # ----------------------------------------------------------
+            tokenizer = prompt_builder.get_tokenizer(gemma_pipe)
+            prompt = _build_prompt(resume_text, tokenizer, missing)
+
+            # ----------------------------------------------------------
+            # 🚀 Step 4 – Generate structured output using Gemma
+            # ----------------------------------------------------------
+            max_new_tokens = _max_new_tokens(missing)
+            start = time.perf_counter()
+            with telemetry.span("stage1.model"):
+                result = gemma_pipe(
+                    prompt, max_new_tokens=max_new_tokens, do_sample=False,
+                    **generation.json_generation_kwargs(gemma_pipe, max_new_tokens, missing, _LIST_FIELDS)
+                )[0]["generated_text"]
+            telemetry.record_model_call("stage1", tokenizer, prompt, result, time.perf_counter() - start)
+            _log_json_stop()
+
+            # ----------------------------------------------------------
+            # 🧹 Step 5 – Extract JSON safely and merge with rule fields
+            # ----------------------------------------------------------
+            model_parsed = _parse_model_output(result)
+            cacheable = _cacheable(model_parsed)
+            parsed = _merge(prefilled, model_parsed)
+
+        if cache:
+            if cacheable:
+                cache.set(key, parsed)
+            _log_cache(cache, "miss")
 
     # ----------------------------------------------------------
-    # 💾 Step 5 – Save structured JSON output
+    # 💾 Step 6 – Save structured JSON output
     # ----------------------------------------------------------
-    out_path = config.CANDIDATE_JSON
-    utils.save_json(parsed, out_path)
+    out_path = artifact_store.save_json(parsed, config.CANDIDATE_JSON, request_id)
 
     utils.log_status(f"✅ Candidate JSON saved at: {out_path}")
 
     # ----------------------------------------------------------
-    # 📤 Step 6 – Return for next stage / UI display
+    # 📤 Step 7 – Return for next stage / UI display
     # ----------------------------------------------------------
     return parsed, out_path
+
+
+@telemetry.timed("stage1.batch")
+def extract_resume_data_batch(resume_inputs, gemma_pipe, batch_size: int = config.STAGE1_BATCH_SIZE):
+    """
+    Extract structured information from many resumes with batched Gemma calls.
+
+    Parameters
+    ----------
+    resume_inputs : list[str]
+        Raw resume texts or file paths to .txt/.pdf/.docx.
+    gemma_pipe : transformers pipeline
+        Pre-loaded Gemma inference pipeline.
+    batch_size : int
+        Number of prompts sent to the model per forward pass.
+
+    Returns
+    -------
+    list[dict]
+        Parsed candidate data, in the same order as ``resume_inputs``.
+        Nothing is written to ``config.CANDIDATE_JSON``; callers persist results.
+    """
+    if not resume_inputs:
+        return []
+
+    texts = [_load_resume_text(r) for r in resume_inputs]
+    keys = [_cache_key(t) for t in texts]
+    cache = _get_cache()
+    results = [cache.get(k) if cache else None for k in keys]
+
+    # Only cache misses go to the model
+    pending = [i for i, parsed in enumerate(results) if parsed is None]
+    if cache:
+        _log_cache(cache, f"lookup: {len(texts) - len(pending)}/{len(texts)} served from cache")
+
+    # Rules first; resumes they fully cover never reach the model
+    plans, uncacheable = {}, set()
+    for i in pending:
+        prefilled, missing = _plan_extraction(texts[i])
+        if missing:
+            plans[i] = (prefilled, missing)
+        else:
+            results[i] = _merge(prefilled, {})
+    if config.STAGE1_HYBRID and pending:
+        utils.log_status(f"🔎 Rules fully covered {len(pending) - len(plans)}/{len(pending)} resumes")
+        telemetry.inc("stage1_llm_calls_total", len(pending) - len(plans), outcome="skipped")
+        telemetry.inc("stage1_llm_calls_total", len(plans), outcome="asked")
+
+    # One model call per generation budget, so short requests are not padded to long ones;
+    # a schema-constrained call additionally needs one field set per call
+    groups = {}
+    for i, (_, missing) in plans.items():
+        fields = tuple(missing) if config.STAGE1_CONSTRAINED_DECODING else ()
+        groups.setdefault((_max_new_tokens(missing), fields), []).append(i)
+
+    tokenizer = prompt_builder.get_tokenizer(gemma_pipe) if groups else None
+    for (max_new_tokens, fields), indices in sorted(groups.items()):
+        prompts = [_build_prompt(texts[i], tokenizer, plans[i][1]) for i in indices]
+        utils.log_status(
+            f"🤖 Extracting {len(prompts)} resumes with Gemma "
+            f"(batch size {batch_size}, max_new_tokens={max_new_tokens})..."
+        )
+        start = time.perf_counter()
+        with telemetry.span("stage1.model"):
+            outputs = gemma_pipe(
+                prompts, max_new_tokens=max_new_tokens, do_sample=False, batch_size=batch_size,
+                **generation.json_generation_kwargs(gemma_pipe, max_new_tokens, fields, _LIST_FIELDS)
+            )
+        telemetry.record_model_call(
+            "stage1", tokenizer, prompts, [utils.generated_text(o) for o in outputs], time.perf_counter() - start
+        )
+        for i, out in zip(indices, outputs):
+            model_parsed = _parse_model_output(utils.generated_text(out))
+            if not _cacheable(model_parsed):
+                uncacheable.add(i)
+            results[i] = _merge(plans[i][0], model_parsed)
+    if groups:
+        _log_json_stop()
+
+    if cache:
+        for i in pending:
+            if i not in uncacheable:
+                cache.set(keys[i], results[i])
+
+    return results
@@ -3,10 +3,105 @@
 # ==========================================================
 
 import re, json, os
-from Codebase import config, utils
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from Codebase import config, utils, telemetry, artifact_store
 
 
-def extract_jd_data_rulebased(jd_text: str):
+# ----------------------------------------------------------
+# 🔎 Precompiled field patterns
+# ----------------------------------------------------------
+# Each field is (name, literal anchors, pattern). The anchors are the lowercase
+# literal prefixes a match must start with, so the pattern is only tried at
+# those positions instead of searching the whole document once per field.
+_LABEL_FIELDS = [
+    ("job_title", ("job title",), re.compile(r"Job Title\s*[:\-]\s*(.*)", re.I)),
+    ("location", ("location",), re.compile(r"Location\s*[:\-]\s*(.*)", re.I)),
+    ("experience_required", ("experience",), re.compile(r"Experience\s*[:\-]\s*(.*)", re.I)),
+]
+
+_SECTION_FIELDS = [
+    ("responsibilities", ("responsibilities",), re.compile(
+        r"Responsibilities\s*[:\-]?(.*?)(?:\n\n|Requirements|Preferred|$)", re.I | re.S)),
+    ("must_have_skills", ("requirements",), re.compile(
+        r"Requirements\s*[:\-]?(.*?)(?:\n\n|Preferred|$)", re.I | re.S)),
+    ("nice_to_have_skills", ("preferred",), re.compile(
+        r"Preferred\s*[:\-]?(.*?)(?:\n\n|$)", re.I | re.S)),
+]
+
+_EDUCATION_FIELD = (
+    "education_required",
+    ("bachelor", "master", "btech", "b.tech", "mtech", "m.tech", "bsc", "b.sc", "msc", "m.sc"),
+    re.compile(r"(Bachelor|Master|B\.?Tech|M\.?Tech|B\.?Sc|M\.?Sc)[^\n]*", re.I),
+)
+
+_ITEM_SPLIT = re.compile(r"[\n;]")
+
+# Characters that re.I folds onto ASCII letters but str.lower() does not
+_FOLD_UNSAFE = ("ı", "ſ")
+
+
+def _find_field(text: str, lowered, anchors, pattern):
+    """
+    Return the leftmost match of pattern (same result as pattern.search(text)).
+    When a position-preserving lowercase copy is available, the pattern is only
+    tried where one of its literal anchors occurs.
+    """
+    if lowered is None:
+        return pattern.search(text)
+
+    start = 0
+    while True:
+        hits = [p for p in (lowered.find(a, start) for a in anchors) if p != -1]
+        if not hits:
+            return None
+        pos = min(hits)
+        match = pattern.match(text, pos)
+        if match:
+            return match
+        start = pos + 1
+
+
+def _split_items(section: str) -> list:
+    return [r.strip("•- \t") for r in _ITEM_SPLIT.split(section) if r.strip()]
+
+
+def parse_jd_text(jd_text: str) -> dict:
+    """
+    Parse one raw job description into the Stage 2 dictionary.
+    Pure function: no disk output and no logging, so it is safe for batch workers.
+    """
+    lowered = jd_text.lower()
+    if len(lowered) != len(jd_text) or any(ch in jd_text for ch in _FOLD_UNSAFE):
+        lowered = None  # fall back to full pattern searches
+
+    found = {}
+    for field, anchors, pattern in _LABEL_FIELDS:
+        match = _find_field(jd_text, lowered, anchors, pattern)
+        found[field] = match.group(1).strip() if match else None
+
+    for field, anchors, pattern in _SECTION_FIELDS:
+        match = _find_field(jd_text, lowered, anchors, pattern)
+        found[field] = _split_items(match.group(1)) if match else []
+
+    field, anchors, pattern = _EDUCATION_FIELD
+    match = _find_field(jd_text, lowered, anchors, pattern)
+    found[field] = match.group(0).strip() if match else None
+
+    # Same key order as the Stage 2 JSON has always used
+    return {
+        "job_title": found["job_title"],
+        "location": found["location"],
+        "experience_required": found["experience_required"],
+        "must_have_skills": found["must_have_skills"],
+        "nice_to_have_skills": found["nice_to_have_skills"],
+        "responsibilities": found["responsibilities"],
+        "education_required": found["education_required"]
+    }
+
+
+@telemetry.timed("stage2")
+def extract_jd_data_rulebased(jd_text: str, request_id=None):
     """
     Extracts structured information from a raw job description using regex + keyword rules.
     Returns a validated dictionary compatible with Stage 3 tailoring.
@@ -15,6 +110,8 @@ def extract_jd_data_rulebased(jd_text: str):
     ----------
     jd_text : str
         Raw job description text (from file or direct input).
+    request_id : str, optional
+        Artifact folder for the output JSON; defaults to the current trace ID.
 
     Returns
     -------
@@ -23,77 +120,117 @@ def extract_jd_data_rulebased(jd_text: str):
     """
 
     # ----------------------------------------------------------
-    # 🧠 Step 1 – Extract text fields using regex
+    # 🧠 Step 1 – Extract fields with the precompiled scanner
     # ----------------------------------------------------------
-    def find_after(label):
-        pattern = rf"{label}\s*[:\-]\s*(.*)"
-        match = re.search(pattern, jd_text, flags=re.I)
-        return match.group(1).strip() if match else None
-
-    job_title = find_after("Job Title")
-    location = find_after("Location")
-    experience = find_after("Experience")
+    jd_data = parse_jd_text(jd_text)
 
     # ----------------------------------------------------------
-    # 📋 Step 2 – Responsibilities, Requirements, Preferred Skills
+    # 💾 Step 2 – Save JSON Output
     # ----------------------------------------------------------
-    resp_section = re.search(
-        r"Responsibilities\s*[:\-]?(.*?)(?:\n\n|Requirements|Preferred|$)",
-        jd_text, flags=re.I | re.S
-    )
-    responsibilities = (
-        [r.strip("•- \t") for r in re.split(r"[\n;]", resp_section.group(1)) if r.strip()]
-        if resp_section else []
-    )
-
-    req_section = re.search(
-        r"Requirements\s*[:\-]?(.*?)(?:\n\n|Preferred|$)",
-        jd_text, flags=re.I | re.S
-    )
-    must_have_skills = (
-        [r.strip("•- \t") for r in re.split(r"[\n;]", req_section.group(1)) if r.strip()]
-        if req_section else []
-    )
-
-    pref_section = re.search(
-        r"Preferred\s*[:\-]?(.*?)(?:\n\n|$)",
-        jd_text, flags=re.I | re.S
-    )
-    nice_to_have_skills = (
-        [r.strip("•- \t") for r in re.split(r"[\n;]", pref_section.group(1)) if r.strip()]
-        if pref_section else []
-    )
+    out_path = artifact_store.save_json(jd_data, config.JD_JSON, request_id)
+    utils.log_status(f"✅ Job Description JSON saved at: {out_path}")
+    if config.JD_INDEX_AUTO_ADD:
+        _add_to_index(jd_text, jd_data)
 
     # ----------------------------------------------------------
-    # 🎓 Step 3 – Education Detection
+    # 📤 Step 3 – Return for next stage / UI display
     # ----------------------------------------------------------
-    edu_match = re.search(
-        r"(Bachelor|Master|B\.?Tech|M\.?Tech|B\.?Sc|M\.?Sc)[^\n]*",
-        jd_text, flags=re.I
-    )
-    education_required = edu_match.group(0).strip() if edu_match else None
+    return jd_data, out_path
 
-    # ----------------------------------------------------------
-    # 🧩 Step 4 – Build Structured JSON
-    # ----------------------------------------------------------
-    jd_data = {
-        "job_title": job_title,
-        "location": location,
-        "experience_required": experience,
-        "must_have_skills": must_have_skills or [],
-        "nice_to_have_skills": nice_to_have_skills or [],
-        "responsibilities": responsibilities or [],
-        "education_required": education_required
-    }
 
-    # ----------------------------------------------------------
-    # 💾 Step 5 – Save JSON Output
-    # ----------------------------------------------------------
-    out_path = config.JD_JSON
-    utils.save_json(jd_data, out_path)
-    utils.log_status(f"✅ Job Description JSON saved at: {out_path}")
+def _add_to_index(jd_text: str, jd_data: dict):
+    """
+    Keep the parsed JD searchable in the JD index, keyed by its text's content hash.
+    Queued for the index's background writer, which batches adds across requests.
+    """
+    import sqlite3
+    from Codebase import jd_index
+    from Codebase.cache import content_key
 
-    # ----------------------------------------------------------
-    # 📤 Step 6 – Return for next stage / UI display
-    # ----------------------------------------------------------
-    return jd_data, out_path
+    try:
+        jd_index.add_later(content_key(" ".join(jd_text.split()))[:16], jd_data)
+    except sqlite3.Error as e:  # opening the shared index
+        utils.log_status(f"⚠️ JD not added to the index ({e})")
+
+
+# ----------------------------------------------------------
+# 📦 Batch / Stream Parsing
+# ----------------------------------------------------------
+def iter_jd_documents(source: str):
+    """
+    Yield (doc_id, jd_text) pairs from a JSONL file or a directory of JD files.
+    JSONL lines may be plain strings or objects with 'text' / 'jd_text' / 'description'
+    and an optional 'id'.
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if os.path.splitext(name)[-1].lower() in (".txt", ".pdf", ".docx"):
+                yield name, utils.read_file_text(path)
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield line_no, record
+            else:
+                text = record.get("text") or record.get("jd_text") or record.get("description") or ""
+                yield record.get("id", line_no), text
+
+
+def _parse_record(record):
+    doc_id, jd_text = record
+    return doc_id, parse_jd_text(jd_text)
+
+
+def parse_jd_stream(source, workers=None, chunksize: int = config.JD_BATCH_CHUNKSIZE, output_path=None):
+    """
+    Parse a stream of job descriptions across a process pool.
+
+    Parameters
+    ----------
+    source : str or iterable
+        JSONL path, directory of JD files, or an iterable of (doc_id, jd_text).
+    workers : int, optional
+        Worker processes (default: CPU count); 1 parses in-process.
+    chunksize : int
+        Documents sent to a worker per task.
+    output_path : str, optional
+        When given, results are also written as JSONL ({"id": ..., **jd_data}).
+
+    Yields
+    ------
+    tuple(doc_id, dict)
+        Parsed documents in input order.
+    """
+    records = iter_jd_documents(source) if isinstance(source, str) else iter(source)
+    out = open(output_path, "w", encoding="utf-8") if output_path else None
+
+    try:
+        if workers == 1:
+            results = map(_parse_record, records)
+            yield from _write_through(results, out)
+            return
+
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Submit bounded windows so arbitrarily long feeds are not read into memory at once
+            window = chunksize * workers * 4
+            while True:
+                batch = list(islice(records, window))
+                if not batch:
+                    break
+                yield from _write_through(pool.map(_parse_record, batch, chunksize=chunksize), out)
+    finally:
+        if out:
+            out.close()
+
+
+def _write_through(results, out):
+    for doc_id, jd_data in results:
+        if out:
+            out.write(json.dumps({"id": doc_id, **jd_data}, ensure_ascii=False) + "\n")
+        yield doc_id, jd_data
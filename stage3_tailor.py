@@ -2,46 +2,94 @@
 # 🧩 STAGE 3: Tailored Resume Generation (LLaMA + Predefined Template)
 # ==========================================================
 
-import os, re, json
-from Codebase import config, utils
-from Codebase.BaseCVTemplate import build_cv_from_data
+import os, re, time, queue, threading, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from Codebase import config, utils, prompt_builder, telemetry, generation, artifact_store, keyword_matcher
 
 
 # -----------------------------
 # 🧹 Clean Model Output
 # -----------------------------
+# Patterns are compiled once. Spans that the old lazy `.*?` regexes removed are
+# now found with forward-only searches, so long or pathological generations
+# clean in linear time.
+_PROMPT_START = re.compile(r"CANDIDATE DATA:", re.I)
+_PROMPT_END = re.compile(r"Now write the tailored resume below:", re.I)
+_JD_START = re.compile(r"JOB DESCRIPTION DATA:", re.I)
+_RULES_START = re.compile(r"rules\s*+:", re.I)
+_RULES_END = re.compile(r"\n[A-Z]", re.I)
+_NOTE_START = re.compile(r"note\s*+:", re.I)
+_REPEATED_EDUCATION = re.compile(r"education\s*+education", re.I)
+_REPEATED_SUMMARY = re.compile(r"summary\s*+summary", re.I)
+
+# Markdown symbols are dropped and typographic punctuation normalized with one table,
+# applied only to the runs that contain them
+_CLEAN_CHARS = str.maketrans({
+    **dict.fromkeys("*_#>`"),
+    "–": "-", "—": "-", "“": '"', "”": '"', "‘": "'", "’": "'",
+})
+_CLEAN_RUN = re.compile("[" + re.escape("".join(map(chr, _CLEAN_CHARS))) + "]+")
+
+# Whitespace after a newline (with an optional bullet), or a run of bullets. The
+# leading character class lets the regex engine skip straight to candidate positions.
+_LAYOUT = re.compile(r"[\n•](?:(?<=\n)(?=[\s•])\s*+(•\s*+)?|(?<=•)•+)")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def _remove_spans(text: str, start_re, end_re, keep_end: bool) -> str:
+    """
+    Remove every span from a start_re match up to the first end_re match after it
+    (the end match itself is removed too unless keep_end). Like the old lazy
+    `start.*?end` regex, a start with no end after it is left alone.
+    """
+    parts, pos = [], 0
+    while True:
+        start = start_re.search(text, pos)
+        if not start:
+            break
+        end = end_re.search(text, start.end())
+        if not end:
+            break  # later starts cannot have an end either
+        parts.append(text[pos:start.start()])
+        pos = end.start() if keep_end else end.end()
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _fix_layout(match) -> str:
+    text = match.group()
+    if text[0] == "•":
+        return "•"                        # remove duplicate bullets
+    if match.group(1) is not None:
+        return "\n• "                     # proper bullet spacing
+    return _BLANK_LINES.sub("\n\n", text)  # at most one empty line
+
+
 def _clean_output(raw: str) -> str:
     """Cleans unwanted prompt residues, notes, and formatting issues."""
     # Remove leftover prompt instructions or rules
-    raw = re.sub(r"CANDIDATE DATA:.*?Now write the tailored resume below:", "", raw, flags=re.S | re.I)
-    raw = re.sub(r"JOB DESCRIPTION DATA:.*?$", "", raw, flags=re.S | re.I)
-    raw = re.sub(r"(?i)rules\s*:.*?(?=\n[A-Z])", "", raw, flags=re.S)
+    raw = _remove_spans(raw, _PROMPT_START, _PROMPT_END, keep_end=False)
+    jd = _JD_START.search(raw)
+    if jd:  # cut to the end; like the old `.*?$`, a final newline survives
+        raw = raw[:jd.start()] + ("\n" if raw.endswith("\n") else "")
+    raw = _remove_spans(raw, _RULES_START, _RULES_END, keep_end=True)
 
     # Remove note/disclaimer lines at the end
-    raw = re.sub(r"(?i)note\s*:.*", "", raw, flags=re.S)
+    note = _NOTE_START.search(raw)
+    if note:
+        raw = raw[:note.start()]
 
     # Remove double "Education" or "Summary" that appear twice
-    raw = re.sub(r"(?i)(education\s*education)", "Education", raw)
-    raw = re.sub(r"(?i)(summary\s*summary)", "Summary", raw)
+    raw = _REPEATED_EDUCATION.sub("Education", raw)
+    raw = _REPEATED_SUMMARY.sub("Summary", raw)
 
-    # Normalize markdown symbols and stray bullets
-    raw = re.sub(r"[*_#>`]+", "", raw)
-    raw = re.sub(r"\n\s*•\s*", "\n• ", raw)  # proper bullet spacing
-    raw = re.sub(r"•{2,}", "•", raw)         # remove duplicate bullets
+    # Normalize markdown symbols, punctuation, bullets and empty lines
+    raw = _CLEAN_RUN.sub(lambda m: m.group().translate(_CLEAN_CHARS), raw)
+    return _LAYOUT.sub(_fix_layout, raw).strip()
 
-    # Normalize punctuation
-    repl = {"–": "-", "—": "-", "•": "•", "“": '"', "”": '"', "‘": "'", "’": "'"}
-    for k, v in repl.items():
-        raw = raw.replace(k, v)
 
-    # Remove empty lines or stray spaces
-    raw = re.sub(r"\n{3,}", "\n\n", raw).strip()
-    return raw.strip()
-
-
-# -----------------------------
-# 🧩 Split into sections
-# -----------------------------
 def _segment_sections(text: str):
     """Splits LLaMA output into logical resume sections based on headers."""
     pattern = r"(?mi)^(CONTACT|SUMMARY|SKILLS|PROJECTS|EXPERIENCE|EDUCATION)\s*:?\s*$"
@@ -58,39 +106,101 @@ def _segment_sections(text: str):
 # 📊 ATS Comparison Utility
 # -----------------------------
 def compute_ats_score(resume_text: str, jd_keywords: list[str]) -> float:
-    """Simple keyword match score between resume and JD keywords."""
-    jd_set = set(word.lower() for word in jd_keywords if word.strip())
-    resume_words = set(resume_text.lower().split())
-    matched = sum(1 for word in jd_set if word in resume_words)
-    return round((matched / len(jd_set)) * 100, 2) if jd_set else 0.0
+    """
+    Percentage of JD keywords found in the resume: the same phrase-aware score as
+    ats_report (keyword_matcher), and per pair the same as ats_matrix.
+    """
+    return keyword_matcher.compile_keywords(jd_keywords).score(resume_text)
 
 
 # -----------------------------
-# 🚀 Main Function
+# 🔑 JD Keyword Extraction
 # -----------------------------
-def tailor_resume_with_llama(candidate_input, jd_input, llama_pipe, output_pdf_path=None):
+def _extract_keywords(jd_dict):
     """
-    Uses LLaMA to generate a tailored, ATS-friendly resume and formats it using the predefined BaseCVTemplate.
+    Dynamically collects all possible keywords from the JD dictionary.
+    Works even if key names differ (skills, requirements, responsibilities, etc.)
+    List entries are split into key phrases, so requirement lines need not match verbatim.
+    """
+    keywords = []
+    for key, value in jd_dict.items():
+        if isinstance(value, list):
+            for entry in value:
+                keywords.extend(keyword_matcher.key_phrases(entry))
+        elif isinstance(value, str):
+            keywords.extend(re.findall(r"[A-Za-z]+", value))
+    keywords = [kw.lower() for kw in keywords if len(kw) > 2]
+    return list(set(keywords))
 
-    Returns
-    -------
-    tuple(str, str, dict)
-        (tailored_resume_text, output_pdf_path, ats_report)
+
+# -----------------------------
+# 🧾 Prompt & Output Helpers
+# -----------------------------
+def _load_input(data_input):
+    """Return a dict from either a JSON file path or an already-parsed dict."""
+    if isinstance(data_input, str) and os.path.exists(data_input):
+        return utils.load_json(data_input)
+    return data_input
+
+
+def _build_prompt(candidate_data: dict, jd_data: dict, tokenizer=None) -> str:
+    """Build the LLaMA tailoring prompt for one (candidate, JD) pair."""
+    return _render_prompt(_candidate_json(candidate_data, tokenizer), _jd_json(jd_data, tokenizer))
+
+
+def _candidate_json(candidate_data: dict, tokenizer=None) -> str:
+    """Compact candidate JSON trimmed to config.STAGE3_CANDIDATE_TOKEN_BUDGET."""
+    return prompt_builder.fit_json(
+        candidate_data, prompt_builder.CANDIDATE_PRIORITY, config.STAGE3_CANDIDATE_TOKEN_BUDGET,
+        tokenizer, label="Stage 3 candidate",
+    )
+
+
+def _jd_json(jd_data: dict, tokenizer=None) -> str:
+    """Compact JD JSON trimmed to config.STAGE3_JD_TOKEN_BUDGET."""
+    return prompt_builder.fit_json(
+        jd_data, prompt_builder.JD_PRIORITY, config.STAGE3_JD_TOKEN_BUDGET, tokenizer, label="Stage 3 JD"
+    )
+
+
+def _generation_kwargs(llama_pipe, prompt: str = None) -> dict:
     """
+    Sampling settings shared by every Stage 3 call. Only new tokens are returned
+    (no echoed prompt), and rows stop once the resume is complete. Single-prompt
+    calls pass their prompt and use assisted decoding when a draft model is configured.
+    """
+    assisted = generation.assisted_generation_kwargs(llama_pipe) if prompt is not None else {}
+    return {
+        "max_new_tokens": config.STAGE3_MAX_NEW_TOKENS, "temperature": 0.4, "do_sample": True,
+        "return_full_text": False,
+        **generation.section_generation_kwargs(
+            llama_pipe, config.STAGE3_MAX_NEW_TOKENS, prompt if assisted else None
+        ),
+        **assisted,
+    }
 
-    # 1️⃣ Load candidate & JD data
-    if isinstance(candidate_input, str) and os.path.exists(candidate_input):
-        candidate_data = utils.load_json(candidate_input)
-    else:
-        candidate_data = candidate_input
-
-    if isinstance(jd_input, str) and os.path.exists(jd_input):
-        jd_data = utils.load_json(jd_input)
-    else:
-        jd_data = jd_input
-
-    # 2️⃣ Build Prompt
-    prompt = f"""
+
+def _log_section_stop():
+    stats = generation.stop_stats("sections")
+    if stats["stopped_early"]:
+        utils.log_status(
+            f"🛑 Section stop: {stats['stopped_early']}/{stats['requests']} resumes, "
+            f"avg {stats['avg_tokens_saved']} tokens saved/resume"
+        )
+
+
+def _log_assisted():
+    stats = generation.assisted_stats()
+    if stats["calls"]:
+        utils.log_status(
+            f"🏎️ Assisted decoding: {stats['acceptance_rate']:.0%} of draft tokens accepted, "
+            f"{stats['tokens_per_step']} tokens/step, {stats['tokens_per_second']} tokens/s"
+        )
+
+
+def _render_prompt(candidate_json: str, jd_json: str) -> str:
+    """Fill the tailoring template with already-serialized candidate and JD JSON."""
+    return f"""
 You are an expert resume writer specializing in ATS-friendly formatting.
 Tailor the candidate's resume for the provided job description.
 
@@ -110,23 +220,37 @@ Rules:
 - Align skills and experience with the job description.
 
 CANDIDATE DATA:
-{json.dumps(candidate_data, indent=2)}
+{candidate_json}
 
 JOB DESCRIPTION DATA:
-{json.dumps(jd_data, indent=2)}
+{jd_json}
 
 Now write the tailored resume below:
 """
 
-    # 3️⃣ Generate text
-    utils.log_status("🧠 Generating tailored resume using LLaMA model...")
-    result = llama_pipe(prompt, max_new_tokens=900, temperature=0.4, do_sample=True)[0]["generated_text"]
+
+@telemetry.timed("stage3.finalize")
+def finalize_tailored_output(candidate_data: dict, jd_data: dict, result: str, output_pdf_path=None,
+                             request_id=None):
+    """
+    CPU-only half of Stage 3: clean and segment raw LLaMA output,
+    build the PDF and compute the ATS report.
+
+    Without output_pdf_path the PDF goes to the artifact store under request_id
+    (default: the current trace ID), written in the background.
+
+    Returns
+    -------
+    tuple(str, str, dict)
+        (tailored_resume_text, output_pdf_path, ats_report)
+    """
 
     # 4️⃣ Clean & Segment
     text = _clean_output(result)
     sections = _segment_sections(text)
 
     # 5️⃣ Determine output PDF path
+    store = None if output_pdf_path else artifact_store.get_store()
     if not output_pdf_path:
         candidate_name = (
             candidate_data.get("name")
@@ -135,27 +259,21 @@ Now write the tailored resume below:
         )
         output_pdf_path = utils.get_pdf_output_path(candidate_name)
 
-    # 6️⃣ Build PDF using predefined template
+    # 6️⃣ Build PDF using predefined template (ReportLab imported on first use)
+    from Codebase.BaseCVTemplate import build_cv_from_data, render_cv_bytes
+
     utils.log_status("🖋️ Building ATS-friendly formatted PDF...")
-    build_cv_from_data(candidate_data, sections, output_pdf_path)
+    with telemetry.span("stage3.pdf"):
+        if store:
+            output_pdf_path = store.put_bytes(
+                os.path.basename(output_pdf_path), render_cv_bytes(candidate_data, sections), request_id
+            )
+        else:
+            build_cv_from_data(candidate_data, sections, output_pdf_path)
     utils.log_status(f"✅ Tailored resume saved at: {output_pdf_path}")
 
     # 7️⃣ ⚖️ Compute ATS Comparison (Dynamic Keyword Extraction)
-    def extract_keywords(jd_dict):
-        """
-        Dynamically collects all possible keywords from the JD dictionary.
-        Works even if key names differ (skills, requirements, responsibilities, etc.)
-        """
-        keywords = []
-        for key, value in jd_dict.items():
-            if isinstance(value, list):
-                keywords.extend(value)
-            elif isinstance(value, str):
-                keywords.extend(re.findall(r"[A-Za-z]+", value))
-        keywords = [kw.lower() for kw in keywords if len(kw) > 2]
-        return list(set(keywords))
-
-    jd_keywords = extract_keywords(jd_data)
+    jd_keywords = _extract_keywords(jd_data)
 
     # Build textual corpus for original and tailored resumes
     original_text = " ".join([
@@ -165,21 +283,294 @@ Now write the tailored resume below:
     ])
     tailored_text_clean = text
 
-    # Compute ATS scores
-    original_score = compute_ats_score(original_text, jd_keywords)
-    tailored_score = compute_ats_score(tailored_text_clean, jd_keywords)
+    # Compute ATS scores (phrase-aware, one pass per resume)
+    matcher = keyword_matcher.compile_keywords(sorted(jd_keywords))
+    original_score = matcher.score(original_text)
+    matched, missing = matcher.match(tailored_text_clean)
+    tailored_score = round(len(matched) / len(matcher) * 100, 2) if len(matcher) else 0.0
     ats_improvement = round(tailored_score - original_score, 2)
 
     ats_report = {
         "original_score": original_score,
         "tailored_score": tailored_score,
         "improvement": ats_improvement,
-        "jd_keywords": jd_keywords[:20]  # optional preview
+        "jd_keywords": jd_keywords[:20],  # optional preview
+        "matched_keywords": matched,
+        "missing_keywords": missing,
     }
 
     utils.log_status(
         f"📊 ATS Comparison → Original: {original_score}% | Tailored: {tailored_score}% | Improvement: +{ats_improvement}%"
     )
 
-    # 8️⃣ Return results
     return text, output_pdf_path, ats_report
+
+
+# -----------------------------
+# 🚀 Main Function
+# -----------------------------
+@telemetry.timed("stage3")
+def tailor_resume_with_llama(candidate_input, jd_input, llama_pipe, output_pdf_path=None, request_id=None):
+    """
+    Uses LLaMA to generate a tailored, ATS-friendly resume and formats it using the predefined BaseCVTemplate.
+
+    Returns
+    -------
+    tuple(str, str, dict)
+        (tailored_resume_text, output_pdf_path, ats_report)
+    """
+
+    # 1️⃣ Load candidate & JD data
+    candidate_data = _load_input(candidate_input)
+    jd_data = _load_input(jd_input)
+
+    # 2️⃣ – 3️⃣ Build prompt & generate text
+    result = generate_tailored_text(candidate_data, jd_data, llama_pipe)
+
+    # 4️⃣ – 8️⃣ Clean, build PDF, score and return
+    return finalize_tailored_output(candidate_data, jd_data, result, output_pdf_path, request_id)
+
+
+def generate_tailored_text(candidate_data: dict, jd_data: dict, llama_pipe) -> str:
+    """
+    Model-only half of Stage 3: build the prompt and return raw LLaMA output.
+    Pair with finalize_tailored_output (CPU-only) to run the two halves on different workers.
+    """
+    tokenizer = prompt_builder.get_tokenizer(llama_pipe)
+    prompt = _build_prompt(candidate_data, jd_data, tokenizer)
+
+    utils.log_status("🧠 Generating tailored resume using LLaMA model...")
+    start = time.perf_counter()
+    kwargs = _generation_kwargs(llama_pipe, prompt)
+    with telemetry.span("stage3.model"), generation.assisted_tracking(llama_pipe, kwargs) as record_assisted:
+        result = llama_pipe(prompt, **kwargs)[0]["generated_text"]
+        record_assisted(result)
+    telemetry.record_model_call("stage3", tokenizer, prompt, result, time.perf_counter() - start)
+    _log_section_stop()
+    _log_assisted()
+    return result
+
+
+# -----------------------------
+# 📦 Batch Function
+# -----------------------------
+def tailor_resume_batch(pairs, llama_pipe, batch_size: int = config.STAGE3_BATCH_SIZE, output_pdf_paths=None):
+    """
+    Tailor many (candidate, JD) pairs with batched LLaMA generation.
+
+    Parameters
+    ----------
+    pairs : list[tuple]
+        (candidate_input, jd_input) pairs; each item is a dict or JSON path.
+    llama_pipe : transformers pipeline
+        Pre-loaded LLaMA pipeline (tokenizer must have a pad token).
+    batch_size : int
+        Number of prompts sent to the model per forward pass.
+    output_pdf_paths : list[str], optional
+        One PDF path per pair; defaults to the candidate-name path.
+
+    Returns
+    -------
+    list[tuple(str, str, dict)]
+        (tailored_resume_text, output_pdf_path, ats_report) per pair, in input order.
+    """
+    if not pairs:
+        return []
+
+    loaded = [(_load_input(c), _load_input(j)) for c, j in pairs]
+    tokenizer = prompt_builder.get_tokenizer(llama_pipe)
+    prompts = [_build_prompt(c, j, tokenizer) for c, j in loaded]
+    output_pdf_paths = output_pdf_paths or [None] * len(loaded)
+
+    utils.log_status(f"🧠 Generating {len(prompts)} tailored resumes with LLaMA (batch size {batch_size})...")
+    start = time.perf_counter()
+    with telemetry.span("stage3.model"):
+        outputs = llama_pipe(prompts, batch_size=batch_size, **_generation_kwargs(llama_pipe))
+    telemetry.record_model_call(
+        "stage3", tokenizer, prompts, [utils.generated_text(o) for o in outputs], time.perf_counter() - start
+    )
+    _log_section_stop()
+
+    return [
+        finalize_tailored_output(c, j, utils.generated_text(out), pdf_path)
+        for (c, j), out, pdf_path in zip(loaded, outputs, output_pdf_paths)
+    ]
+
+
+# -----------------------------
+# 🔀 Fan-out Function (one candidate → many jobs)
+# -----------------------------
+def tailor_resume_for_jobs(candidate_input, jd_inputs, llama_pipe, batch_size: int = config.STAGE3_BATCH_SIZE,
+                           output_pdf_paths=None, render_workers: int = config.STAGE3_RENDER_WORKERS):
+    """
+    Tailor one candidate to many job descriptions, yielding results as they complete.
+
+    The compact candidate JSON is built once and shared by every prompt. Prompts are
+    sorted by length and grouped into padded batches of ``batch_size``. PDF
+    rendering and ATS scoring for a finished batch run in a background pool
+    while the next batch generates.
+
+    Parameters
+    ----------
+    candidate_input : dict or str
+        Candidate data or path to the Stage 1 JSON.
+    jd_inputs : list
+        JD dicts or paths to Stage 2 JSON files.
+    llama_pipe : transformers pipeline
+        Pre-loaded LLaMA pipeline (tokenizer must have a pad token).
+    batch_size : int
+        Number of prompts sent to the model per forward pass.
+    output_pdf_paths : list[str], optional
+        One PDF path per JD; defaults to tailored_resume_<name>__job<N>.pdf.
+    render_workers : int
+        Threads building PDFs / ATS reports alongside generation.
+
+    Yields
+    ------
+    tuple(int, tuple(str, str, dict))
+        (jd_index, (tailored_resume_text, output_pdf_path, ats_report)) in completion order.
+    """
+    candidate_data = _load_input(candidate_input)
+    jds = [_load_input(j) for j in jd_inputs]
+    if not jds:
+        return
+
+    tokenizer = prompt_builder.get_tokenizer(llama_pipe)
+    candidate_json = _candidate_json(candidate_data, tokenizer)
+    prompts = [_render_prompt(candidate_json, _jd_json(jd, tokenizer)) for jd in jds]
+
+    if not output_pdf_paths:
+        name = candidate_data.get("name") or candidate_data.get("full_name") or "candidate"
+        output_pdf_paths = [utils.get_batch_pdf_output_path(name, f"job{i + 1}") for i in range(len(jds))]
+
+    # Similar-length prompts share a batch so little compute is spent on padding
+    order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+    batches = [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+    done = queue.Queue()
+    stop = threading.Event()  # set when the consumer stops iterating early
+
+    with ThreadPoolExecutor(max_workers=render_workers) as renderer:
+        def generate_batches():
+            try:
+                for number, batch in enumerate(batches, start=1):
+                    if stop.is_set():
+                        return
+                    utils.log_status(
+                        f"🧠 Generating batch {number}/{len(batches)} ({len(batch)} jobs) with LLaMA..."
+                    )
+                    start = time.perf_counter()
+                    with telemetry.span("stage3.model"):
+                        outputs = llama_pipe(
+                            [prompts[i] for i in batch], batch_size=len(batch), **_generation_kwargs(llama_pipe)
+                        )
+                    telemetry.record_model_call(
+                        "stage3", tokenizer, [prompts[i] for i in batch],
+                        [utils.generated_text(o) for o in outputs], time.perf_counter() - start,
+                    )
+                    _log_section_stop()
+                    if stop.is_set():
+                        return
+                    for i, out in zip(batch, outputs):
+                        future = renderer.submit(
+                            contextvars.copy_context().run, finalize_tailored_output,
+                            candidate_data, jds[i], utils.generated_text(out), output_pdf_paths[i],
+                        )
+                        future.add_done_callback(lambda f, i=i: done.put((i, f)))
+            except BaseException as e:
+                done.put((None, e))
+
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(generate_batches,), name="stage3-fan-out", daemon=True
+        ).start()
+
+        try:
+            for _ in range(len(jds)):
+                index, item = done.get()
+                if index is None:
+                    raise item
+                yield index, item.result()
+        finally:
+            # Abandoned early: no further batches are generated (the current one finishes)
+            # and queued renders are dropped
+            stop.set()
+            renderer.shutdown(wait=False, cancel_futures=True)
+
+
+# -----------------------------
+# 📡 Streaming Function
+# -----------------------------
+def stream_tailor_resume(candidate_input, jd_input, llama_pipe, output_pdf_path=None, request_id=None):
+    """
+    Streaming variant of tailor_resume_with_llama for interactive use.
+
+    Yields event dicts as generation progresses:
+      {"type": "token",   "text": partial_text}
+      {"type": "section", "name": SECTION, "body": section_text, "text": partial_text}
+      {"type": "done",    "text": tailored_text, "sections": dict, "pdf_path": str, "ats_report": dict}
+
+    A section is reported once the next section header has started. The PDF and
+    ATS report are only built after generation finishes.
+    """
+    from transformers import TextIteratorStreamer  # heavy import, deferred
+
+    candidate_data = _load_input(candidate_input)
+    jd_data = _load_input(jd_input)
+    tokenizer = prompt_builder.get_tokenizer(llama_pipe)
+    prompt = _build_prompt(candidate_data, jd_data, tokenizer)
+
+    streamer = TextIteratorStreamer(llama_pipe.tokenizer, skip_prompt=True, skip_special_tokens=True)
+    outcome = {}
+
+    kwargs = _generation_kwargs(llama_pipe, prompt)
+
+    def generate():
+        try:
+            with generation.assisted_tracking(llama_pipe, kwargs) as record_assisted:
+                outcome["result"] = llama_pipe(prompt, streamer=streamer, **kwargs)[0]["generated_text"]
+                record_assisted(outcome["result"])
+        except BaseException as e:
+            outcome["error"] = e
+            streamer.end()
+
+    utils.log_status("🧠 Streaming tailored resume from LLaMA model...")
+    start = time.perf_counter()
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(generate,), name="stage3-stream", daemon=True)
+    thread.start()
+
+    partial, emitted = "", set()
+    for chunk in streamer:
+        if not chunk:
+            continue
+        if not partial:
+            utils.log_status(f"⚡ Time to first token: {time.perf_counter() - start:.2f}s")
+            telemetry.observe("time_to_first_token_seconds", time.perf_counter() - start, stage="stage3")
+        partial += chunk
+        yield {"type": "token", "text": partial}
+
+        # Headers start on a new line, so sections can only complete on a newline
+        if "\n" in chunk:
+            names = list(_segment_sections(_clean_output(partial)).items())
+            for name, body in names[:-1]:
+                if body and name not in emitted:
+                    emitted.add(name)
+                    yield {"type": "section", "name": name, "body": body, "text": partial}
+
+    thread.join()
+    if "error" in outcome:
+        telemetry.inc("stage_errors_total", stage="stage3.model")
+        raise outcome["error"]
+    telemetry.observe("stage_duration_seconds", time.perf_counter() - start, stage="stage3.model")
+    telemetry.record_model_call("stage3", tokenizer, prompt, outcome["result"], time.perf_counter() - start)
+    _log_section_stop()
+    _log_assisted()
+
+    text, pdf_path, ats_report = finalize_tailored_output(
+        candidate_data, jd_data, outcome["result"], output_pdf_path, request_id
+    )
+    sections = _segment_sections(text)
+    for name, body in sections.items():
+        if body and name not in emitted:
+            yield {"type": "section", "name": name, "body": body, "text": text}
+
+    yield {"type": "done", "text": text, "sections": sections, "pdf_path": pdf_path, "ats_report": ats_report}
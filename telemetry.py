@@ -0,0 +1,261 @@
+# ==========================================================
+# 📈 telemetry.py
+# In-process metrics (counters, histograms), timing spans and
+# per-request trace IDs, with an optional Prometheus/JSON endpoint
+# ==========================================================
+
+import json, time, uuid, bisect, functools, threading, contextvars
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Codebase import config
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_counters = {}    # (name, labels) → value
+_histograms = {}  # (name, labels) → _Histogram
+_server = None
+
+
+class _Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def enabled() -> bool:
+    return config.TELEMETRY_ENABLED
+
+
+# ----------------------------------------------------------
+# 🧵 Trace IDs
+# ----------------------------------------------------------
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id():
+    """Trace ID of the request being handled in this context, or None."""
+    return _trace_id.get()
+
+
+@contextmanager
+def trace(trace_id: str = None):
+    """Make trace_id (a new one by default) current for the enclosed block."""
+    token = _trace_id.set(trace_id or new_trace_id())
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+def trace_generator(gen, trace_id: str = None):
+    """
+    Iterate gen with one trace ID current during every step.
+    Gradio may resume a generator on a different worker thread each time,
+    so the ID is re-established per step rather than once.
+    """
+    trace_id = trace_id or new_trace_id()
+    while True:
+        with trace(trace_id):
+            try:
+                item = next(gen)
+            except StopIteration:
+                return
+        yield item
+
+
+# ----------------------------------------------------------
+# 🔢 Counters, histograms and spans
+# ----------------------------------------------------------
+def _key(name: str, labels: dict):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Add value to a counter (no-op when telemetry is disabled)."""
+    if not config.TELEMETRY_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, buckets=None, **labels):
+    """
+    Record value in a histogram (no-op when telemetry is disabled).
+    Names ending in _seconds default to TIME_BUCKETS, others to SIZE_BUCKETS.
+    """
+    if not config.TELEMETRY_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = _Histogram(
+                buckets or (TIME_BUCKETS if name.endswith("_seconds") else SIZE_BUCKETS)
+            )
+        hist.observe(value)
+
+
+@contextmanager
+def _span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        inc("stage_errors_total", stage=name)
+        raise
+    finally:
+        observe("stage_duration_seconds", time.perf_counter() - start, stage=name)
+
+
+def span(name: str):
+    """
+    Time the enclosed block into stage_duration_seconds{stage=name}.
+    Exceptions also increment stage_errors_total. Returns a shared no-op
+    context manager when telemetry is disabled.
+    """
+    if not config.TELEMETRY_ENABLED:
+        return _NOOP
+    return _span(name)
+
+
+def timed(name: str):
+    """Decorator form of span() for whole stage functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not config.TELEMETRY_ENABLED:
+                return fn(*args, **kwargs)
+            with _span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_model_call(stage: str, tokenizer, prompts, outputs, seconds: float):
+    """
+    Prompt length and generated tokens per row, plus decode throughput, for one
+    (possibly batched) model call. Echoed prompts are not counted as generated.
+    """
+    if not config.TELEMETRY_ENABLED:
+        return
+    from Codebase.prompt_builder import count_tokens  # avoids an import cycle via utils
+
+    if isinstance(prompts, str):
+        prompts, outputs = [prompts], [outputs]
+    generated = 0
+    for prompt, output in zip(prompts, outputs):
+        new_text = output[len(prompt):] if output.startswith(prompt) else output
+        new_tokens = count_tokens(new_text, tokenizer)
+        generated += new_tokens
+        observe("prompt_tokens", count_tokens(prompt, tokenizer), stage=stage)
+        observe("generated_tokens", new_tokens, stage=stage)
+    inc("generated_tokens_total", generated, stage=stage)
+    if seconds > 0:
+        observe("tokens_per_second", generated / seconds, buckets=SIZE_BUCKETS, stage=stage)
+
+
+def reset():
+    """Clear all recorded metrics."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# ----------------------------------------------------------
+# 📤 Export
+# ----------------------------------------------------------
+def snapshot() -> dict:
+    """All metrics as a JSON-serializable dict."""
+    with _lock:
+        return {
+            "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _counters.items()],
+            "histograms": [
+                {"name": n, "labels": dict(l), "count": h.count, "sum": round(h.sum, 6),
+                 "mean": round(h.sum / h.count, 6) if h.count else 0.0,
+                 "buckets": dict(zip([*map(str, h.buckets), "+Inf"], _cumulative(h.counts)))}
+                for (n, l), h in _histograms.items()
+            ],
+        }
+
+
+def _cumulative(counts):
+    total, out = 0, []
+    for c in counts:
+        total += c
+        out.append(total)
+    return out
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    prefix = config.METRICS_PREFIX
+    lines, typed = [], set()
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} counter")
+                typed.add(name)
+            lines.append(f"{prefix}{name}{_labels(labels)} {value}")
+        for (name, labels), hist in sorted(_histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                typed.add(name)
+            for bound, count in zip([*map(str, hist.buckets), "+Inf"], _cumulative(hist.counts)):
+                lines.append(f"{prefix}{name}_bucket{_labels(labels, (('le', bound),))} {count}")
+            lines.append(f"{prefix}{name}_sum{_labels(labels)} {hist.sum}")
+            lines.append(f"{prefix}{name}_count{_labels(labels)} {hist.count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = json.dumps(snapshot()).encode("utf-8"), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, content_type = render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep scrapes out of the console
+
+
+def start_metrics_server(host: str = None, port: int = None):
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a daemon thread.
+    Only one server is started per process; later calls return it.
+    """
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host or config.METRICS_HOST, port or config.METRICS_PORT), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
@@ -0,0 +1,30 @@
+# The package is imported as Codebase, like the benchmarks do
+import os, sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+
+
+@pytest.fixture
+def isolated_outputs(tmp_path, monkeypatch):
+    """Point every output path at tmp_path and turn off caches and index adds; restored after the test."""
+    from Codebase import config
+
+    structured = tmp_path / "structured_json"
+    settings = {
+        "OUTPUT_DIR": str(tmp_path),
+        "STRUCTURED_JSON_DIR": str(structured),
+        "TAILORED_PDF_DIR": str(tmp_path / "tailored_pdfs"),
+        "CANDIDATE_JSON": str(structured / "candidate.json"),
+        "JD_JSON": str(structured / "jd.json"),
+        "ARTIFACT_DIR": str(tmp_path / "artifacts"),
+        "JD_INDEX_PATH": str(tmp_path / "jd_index.sqlite"),
+        "JD_INDEX_AUTO_ADD": False,
+        "STAGE1_CACHE_ENABLED": False,
+        "INGEST_CACHE_ENABLED": False,
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(config, name, value)
+    for folder in ("STRUCTURED_JSON_DIR", "TAILORED_PDF_DIR"):
+        os.makedirs(settings[folder], exist_ok=True)
+    return tmp_path
@@ -0,0 +1,34 @@
+import os
+from Codebase.artifact_store import ArtifactStore
+
+
+def test_flush_reports_failed_writes(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    broken = ArtifactStore(str(blocker), fsync="never")  # objects/ cannot be created under a file
+    path = broken.put_bytes("resume.pdf", b"%PDF", request_id="r1")
+    assert broken.flush(timeout=5, paths=[path]) is False
+    assert broken.flush(timeout=5) is False
+
+    store = ArtifactStore(str(tmp_path / "store"), fsync="never")
+    path = store.put_bytes("resume.pdf", b"%PDF", request_id="r1")
+    assert store.flush(timeout=5, paths=[path]) is True
+    assert os.path.exists(path)
+
+
+def test_pipelined_batch_gives_each_pair_its_own_folder(isolated_outputs):
+    from Codebase import artifact_store, orchestrator, telemetry
+    from Codebase.benchmarks import corpus, stubs
+
+    gemma, llama = stubs.stub_pipelines()
+    resumes = [corpus.candidate_to_resume_text(c) for c in corpus.generate_candidates(2, seed=3)]
+    jd = "Job Title: Data Engineer\nRequirements: Python, SQL"
+    with telemetry.trace():
+        results, _ = orchestrator.run_pipelined([(r, jd) for r in resumes], gemma, llama)
+    assert artifact_store.flush(timeout=10)
+
+    assert not any("error" in r for r in results)
+    requests_dir = isolated_outputs / "artifacts" / "requests"
+    folders = [p for p in requests_dir.iterdir() if (p / "candidate.json").exists()]
+    assert len(folders) == 2
+    assert len({r["pdf_path"] for r in results}) == 2
@@ -0,0 +1,61 @@
+import threading, time
+import pytest
+import torch
+from Codebase import generation
+
+
+class _Tokenizer:
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": text.split()}
+
+
+class _Pipe:
+    """Runs the shared target and draft modules a fixed number of times per call."""
+
+    def __init__(self):
+        self.model = torch.nn.Linear(2, 2)
+        self.draft = torch.nn.Linear(2, 2)
+        self.tokenizer = _Tokenizer()
+
+    def __call__(self, steps):
+        for _ in range(steps):
+            self.draft(torch.zeros(2))
+            self.model(torch.zeros(2))
+            time.sleep(0.01)
+        return "tok " * steps
+
+
+def test_concurrent_calls_count_only_their_own_steps():
+    pipe = _Pipe()
+    before = generation.assisted_stats()
+    barrier = threading.Barrier(2)
+
+    def call(steps):
+        kwargs = {"assistant_model": pipe.draft}
+        with generation.assisted_tracking(pipe, kwargs) as record:
+            barrier.wait()
+            record(pipe(steps))
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in (5, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    after = generation.assisted_stats()
+    assert after["target_steps"] - before["target_steps"] == 14
+    assert after["draft_tokens"] - before["draft_tokens"] == 14
+    assert after["calls"] - before["calls"] == 2
+
+
+def test_served_pipe_behind_scheduler_gets_a_draft_reference(monkeypatch):
+    from Codebase import config
+    from Codebase.model_server import RemotePipeline
+    from Codebase.scheduler import BatchingScheduler
+
+    monkeypatch.setattr(config, "STAGE3_ASSISTANT_MODEL", "draft-model")
+    monkeypatch.setattr(generation, "load_assistant", lambda *a: pytest.fail("draft loaded in the client"))
+    remote = RemotePipeline("LLaMA", "llama", "llama-model", None, fallback=None, socket_path="/nonexistent")
+    remote._tokenizer = _Tokenizer()  # skip the tokenizer download
+
+    kwargs = generation.assisted_generation_kwargs(BatchingScheduler(remote, "LLaMA"))
+    assert kwargs["assistant_model"].spec == {"kind": "assistant", "model": "draft-model"}
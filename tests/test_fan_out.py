@@ -0,0 +1,26 @@
+import time
+from Codebase import stage3_tailor
+from Codebase.benchmarks import corpus, stubs
+
+
+def test_abandoned_fan_out_stops_generating(isolated_outputs):
+    _, llama = stubs.stub_pipelines()
+    calls = []
+    original = llama.__call__
+
+    class CountingPipe(type(llama)):
+        def __call__(self, prompts, **kwargs):
+            calls.append(len(prompts))
+            time.sleep(0.1)
+            return original(prompts, **kwargs)
+
+    llama.__class__ = CountingPipe
+    candidate = corpus.generate_candidates(1, seed=1)[0]
+    jds = [{"job_title": f"Job {i}", "must_have_skills": ["Python"]} for i in range(12)]
+
+    results = stage3_tailor.tailor_resume_for_jobs(candidate, jds, llama, batch_size=2)
+    next(results)
+    results.close()
+    at_close = len(calls)
+    time.sleep(0.8)  # long enough for all 6 batches if nothing stops the producer
+    assert len(calls) <= at_close + 1, (at_close, len(calls))
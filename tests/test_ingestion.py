@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from reportlab.pdfgen import canvas
+from Codebase import config, utils
+
+
+def _pdf(path, pages: int):
+    c = canvas.Canvas(str(path))
+    for i in range(pages):
+        c.drawString(72, 720, f"Page {i} " + "resume text " * 8)
+        c.showPage()
+    c.save()
+    return str(path)
+
+
+def test_parallel_pdf_stops_at_the_character_cap(tmp_path, monkeypatch):
+    submitted = []
+
+    class Pool(ThreadPoolExecutor):
+        def submit(self, fn, args):
+            submitted.append(args[1:])
+            return super().submit(fn, args)
+
+    pool = Pool(max_workers=2)
+    monkeypatch.setattr(utils, "_get_pdf_pool", lambda: pool)
+    monkeypatch.setattr(config, "INGEST_PDF_WORKERS", 2)
+    monkeypatch.setattr(config, "INGEST_PARALLEL_MIN_PAGES", 8)
+    path = _pdf(tmp_path / "long.pdf", 40)
+
+    text = utils._read_pdf(path, max_pages=40, max_chars=300)
+    assert len(text) == 300 and text.startswith("Page 0")
+    assert sum(stop - start for start, stop in submitted) < 40  # later ranges were never started
+    full = utils._read_pdf(path, max_pages=40, max_chars=1_000_000)
+    assert full.count("Page ") == 40 and full.index("Page 9 ") < full.index("Page 30 ")
+
+
+def test_pdf_workers_are_spawned_not_forked(monkeypatch):
+    monkeypatch.setattr(utils, "_pdf_pool", None)
+    pool = utils._get_pdf_pool()
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown()
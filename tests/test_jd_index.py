@@ -0,0 +1,21 @@
+import time
+from Codebase import config, jd_index, stage2_jd
+
+
+def test_stage2_adds_are_written_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "JD_INDEX_PATH", str(tmp_path / "jd_index.sqlite"))
+    monkeypatch.setattr(config, "JD_INDEX_WRITE_INTERVAL", 0.2)
+    index = jd_index.get_index()
+    upserts = []
+    original = index.upsert
+    monkeypatch.setattr(index, "upsert", lambda records, *a: upserts.append(1) or original(records, *a))
+
+    start = time.perf_counter()
+    for i in range(5):
+        stage2_jd._add_to_index(f"Job Title: Engineer {i}\nRequirements: Python", {"job_title": f"Engineer {i}"})
+    stage2_jd._add_to_index("Job Title: Engineer 0\nRequirements: Python", {"job_title": "Engineer 0"})
+    assert time.perf_counter() - start < 0.1  # nothing written on the request thread
+
+    assert jd_index.flush(timeout=5)
+    assert len(index) == 5
+    assert len(upserts) == 1  # one transaction for the whole window
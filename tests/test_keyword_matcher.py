@@ -0,0 +1,28 @@
+from Codebase import keyword_matcher, stage3_tailor
+
+
+def test_requirement_lines_match_when_worded_differently():
+    keywords = stage3_tailor._extract_keywords({"must_have_skills": ["5 years Python, SQL", "CI/CD"]})
+    matched, missing = keyword_matcher.KeywordMatcher(sorted(keywords)).match(
+        "3+ years of Python and SQL; built CI/CD pipelines"
+    )
+    assert sorted(matched) == ["ci cd", "python", "sql"] and missing == []
+
+
+def test_key_phrases_drop_filler_and_numbers():
+    assert keyword_matcher.key_phrases("Hands-on experience with AWS (EC2, Lambda)") == ["aws", "ec2", "lambda"]
+    assert keyword_matcher.key_phrases("Bachelor's degree in Computer Science") == ["bachelor degree", "computer science"]
+
+
+def test_matrix_engine_and_index_agree_with_the_report():
+    from Codebase import jd_index
+    from Codebase.ats_matrix import ATSScoringEngine
+
+    jds = [{"must_have_skills": ["5 years Python, SQL", "CI/CD"]}, {"must_have_skills": ["Machine Learning", "Go"]}]
+    keywords = [stage3_tailor._extract_keywords(jd) for jd in jds]
+    resumes = ["3+ years of Python and SQL; built CI/CD pipelines", "machine-learning models, Python"]
+    scores = ATSScoringEngine(keywords).score_matrix(resumes)
+    for i, resume in enumerate(resumes):
+        for j, kw in enumerate(keywords):
+            assert scores[i, j] == keyword_matcher.KeywordMatcher(kw).score(resume) == stage3_tailor.compute_ats_score(resume, kw)
+    assert ("skill", "ci cd") in jd_index.jd_terms(jds[0])
@@ -0,0 +1,48 @@
+import threading, time
+from Codebase.model_manager import ModelManager
+
+
+class _Pipe:
+    tokenizer = None
+
+    def __call__(self, prompt, **kwargs):
+        return prompt
+
+
+def _slow_loader(seconds, calls):
+    def load():
+        calls.append(time.monotonic())
+        time.sleep(seconds)
+        return _Pipe()
+    return load
+
+
+def test_loading_one_model_does_not_block_another(tmp_path):
+    manager = ModelManager(policy="unload", offload_dir=str(tmp_path))
+    fast = manager.pipeline("fast", _slow_loader(0.0, []))
+    fast.load()
+    slow_calls = []
+    slow = manager.pipeline("slow", _slow_loader(1.0, slow_calls))
+
+    loader = threading.Thread(target=slow.load)
+    loader.start()
+    while not slow_calls:
+        time.sleep(0.01)
+    start = time.monotonic()
+    assert fast("hi") == "hi"
+    assert time.monotonic() - start < 0.5
+    assert slow.state == "loading"
+    loader.join()
+    assert slow.state == "resident"
+
+
+def test_concurrent_callers_share_one_load(tmp_path):
+    manager = ModelManager(policy="unload", offload_dir=str(tmp_path))
+    calls = []
+    pipe = manager.pipeline("slow", _slow_loader(0.3, calls))
+    threads = [threading.Thread(target=pipe, args=("x",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and pipe.loads == 1
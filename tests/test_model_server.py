@@ -0,0 +1,38 @@
+import os, stat, threading, time
+import pytest
+from Codebase import model_server
+from Codebase.benchmarks import stubs
+
+
+def test_socket_is_private_and_owner_checked(tmp_path, monkeypatch):
+    socket_path = str(tmp_path / "run" / "server.sock")
+    gemma, llama = stubs.stub_pipelines()
+    gemma.label, llama.label = "Gemma", "LLaMA"  # attach() hands these to the fallbacks
+    server = model_server.ModelServer({"gemma": (gemma, "gemma"), "llama": (llama, "llama")}, socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while model_server.server_stats(socket_path) is None:
+            assert time.monotonic() < deadline, "server did not start"
+            time.sleep(0.05)
+        assert stat.S_IMODE(os.stat(tmp_path / "run").st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) & 0o077 == 0
+        assert model_server.attach(None, gemma, llama, socket_path) is not None
+
+        monkeypatch.setattr(os, "getuid", lambda: os.stat(socket_path).st_uid + 1)
+        assert model_server.attach(None, gemma, llama, socket_path) is None
+        with pytest.raises(PermissionError):
+            model_server.request({"op": "stats"}, socket_path)
+    finally:
+        monkeypatch.undo()
+        model_server.stop_server(socket_path)
+        thread.join(timeout=5)
+
+
+def test_shared_folder_is_refused(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+    with pytest.raises(PermissionError):
+        model_server._private_dir(str(shared))
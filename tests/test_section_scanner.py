@@ -0,0 +1,54 @@
+from Codebase.generation import ResumeSectionScanner
+
+
+def scan(text: str, chunk: int = 3) -> tuple[bool, int]:
+    """Feed text in small chunks; returns (done, characters consumed before done)."""
+    scanner = ResumeSectionScanner()
+    for i in range(0, len(text), chunk):
+        scanner.feed(text[i:i + chunk])
+        if scanner.done:
+            return True, i + chunk
+    return False, len(text)
+
+
+def test_multi_entry_education_is_not_cut():
+    text = "SKILLS\nPython\n\nEDUCATION\nB.S. Computer Science, 2019\n\nM.S. Data Science, 2021\n"
+    assert scan(text) == (False, len(text))
+
+
+def test_education_before_other_sections_is_not_cut():
+    text = "EDUCATION\nB.S.\n\nEXPERIENCE\nEngineer at X\n\nSKILLS\nPython, SQL\n"
+    assert scan(text) == (False, len(text))
+
+
+def test_stops_when_a_filled_section_repeats():
+    resume = "SUMMARY\nEngineer.\n\nEDUCATION\nB.S.\n\n"
+    done, consumed = scan(resume + "EDUCATION\nB.S.\n", chunk=1)
+    assert done and consumed == len(resume + "EDUCATION\n")
+
+
+def test_repeated_header_without_body_continues():
+    assert scan("EDUCATION\nEducation\nB.S.\n") == (False, len("EDUCATION\nEducation\nB.S.\n"))
+
+
+def test_stops_at_note_trailer():
+    done, consumed = scan("EDUCATION\nB.S.\n\nNote: this resume was tailored", chunk=1)
+    assert done and consumed == len("EDUCATION\nB.S.\n\nNote:")
+
+
+FULL = ("SUMMARY\nEngineer.\n\nSKILLS\nPython\n\nPROJECTS\nETL tool\n\nEXPERIENCE\nEngineer at X\n\n"
+        "EDUCATION\nB.S. Computer Science, 2019\nStanford University\n\nM.S. Data Science, 2021\n")
+
+
+def test_complete_resume_keeps_every_education_entry():
+    assert scan(FULL) == (False, len(FULL))
+
+
+def test_chatter_after_education_stops():
+    done, consumed = scan(FULL + "\nI hope this helps! Let me know if you need changes.\n", chunk=1)
+    assert done and consumed == len(FULL + "\nI hope this helps! Let me know if you need changes.\n")
+
+
+def test_rule_after_education_stops():
+    done, consumed = scan(FULL + "---\nHere is a summary of the changes:\n", chunk=1)
+    assert done and consumed == len(FULL + "---\n")
@@ -0,0 +1,30 @@
+import os
+from Codebase import config, stage1_resume
+
+
+def _pipe(answer):
+    calls = []
+
+    def pipe(prompt, **kwargs):
+        calls.append(prompt)
+        return [{"generated_text": prompt + answer}]
+    pipe.calls = calls
+    return pipe
+
+
+def test_empty_parse_is_not_cached(isolated_outputs, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "STAGE1_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "STAGE1_CACHE_PATH", os.path.join(str(tmp_path), "stage1.sqlite"))
+    monkeypatch.setattr(config, "STAGE1_CONSTRAINED_DECODING", False)
+    monkeypatch.setattr(stage1_resume, "_cache", None)
+
+    resume = "just some words with no structure at all"
+    for answer, cached in (("I could not find any fields.", False), ('{"name": "Ada"}', True)):
+        stage1_resume.extract_resume_data(resume, _pipe(answer))
+        assert (stage1_resume._get_cache().get(stage1_resume._cache_key(resume)) is not None) is cached
+
+
+def test_non_dict_literal_parses_as_raw_output():
+    parsed = stage1_resume._parse_model_output("{'Python', 'SQL'}")
+    assert parsed == {"raw_output": "{'Python', 'SQL'}"}
+    assert stage1_resume._merge({"email": "a@b.co"}, {1, 2})["email"] == "a@b.co"
@@ -3,27 +3,28 @@
 # ==========================================================
 
 import gradio as gr
-from Codebase import stage1_resume, stage2_jd, stage3_tailor, utils
+from Codebase import artifact_store, config, orchestrator, stage3_tailor, telemetry, utils
+from Codebase.scheduler import BatchingScheduler
 
 # ----------------------------------------------------------
 # 🧩 Pipeline Handler (runs all 3 stages + ATS comparison)
 # ----------------------------------------------------------
 def run_pipeline(resume_file, jd_text, gemma_pipe, llama_pipe):
-    """Executes Stage 1 → Stage 2 → Stage 3 sequentially."""
+    """Executes Stage 1 ∥ Stage 2 (JD rules alongside Gemma) → Stage 3 under one trace ID."""
+    with telemetry.trace():
+        telemetry.inc("requests_total", mode="ui")
+        return _run_pipeline(resume_file, jd_text, gemma_pipe, llama_pipe)
+
+
+def _run_pipeline(resume_file, jd_text, gemma_pipe, llama_pipe):
     try:
-        candidate_data, _ = stage1_resume.extract_resume_data(resume_file.name, gemma_pipe)
-        jd_data, _ = stage2_jd.extract_jd_data_rulebased(jd_text)
+        (candidate_data, _), (jd_data, _) = orchestrator.run_stage1_and_stage2(resume_file.name, jd_text, gemma_pipe)
         tailored_text, pdf_path, ats_report = stage3_tailor.tailor_resume_with_llama(
             candidate_data, jd_data, llama_pipe
         )
+        _flush_pdf(pdf_path)  # Gradio serves the PDF as soon as we return
 
-        ats_summary = (
-            f"### 📊 ATS Comparison\n"
-            f"- **Original Resume:** {ats_report['original_score']}%\n"
-            f"- **Tailored Resume:** {ats_report['tailored_score']}%\n"
-            f"- **Improvement:** +{ats_report['improvement']}%\n\n"
-            f"📄 **PDF Path:** {pdf_path}"
-        )
+        ats_summary = _ats_summary(ats_report, pdf_path)
 
         return candidate_data, tailored_text, pdf_path, ats_summary
 
@@ -32,10 +33,74 @@ def run_pipeline(resume_file, jd_text, gemma_pipe, llama_pipe):
         return {"error": str(e)}, "", None, f"❌ {str(e)}"
 
 
+def _flush_pdf(pdf_path):
+    """Wait for the background writer; fail the request rather than return a PDF path that was never written."""
+    if not artifact_store.flush(paths=[pdf_path]):
+        raise OSError(f"Tailored PDF could not be written to {pdf_path}")
+
+
+def _ats_summary(ats_report, pdf_path):
+    return (
+        f"### 📊 ATS Comparison\n"
+        f"- **Original Resume:** {ats_report['original_score']}%\n"
+        f"- **Tailored Resume:** {ats_report['tailored_score']}%\n"
+        f"- **Improvement:** +{ats_report['improvement']}%\n"
+        f"- **Missing Keywords:** {', '.join(ats_report.get('missing_keywords', [])[:15]) or 'none'}\n\n"
+        f"📄 **PDF Path:** {pdf_path}"
+    )
+
+
+def _sections_markdown(sections):
+    return "\n\n".join(f"#### ✅ {name.title()}\n{body}" for name, body in sections.items())
+
+
+# ----------------------------------------------------------
+# 📡 Streaming Pipeline Handler (tokens appear as they are generated)
+# ----------------------------------------------------------
+def run_pipeline_stream(resume_file, jd_text, gemma_pipe, llama_pipe):
+    """
+    Generator version of run_pipeline for Gradio.
+    Yields (candidate_data, tailored_text, sections_md, pdf_path, status_md) updates:
+    tokens stream into the text box, completed sections appear as they close,
+    and the PDF / ATS report follow at the end. Every step runs under one trace ID.
+    """
+    telemetry.inc("requests_total", mode="ui_stream")
+    return telemetry.trace_generator(_run_pipeline_stream(resume_file, jd_text, gemma_pipe, llama_pipe))
+
+
+def _run_pipeline_stream(resume_file, jd_text, gemma_pipe, llama_pipe):
+    try:
+        yield None, "", "", None, "🔍 *Extracting candidate data (Stage 1)...*"
+        (candidate_data, _), (jd_data, _) = orchestrator.run_stage1_and_stage2(resume_file.name, jd_text, gemma_pipe)
+
+        yield candidate_data, "", "", None, "🧠 *Generating tailored resume (Stage 3)...*"
+        sections = {}
+        for event in stage3_tailor.stream_tailor_resume(candidate_data, jd_data, llama_pipe):
+            if event["type"] == "token":
+                yield candidate_data, event["text"], _sections_markdown(sections), None, "🧠 *Generating...*"
+            elif event["type"] == "section":
+                sections[event["name"]] = event["body"]
+                yield candidate_data, event["text"], _sections_markdown(sections), None, "🧠 *Generating...*"
+            else:
+                _flush_pdf(event["pdf_path"])
+                yield (
+                    candidate_data, event["text"], _sections_markdown(event["sections"]),
+                    event["pdf_path"], _ats_summary(event["ats_report"], event["pdf_path"]),
+                )
+
+    except Exception as e:
+        utils.log_status(f"❌ Error: {e}")
+        yield {"error": str(e)}, "", "", None, f"❌ {str(e)}"
+
+
 # ----------------------------------------------------------
 # 🎨 Modern ResumeLM-style Gradio Interface
 # ----------------------------------------------------------
 def launch_ui(gemma_pipe, llama_pipe):
+    # Concurrent users share one scheduler per model, so their requests are batched
+    gemma_pipe = BatchingScheduler(gemma_pipe, "Gemma")
+    llama_pipe = BatchingScheduler(llama_pipe, "LLaMA")
+
     with gr.Blocks(
         theme=gr.themes.Soft(primary_hue="blue", secondary_hue="purple"),
         title="AI-Powered Resume Tailoring System",
@@ -105,14 +170,26 @@ def launch_ui(gemma_pipe, llama_pipe):
                         placeholder="Generated tailored resume text will appear here...",
                     )
 
+                with gr.Accordion("🧩 Completed Sections", open=False):
+                    sections_output = gr.Markdown()
+
                 pdf_output = gr.File(label="📄 Download Tailored Resume (PDF)")
                 ats_output = gr.Markdown(label="📊 ATS Comparison Results")
 
-                # Connect backend
+                # Connect backend (generator handler → Gradio streams each yield)
+                def handle_generate(resume_file, jd_text):
+                    if config.UI_STREAMING:
+                        yield from run_pipeline_stream(resume_file, jd_text, gemma_pipe, llama_pipe)
+                    else:
+                        candidate_data, tailored_text, pdf_path, ats_summary = run_pipeline(
+                            resume_file, jd_text, gemma_pipe, llama_pipe
+                        )
+                        yield candidate_data, tailored_text, "", pdf_path, ats_summary
+
                 generate_btn.click(
-                    fn=lambda resume_file, jd_text: run_pipeline(resume_file, jd_text, gemma_pipe, llama_pipe),
+                    fn=handle_generate,
                     inputs=[resume_file, jd_text],
-                    outputs=[candidate_output, tailored_output, pdf_output, ats_output],
+                    outputs=[candidate_output, tailored_output, sections_output, pdf_output, ats_output],
                 )
 
         # ------------------- FOOTER -------------------
@@ -126,4 +203,9 @@ def launch_ui(gemma_pipe, llama_pipe):
             """,
         )
 
+    if config.TELEMETRY_ENABLED:
+        telemetry.start_metrics_server()
+        utils.log_status(f"📈 Metrics at http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+
+    demo.queue(default_concurrency_limit=config.UI_CONCURRENCY)
     demo.launch(share=True, debug=True)
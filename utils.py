@@ -3,10 +3,11 @@
 # Helper utilities for I/O, JSON handling, file reading, and logging
 # ==========================================================
 
-import os, json
-from Codebase import config
-from docx import Document
-from PyPDF2 import PdfReader
+import os, sys, json, mmap, hashlib, logging, multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from Codebase import config, telemetry
+from Codebase.cache import DiskLRUCache, content_key
 
 
 # ----------------------------------------------------------
@@ -28,32 +29,161 @@ def load_json(path: str) -> dict:
 # ----------------------------------------------------------
 # 📄 Resume / JD File Text Extraction
 # ----------------------------------------------------------
+_ingest_cache = None
+_pdf_pool = None
+
+
+def _get_ingest_cache():
+    """Return the shared extracted-text cache, or None when disabled."""
+    global _ingest_cache
+    if not config.INGEST_CACHE_ENABLED:
+        return None
+    if _ingest_cache is None:
+        _ingest_cache = DiskLRUCache(config.INGEST_CACHE_PATH, config.INGEST_CACHE_MAX_BYTES)
+    return _ingest_cache
+
+
+def _get_pdf_pool():
+    """
+    Worker pool for page-parallel PDF extraction (created on first large PDF).
+    Workers are spawned, not forked: by then the process may hold loaded models
+    and run scheduler / writer threads, and forking a threaded torch process can deadlock.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=config.INGEST_PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_pool
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash file content through a memory map, without reading it into Python memory."""
+    digest = hashlib.sha256()
+    if os.path.getsize(file_path) == 0:
+        return digest.hexdigest()
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        digest.update(mm)
+    return digest.hexdigest()
+
+
+def _extract_pdf_pages(args):
+    """Worker: extract text for pages [start, stop) of one PDF."""
+    from PyPDF2 import PdfReader
+
+    file_path, start, stop = args
+    pages = PdfReader(file_path).pages
+    return [pages[i].extract_text() for i in range(start, stop)]
+
+
+def _read_pdf(file_path: str, max_pages: int, max_chars: int) -> str:
+    from PyPDF2 import PdfReader
+
+    pdf = PdfReader(file_path)
+    n_pages = min(len(pdf.pages), max_pages)
+    if len(pdf.pages) > max_pages:
+        log_status(f"⚠️ {os.path.basename(file_path)}: only the first {max_pages} of {len(pdf.pages)} pages are read "
+                   f"(INGEST_MAX_PAGES).")
+
+    text, total = [], 0
+    workers = config.INGEST_PDF_WORKERS
+    if n_pages >= config.INGEST_PARALLEL_MIN_PAGES and workers > 1:
+        # Page ranges are extracted in parallel, at most one per worker in flight, and
+        # consumed in page order, so ranges past the character cap are never started
+        step = -(-n_pages // (workers * 2))
+        ranges = iter([(file_path, i, min(i + step, n_pages)) for i in range(0, n_pages, step)])
+        pool = _get_pdf_pool()
+        in_flight = deque(pool.submit(_extract_pdf_pages, r) for _, r in zip(range(workers), ranges))
+        while in_flight:
+            for page_text in in_flight.popleft().result():
+                if page_text:
+                    text.append(page_text)
+                    total += len(page_text) + 1
+            if total >= max_chars:
+                break
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append(pool.submit(_extract_pdf_pages, next_range))
+        for future in in_flight:
+            future.cancel()  # ranges already running finish in the background
+        return "\n".join(text)[:max_chars]
+
+    for page in pdf.pages[:n_pages]:
+        page_text = page.extract_text()
+        if page_text:
+            text.append(page_text)
+            total += len(page_text) + 1
+            if total >= max_chars:
+                break  # enough text; skip remaining pages
+    return "\n".join(text)[:max_chars]
+
+
+def _read_docx(file_path: str, max_chars: int) -> str:
+    from docx import Document
+
+    doc = Document(file_path)
+    text, total = [], 0
+    for p in doc.paragraphs:
+        text.append(p.text)
+        total += len(p.text) + 1
+        if total >= max_chars:
+            break
+    return "\n".join(text)[:max_chars]
+
+
 def read_file_text(file_path: str) -> str:
     """
     Read text content from .txt, .pdf, or .docx files.
-    Raises ValueError for unsupported types.
+    Raises ValueError for unsupported types or files over config.INGEST_MAX_FILE_BYTES.
+
+    Text is capped at config.INGEST_MAX_CHARS characters (and PDFs at
+    config.INGEST_MAX_PAGES pages); extraction stops as soon as a cap is reached,
+    and a warning is logged. .txt files of any size are streamed (the file size
+    limit applies to PDF/DOCX, which are parsed whole); PDF/DOCX text is cached
+    by file content hash.
     """
     ext = os.path.splitext(file_path)[-1].lower()
+    if ext not in (".txt", ".pdf", ".docx"):
+        raise ValueError("Unsupported file type. Please upload .txt, .pdf, or .docx.")
+
+    max_chars = config.INGEST_MAX_CHARS
 
     if ext == ".txt":
+        # Streaming read: only the first max_chars characters (+1 to detect more) are ever decoded
         with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
-
-    elif ext == ".pdf":
-        pdf = PdfReader(file_path)
-        text = []
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text.append(page_text)
-        return "\n".join(text)
-
-    elif ext == ".docx":
-        doc = Document(file_path)
-        return "\n".join(p.text for p in doc.paragraphs)
-
-    else:
-        raise ValueError("Unsupported file type. Please upload .txt, .pdf, or .docx.")
+            text = f.read(max_chars + 1)
+        if len(text) > max_chars:
+            _log_truncated(file_path, max_chars)
+        return text[:max_chars]
+
+    size = os.path.getsize(file_path)
+    if size > config.INGEST_MAX_FILE_BYTES:
+        raise ValueError(
+            f"File too large ({size / 1e6:.1f} MB). Limit is {config.INGEST_MAX_FILE_BYTES / 1e6:.1f} MB."
+        )
+
+    cache = _get_ingest_cache()
+    key = text = None
+    if cache:
+        key = content_key(file_sha256(file_path), ext, str(config.INGEST_MAX_PAGES), str(max_chars))
+        text = cache.get(key)
+
+    if text is None:
+        if ext == ".pdf":
+            text = _read_pdf(file_path, config.INGEST_MAX_PAGES, max_chars)
+        else:
+            text = _read_docx(file_path, max_chars)
+        if cache:
+            cache.set(key, text)
+
+    if len(text) >= max_chars:
+        _log_truncated(file_path, max_chars)
+    return text
+
+
+def _log_truncated(file_path: str, max_chars: int):
+    log_status(f"⚠️ {os.path.basename(file_path)}: text cut at {max_chars:,} characters (INGEST_MAX_CHARS); "
+               f"the rest is ignored.")
 
 
 # ----------------------------------------------------------
@@ -73,9 +203,60 @@ def get_pdf_output_path(candidate_name: str = "candidate"):
     return os.path.join(config.TAILORED_PDF_DIR, f"tailored_resume_{safe_name}.pdf")
 
 
+def get_batch_pdf_output_path(resume_name: str, jd_name: str):
+    """Generate a unique PDF output path for one (resume, JD) pair in batch mode."""
+    safe_resume = resume_name.replace(" ", "_")
+    safe_jd = jd_name.replace(" ", "_")
+    return os.path.join(config.TAILORED_PDF_DIR, f"tailored_resume_{safe_resume}__{safe_jd}.pdf")
+
+
+# ----------------------------------------------------------
+# 🤖 Model Output Helpers
+# ----------------------------------------------------------
+def generated_text(output) -> str:
+    """
+    Return the generated text from one pipeline output item.
+    Batched text-generation calls yield a list per prompt, text2text a dict.
+    """
+    if isinstance(output, list):
+        output = output[0]
+    return output["generated_text"]
+
+
 # ----------------------------------------------------------
 # 🧠 Logging Helper
 # ----------------------------------------------------------
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, so redirect_stdout still captures log lines."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _TraceFilter(logging.Filter):
+    """Prefix records with the active request's trace ID, when there is one."""
+
+    def filter(self, record):
+        trace_id = telemetry.current_trace_id()
+        record.trace = f"[{trace_id}] " if trace_id else ""
+        return True
+
+
+logger = logging.getLogger("ats_resume_maker")
+if not logger.handlers:
+    _handler = _StdoutHandler()
+    _handler.setFormatter(logging.Formatter("[%(levelname)s] %(trace)s%(message)s"))
+    _handler.addFilter(_TraceFilter())
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
 def log_status(msg: str):
-    """Uniform status messages for CLI and Gradio."""
-    print(f"[INFO] {msg}")
+    """Uniform status messages for CLI and Gradio (tagged with the trace ID, if any)."""
+    logger.info(msg)